@@ -0,0 +1,67 @@
+"""Sampled access logging as a plain ASGI middleware.
+
+Logging every request line costs more than computing most responses, so
+only one request in ``sample_every`` is logged at INFO. Server errors and
+slow requests are always logged at WARNING. Messages use lazy %-formatting,
+so nothing is formatted unless a handler will emit it.
+"""
+import itertools
+import logging
+import os
+import time
+
+logger = logging.getLogger("taxync.access")
+
+
+class LogSampler:
+    """Deterministic 1-in-N sampler; ``every=0`` never samples."""
+
+    def __init__(self, every: int):
+        self.every = every
+        self._counter = itertools.count()
+
+    def __call__(self) -> bool:
+        return self.every > 0 and next(self._counter) % self.every == 0
+
+
+class AccessLogMiddleware:
+    def __init__(self, app, sample_every: int = 100, slow_ms: float = 1000.0):
+        self.app = app
+        self.sample = LogSampler(sample_every)
+        self.slow_ms = slow_ms
+
+    @classmethod
+    def options_from_env(cls) -> dict:
+        """Options from TAXYNC_ACCESS_LOG_EVERY and TAXYNC_SLOW_REQUEST_MS."""
+        return {
+            "sample_every": int(os.getenv("TAXYNC_ACCESS_LOG_EVERY", "100")),
+            "slow_ms": float(os.getenv("TAXYNC_SLOW_REQUEST_MS", "1000")),
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+        raised = False
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            raised = True
+            logger.exception("Unhandled error in %s %s", scope["method"], scope["path"])
+            raise
+        finally:
+            if not raised:
+                elapsed_ms = 1000 * (time.perf_counter() - started)
+                if status >= 500 or elapsed_ms >= self.slow_ms:
+                    logger.warning("%s %s -> %d in %.1fms", scope["method"], scope["path"], status, elapsed_ms)
+                elif self.sample() and logger.isEnabledFor(logging.INFO):
+                    logger.info("%s %s -> %d in %.1fms", scope["method"], scope["path"], status, elapsed_ms)
@@ -0,0 +1,101 @@
+"""/calculate-tax requests per second on one worker.
+
+Run from the repository root:
+
+    python benchmarks/bench_calculate_tax_rps.py [--seconds S]
+
+Calls the ASGI app directly in one event loop (i.e. one worker) with a
+minimal receive/send pair, so the numbers cover routing, body parsing,
+validation, logging, middleware and the tax calculation, with no client or
+network cost. Two runs are reported: repeated payloads (served from the
+result cache) and unique payloads (every request computed). ``GET /`` is
+measured too, as the floor set by the framework itself.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("REDIS_URL", "")
+
+from main import app  # noqa: E402
+
+
+def scope(method: str, path: str) -> dict:
+    return {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"bench"), (b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+
+
+async def request(method: str, path: str, body: bytes) -> int:
+    status = 0
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope(method, path), receive, send)
+    return status
+
+
+async def run(seconds: float, method: str, path: str, bodies) -> dict:
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    started = time.perf_counter()
+    i = 0
+    while time.perf_counter() < deadline:
+        t = time.perf_counter()
+        status = await request(method, path, bodies(i))
+        latencies.append(time.perf_counter() - t)
+        assert status == 200, status
+        i += 1
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_us": round(1e6 * statistics.median(latencies), 1),
+        "p99_us": round(1e6 * latencies[int(0.99 * (len(latencies) - 1))], 1),
+    }
+
+
+def payload(income: float) -> bytes:
+    return json.dumps({"income": income, "section80C": 100000, "section80D": 15000, "hra": 60000}).encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+    # Logs go to a real handler, as in production, but not to the terminal
+    logging.getLogger().handlers[:] = [logging.FileHandler(os.devnull)]
+
+    cached = payload(1_250_000)
+    runs = {
+        "GET / (floor)": ("GET", "/", lambda i: b""),
+        "calculate-tax cached": ("POST", "/calculate-tax", lambda i: cached),
+        "calculate-tax unique": ("POST", "/calculate-tax", lambda i: payload(1_250_000 + i)),
+    }
+    for name, (method, path, bodies) in runs.items():
+        result = asyncio.run(run(args.seconds, method, path, bodies))
+        print(f"{name:>22}: {result}")
+
+
+if __name__ == "__main__":
+    main()
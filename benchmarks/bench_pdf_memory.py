@@ -0,0 +1,88 @@
+"""Peak traced memory per PDF export: legacy double-buffered path vs streaming.
+
+Run from the repository root:
+
+    python benchmarks/bench_pdf_memory.py [--iterations N]
+
+"before" reproduces the original handler: split + b64decode of the chart,
+then ``io.BytesIO(buffer.read())`` handed to StreamingResponse. "after" is
+the current path: ``render_pdf`` followed by ``iter_chunks``.
+"""
+import argparse
+import base64
+import io
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reports import decode_chart_image, iter_chunks, render_pdf, write_pdf  # noqa: E402
+
+FORM_DATA = {"income": 1850000, "section80C": 150000, "section80D": 25000}
+TAX_RESULT = {
+    "old_regime_tax": 296400,
+    "new_regime_tax": 249600,
+    "savings": 46800,
+    "suggestions": [f"Suggestion {i}: invest more to save up to ₹{i * 1000:,}" for i in range(40)],
+}
+
+
+def make_chart_image(size: int = 400) -> str:
+    """A noisy PNG so the encoded payload is a realistic few hundred KB."""
+    from PIL import Image
+
+    img = Image.frombytes("RGB", (size, size), os.urandom(size * size * 3))
+    out = io.BytesIO()
+    img.save(out, format="PNG")
+    return "data:image/png;base64," + base64.b64encode(out.getvalue()).decode("ascii")
+
+
+def legacy_export(chart_image: str) -> int:
+    # Chart decode as the old handler did it (kept alive while the PDF builds)
+    header, encoded = chart_image.split(",", 1)
+    image_buffer = io.BytesIO(base64.b64decode(encoded))
+    buffer = io.BytesIO()
+    write_pdf(buffer, FORM_DATA, TAX_RESULT, chart_image)
+    buffer.seek(0)
+    body = io.BytesIO(buffer.read())
+    sent = sum(len(chunk) for chunk in body)
+    del image_buffer
+    return sent
+
+
+def streaming_export(chart_image: str) -> int:
+    content = render_pdf(FORM_DATA, TAX_RESULT, chart_image)
+    return sum(len(chunk) for chunk in iter_chunks(content))
+
+
+def measure(fn, chart_image: str, iterations: int) -> dict:
+    fn(chart_image)  # warm imports and font caches outside the measurement
+    peaks = []
+    size = 0
+    for _ in range(iterations):
+        tracemalloc.start()
+        size = fn(chart_image)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return {"pdf_bytes": size, "peak_bytes": min(peaks)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=3)
+    args = parser.parse_args()
+
+    chart_image = make_chart_image()
+    print(f"chart payload: {len(chart_image):,} base64 chars, decoded {len(decode_chart_image(chart_image)):,} bytes")
+    before = measure(legacy_export, chart_image, args.iterations)
+    after = measure(streaming_export, chart_image, args.iterations)
+    print(f"{'path':<10} {'pdf bytes':>12} {'peak bytes':>14}")
+    for name, result in (("before", before), ("after", after)):
+        print(f"{name:<10} {result['pdf_bytes']:>12,} {result['peak_bytes']:>14,}")
+    saved = before["peak_bytes"] - after["peak_bytes"]
+    print(f"peak reduction: {saved:,} bytes ({saved / before['peak_bytes']:.1%})")
+
+
+if __name__ == "__main__":
+    main()
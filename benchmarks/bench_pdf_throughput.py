@@ -0,0 +1,98 @@
+"""PDF rendering throughput with cached report templates.
+
+Run from the repository root:
+
+    python benchmarks/bench_pdf_throughput.py [--exports N] [--workers W]
+
+Reports the in-process cost of one render with and without the template
+cache, then exports/second and latency percentiles through ``ReportPool`` at
+1, 8 and 32 concurrent exports.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import report_templates  # noqa: E402
+from report_pool import ReportPool  # noqa: E402
+from reports import render_pdf  # noqa: E402
+
+FORM_DATA = {"income": 1850000, "section80C": 150000, "section80D": 25000, "employer": "Acme"}
+TAX_RESULT = {
+    "old_regime_tax": 296400,
+    "new_regime_tax": 249600,
+    "savings": 46800,
+    "suggestions": [f"Suggestion {i}" for i in range(5)],
+}
+
+
+def per_render_ms(template: str, iterations: int, cached: bool) -> float:
+    render_pdf(FORM_DATA, TAX_RESULT, None, template)
+    timings = []
+    for _ in range(iterations):
+        if not cached:
+            report_templates.get_template.cache_clear()
+            report_templates._sample_styles.cache_clear()
+        started = time.perf_counter()
+        render_pdf(FORM_DATA, TAX_RESULT, None, template)
+        timings.append(time.perf_counter() - started)
+    return 1000 * statistics.median(timings)
+
+
+async def pool_throughput(pool: ReportPool, template: str, concurrency: int, exports: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            await pool.run(render_pdf, FORM_DATA, TAX_RESULT, None, template)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(exports)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "exports_per_sec": exports / elapsed,
+        "p50_ms": 1000 * latencies[len(latencies) // 2],
+        "p95_ms": 1000 * latencies[int(len(latencies) * 0.95) - 1],
+    }
+
+
+async def run_pool(args) -> list:
+    pool = ReportPool(workers=args.workers, queue_depth=64)
+    try:
+        # Warm every worker process (imports and template compilation)
+        await asyncio.gather(*(pool.run(render_pdf, FORM_DATA, TAX_RESULT, None, args.template)
+                               for _ in range(max(1, args.workers) * 2)))
+        return [await pool_throughput(pool, args.template, c, args.exports) for c in (1, 8, 32)]
+    finally:
+        pool.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--exports", type=int, default=128)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--template", default="summary", choices=sorted(report_templates.TEMPLATES))
+    parser.add_argument("--iterations", type=int, default=30)
+    args = parser.parse_args()
+
+    uncached = per_render_ms(args.template, args.iterations, cached=False)
+    cached = per_render_ms(args.template, args.iterations, cached=True)
+    print(f"single render ({args.template}): uncached {uncached:.2f} ms, cached {cached:.2f} ms "
+          f"({1 - cached / uncached:.0%} faster)")
+
+    print(f"{'concurrency':>11} {'exports/s':>10} {'p50 ms':>8} {'p95 ms':>8}   (workers={args.workers})")
+    for row in asyncio.run(run_pool(args)):
+        print(f"{row['concurrency']:>11} {row['exports_per_sec']:>10.1f} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Cold start: time and memory to import the app and serve a first request.
+
+Run from the repository root:
+
+    python benchmarks/bench_startup.py [--runs N] [--top K]
+
+Each run is a fresh interpreter, so nothing is cached between runs. For
+every run the script records the time to ``import main``, the peak RSS
+after the import, and the time until the first ``/calculate-tax`` response
+(through a TestClient, lifespan included). The slowest modules from
+``python -X importtime`` are listed last.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+with open("/proc/self/status") as f:
+    hwm_kb = next(int(line.split()[1]) for line in f if line.startswith("VmHWM"))
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    assert client.post("/calculate-tax", json={"income": 1200000}).status_code == 200
+print(json.dumps({
+    "import_s": imported - started,
+    "first_response_s": time.perf_counter() - started,
+    "rss_mb": hwm_kb / 1024,
+}))
+"""
+
+
+def env() -> dict:
+    return dict(os.environ, REDIS_URL="")
+
+
+def probe() -> dict:
+    out = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, env=env(), capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def import_times(top: int) -> list:
+    """(cumulative microseconds, module) for the slowest imports."""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                         cwd=ROOT, env=env(), capture_output=True, text=True, check=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    runs = [probe() for _ in range(args.runs)]
+    for key, unit in (("import_s", "s"), ("first_response_s", "s"), ("rss_mb", "MB")):
+        values = [run[key] for run in runs]
+        print(f"{key:18} median {statistics.median(values):8.3f}{unit}  min {min(values):8.3f}{unit}")
+
+    print(f"\nslowest imports (cumulative, top {args.top}):")
+    for cumulative, name in import_times(args.top):
+        print(f"  {cumulative / 1000:8.1f}ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,537 @@
+"""Load test of the app under uvicorn, with a local Redis stand-in.
+
+Run from the repository root:
+
+    python benchmarks/loadtest.py [--scenario mixed] [--workers 1,2,4] [--concurrency 32] [--duration 20]
+    python benchmarks/loadtest.py --scenario all --workers 1,4 --output load.json [--compare baseline.json]
+
+For each worker count, ``uvicorn main:app --workers N`` is started on a
+local port with ``REDIS_URL`` pointing at ``RedisStandIn``, a small RESP
+server running in this process, so no outside services are needed. An
+asyncio client then keeps ``--concurrency`` keep-alive connections busy for
+``--duration`` seconds (after ``--warmup``), picking requests by the
+scenario's weights:
+
+* ``calc``: ``/calculate-tax`` with unique incomes (every request computed)
+* ``export``: ``/export/pdf`` and ``/export/excel``
+* ``share-read``: ``GET /share/{id}`` over pre-created shares, some new shares
+* ``mixed``: mostly ``/calculate-tax``, with share reads and some exports,
+  so the export latencies show what calculation traffic does to them
+
+The export cache is off unless ``--export-cache`` is given, so exports are
+rendered. Results are throughput, p50/p95/p99 latency (overall and per
+request type) and the CPU each worker used, with its report-rendering
+processes, read from ``/proc``. Metric names such as
+``load.mixed.w4.export_pdf.p99_ms`` work with ``--compare`` as in
+``run.py``.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from run import FORM_DATA, ROOT, TAX_RESULT, git_revision, percentile, report_comparison  # noqa: E402
+
+# Request type -> weight, per scenario
+SCENARIOS = {
+    "calc": {"calculate_tax": 1.0},
+    "export": {"export_pdf": 0.8, "export_excel": 0.2},
+    "share-read": {"share_read": 0.95, "share": 0.05},
+    "mixed": {"calculate_tax": 0.70, "share_read": 0.20, "share": 0.03, "export_pdf": 0.05, "export_excel": 0.02},
+}
+SHARES = 200
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+
+class RedisStandIn:
+    """Just enough of the Redis protocol for ``Storage``: string values with
+    expiry (GET, SET EX/PX/NX/XX, DEL, EXISTS, TTL, PTTL, EXPIRE, INCR) and
+    the connection handshake, in RESP2 or, after ``HELLO 3``, RESP3. Runs
+    its own event loop in a thread, so it does not compete with the load
+    generator's loop."""
+
+    def __init__(self):
+        self.data = {}
+        self.commands = 0
+        self.port = None
+        self._loop = asyncio.new_event_loop()
+        self._server = None
+        self._thread = None
+        # Connection handlers, cancelled on stop
+        self._handlers = set()
+
+    def start(self) -> int:
+        ready = threading.Event()
+
+        async def serve():
+            self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+            self.port = self._server.sockets[0].getsockname()[1]
+            ready.set()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(serve())
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="redis-stand-in", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self.port
+
+    def stop(self) -> None:
+        """Close the server and its connections, then stop and close the loop."""
+        if self._loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop.close()
+
+    async def _shutdown(self) -> None:
+        self._server.close()
+        for task in self._handlers:
+            task.cancel()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        await self._server.wait_closed()
+
+    @property
+    def url(self) -> str:
+        return f"redis://127.0.0.1:{self.port}/0"
+
+    def _live(self, key: bytes):
+        entry = self.data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        return entry
+
+    def execute(self, args: list, resp3: bool = False) -> bytes:
+        """The RESP reply to one command."""
+        self.commands += 1
+        name = args[0].upper()
+        null = b"_\r\n" if resp3 else b"$-1\r\n"
+        if name == b"HELLO":
+            fields = [(b"server", b"$5\r\nredis"), (b"version", b"$5\r\n7.2.0"), (b"proto", b":3" if resp3 else b":2"),
+                      (b"id", b":1"), (b"mode", b"$10\r\nstandalone"), (b"role", b"$6\r\nmaster"), (b"modules", b"*0")]
+            items = b"".join(b"$%d\r\n%s\r\n%s\r\n" % (len(k), k, v) for k, v in fields)
+            return (b"%%%d\r\n" % len(fields) if resp3 else b"*%d\r\n" % (2 * len(fields))) + items
+        if name == b"PING":
+            return b"+PONG\r\n"
+        if name in (b"SELECT", b"CLIENT", b"AUTH", b"READONLY"):
+            return b"+OK\r\n"
+        if name == b"GET":
+            entry = self._live(args[1])
+            return null if entry is None else b"$%d\r\n%s\r\n" % (len(entry[0]), entry[0])
+        if name == b"SET":
+            key, value, expires, options = args[1], args[2], None, [a.upper() for a in args[3:]]
+            if b"EX" in options:
+                expires = time.monotonic() + int(options[options.index(b"EX") + 1])
+            elif b"PX" in options:
+                expires = time.monotonic() + int(options[options.index(b"PX") + 1]) / 1000
+            exists = self._live(key) is not None
+            if (b"NX" in options and exists) or (b"XX" in options and not exists):
+                return null
+            self.data[key] = (value, expires)
+            return b"+OK\r\n"
+        if name in (b"DEL", b"EXISTS"):
+            found = [key for key in args[1:] if self._live(key) is not None]
+            if name == b"DEL":
+                for key in found:
+                    del self.data[key]
+            return b":%d\r\n" % len(found)
+        if name in (b"TTL", b"PTTL"):
+            entry = self._live(args[1])
+            if entry is None:
+                return b":-2\r\n"
+            if entry[1] is None:
+                return b":-1\r\n"
+            scale = 1000 if name == b"PTTL" else 1
+            return b":%d\r\n" % round((entry[1] - time.monotonic()) * scale)
+        if name == b"EXPIRE":
+            entry = self._live(args[1])
+            if entry is None:
+                return b":0\r\n"
+            self.data[args[1]] = (entry[0], time.monotonic() + int(args[2]))
+            return b":1\r\n"
+        if name == b"INCR":
+            entry = self._live(args[1])
+            value = int(entry[0]) + 1 if entry else 1
+            self.data[args[1]] = (str(value).encode(), entry[1] if entry else None)
+            return b":%d\r\n" % value
+        return b"-ERR unknown command '%s'\r\n" % args[0]
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        resp3 = False
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.startswith(b"*"):
+                    # Inline command
+                    if line.split():
+                        writer.write(self.execute(line.split(), resp3))
+                    continue
+                args = []
+                for _ in range(int(line[1:])):
+                    size = int((await reader.readline())[1:])
+                    args.append((await reader.readexactly(size + 2))[:-2])
+                if args[0].upper() == b"HELLO" and len(args) > 1:
+                    if args[1] not in (b"2", b"3"):
+                        writer.write(b"-NOPROTO unsupported protocol version\r\n")
+                        continue
+                    resp3 = args[1] == b"3"
+                writer.write(self.execute(args, resp3))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._handlers.discard(task)
+            writer.close()
+
+
+class HttpConnection:
+    """Minimal HTTP/1.1 keep-alive client (Content-Length and chunked bodies)."""
+
+    def __init__(self, host: str, port: int):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method: str, path: str, body: bytes = b"", headers: dict = None) -> tuple:
+        """``(status, body)``."""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        head = [f"{method} {path} HTTP/1.1", f"Host: {self.host}", f"Content-Length: {len(body)}"]
+        head += [f"{k}: {v}" for k, v in (headers or {}).items()]
+        self.writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + body)
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed")
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+        if "content-length" in response_headers:
+            content = await self.reader.readexactly(int(response_headers["content-length"]))
+        elif response_headers.get("transfer-encoding") == "chunked":
+            parts = []
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                parts.append(await self.reader.readexactly(size + 2))
+                if size == 0:
+                    break
+            content = b"".join(p[:-2] for p in parts)
+        else:
+            content = await self.reader.read()
+        if response_headers.get("connection") == "close":
+            self.close()
+        return status, content
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+def request_for(kind: str, i: int, share_ids: list) -> tuple:
+    """``(method, path, body, headers)`` of the ``i``-th request of a type."""
+    json_headers = {"Content-Type": "application/json"}
+    if kind == "calculate_tax":
+        # Unique incomes, so every request is computed rather than cached
+        body = {"income": 1_000_000 + i * 7, "section80C": 100000, "hra": 60000}
+        return "POST", "/calculate-tax", json.dumps(body).encode(), json_headers
+    if kind in ("export_pdf", "export_excel"):
+        body = {"formData": dict(FORM_DATA, income=FORM_DATA["income"] + i), "taxResult": TAX_RESULT}
+        return "POST", "/export/" + kind.split("_")[1], json.dumps(body).encode(), json_headers
+    if kind == "share":
+        body = {"formData": dict(FORM_DATA, income=FORM_DATA["income"] + i), "taxResult": TAX_RESULT}
+        return "POST", "/share", json.dumps(body).encode(), json_headers
+    if kind == "share_read":
+        return "GET", f"/share/{share_ids[i % len(share_ids)]}", b"", {}
+    raise ValueError(f"Unknown request type {kind}")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers: int, port: int, redis_url: str, export_cache: bool) -> subprocess.Popen:
+    # Every simulated client comes from 127.0.0.1, so the per-client export limit is off
+    env = dict(os.environ, REDIS_URL=redis_url, TAXYNC_ACCESS_LOG_EVERY="0", TAXYNC_LOG_LEVEL="WARNING",
+               TAXYNC_EXPORT_RATE="0")
+    if not export_cache:
+        env["TAXYNC_EXPORT_CACHE"] = "off"
+    command = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+               "--workers", str(workers), "--no-access-log", "--log-level", "warning"]
+    # Own process group, so stop_server also reaches render pools left behind by workers
+    return subprocess.Popen(command, cwd=ROOT, env=env, start_new_session=True)
+
+
+def stop_server(server: subprocess.Popen) -> None:
+    try:
+        os.killpg(server.pid, signal.SIGTERM)
+        server.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        pass
+    except ProcessLookupError:
+        return
+    try:
+        os.killpg(server.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+async def wait_ready(port: int, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        conn = HttpConnection("127.0.0.1", port)
+        try:
+            status, _ = await conn.request("GET", "/")
+            if status == 200:
+                return
+        except OSError:
+            pass
+        finally:
+            conn.close()
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Server on port {port} did not start in {timeout}s")
+        await asyncio.sleep(0.2)
+
+
+def process_tree() -> dict:
+    """pid -> parent pid, for every process in /proc."""
+    parents = {}
+    for name in os.listdir("/proc"):
+        if name.isdigit():
+            try:
+                with open(f"/proc/{name}/stat") as f:
+                    parents[int(name)] = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                pass
+    return parents
+
+
+def cpu_seconds(pid: int) -> float:
+    """User + system CPU time of a process so far (0 once it has exited)."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return 0.0
+    # utime and stime are fields 14 and 15; fields[0] is field 3 (state)
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+
+def worker_processes(server_pid: int, workers: int) -> dict:
+    """Worker pid -> pids of its descendants (e.g. its report render pool).
+    With a single worker, uvicorn serves from the main process itself."""
+    parents = process_tree()
+    children = {}
+    for pid, parent in parents.items():
+        children.setdefault(parent, []).append(pid)
+
+    def descendants(pid):
+        found = []
+        for child in children.get(pid, []):
+            found += [child] + descendants(child)
+        return found
+
+    if workers == 1:
+        return {server_pid: descendants(server_pid)}
+    # The supervisor's children, less multiprocessing's resource tracker
+    return {pid: descendants(pid) for pid in children.get(server_pid, []) if not _is_resource_tracker(pid)}
+
+
+def _is_resource_tracker(pid: int) -> bool:
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return b"resource_tracker" in f.read()
+    except OSError:
+        return True
+
+
+def cpu_snapshot(server_pid: int, workers: int) -> dict:
+    """Worker pid -> (own CPU seconds, {descendant pid: CPU seconds})."""
+    return {
+        pid: (cpu_seconds(pid), {child: cpu_seconds(child) for child in children})
+        for pid, children in worker_processes(server_pid, workers).items()
+    }
+
+
+def cpu_usage(before: dict, after: dict, seconds: float) -> list:
+    """Per worker: CPU % of one core, for the worker and for its subprocesses."""
+    usage = []
+    for pid, (own, children) in sorted(after.items()):
+        own_before, children_before = before.get(pid, (0.0, {}))
+        pool = sum(cpu - children_before.get(child, 0.0) for child, cpu in children.items())
+        usage.append({
+            "pid": pid,
+            "cpu_pct": round(100 * (own - own_before) / seconds, 1),
+            "subprocess_cpu_pct": round(100 * pool / seconds, 1),
+        })
+    return usage
+
+
+async def drive(port: int, weights: dict, concurrency: int, seconds: float, share_ids: list, seed: int) -> list:
+    """Keep ``concurrency`` connections busy for ``seconds``; returns
+    ``(request type, latency seconds, status)`` per request."""
+    kinds, probabilities = list(weights), list(weights.values())
+    samples = []
+    counter = iter(range(10 ** 9))
+    deadline = time.perf_counter() + seconds
+
+    async def client(n):
+        rng = random.Random(seed * 1000 + n)
+        conn = HttpConnection("127.0.0.1", port)
+        try:
+            while time.perf_counter() < deadline:
+                kind = rng.choices(kinds, probabilities)[0]
+                method, path, body, headers = request_for(kind, next(counter), share_ids)
+                started = time.perf_counter()
+                try:
+                    status, _ = await conn.request(method, path, body, headers)
+                except (OSError, ValueError, asyncio.IncompleteReadError):
+                    conn.close()
+                    status = 0
+                samples.append((kind, time.perf_counter() - started, status))
+        finally:
+            conn.close()
+
+    await asyncio.gather(*(client(n) for n in range(concurrency)))
+    return samples
+
+
+def summarize(samples: list, seconds: float) -> dict:
+    def stats(latencies, errors):
+        latencies = sorted(latencies)
+        return {
+            "requests": len(latencies),
+            "errors": errors,
+            "rps": round(len(latencies) / seconds, 1),
+            "p50_ms": round(1000 * percentile(latencies, 0.50), 3),
+            "p95_ms": round(1000 * percentile(latencies, 0.95), 3),
+            "p99_ms": round(1000 * percentile(latencies, 0.99), 3),
+        }
+
+    ok = [(kind, latency) for kind, latency, status in samples if status == 200]
+    summary = {"all": stats([latency for _, latency in ok], len(samples) - len(ok))}
+    for kind in sorted({kind for kind, _, _ in samples}):
+        latencies = [latency for k, latency in ok if k == kind]
+        if latencies:
+            errors = sum(1 for k, _, status in samples if k == kind and status != 200)
+            summary[kind] = stats(latencies, errors)
+    return summary
+
+
+async def run_load(scenario: str, workers: int, redis: RedisStandIn, args) -> dict:
+    port = free_port()
+    server = start_server(workers, port, redis.url, args.export_cache)
+    try:
+        await wait_ready(port)
+        setup = HttpConnection("127.0.0.1", port)
+        share_ids = []
+        for i in range(SHARES):
+            _, body = await setup.request(*request_for("share", i, share_ids))
+            share_ids.append(json.loads(body)["reportId"])
+        setup.close()
+        weights = SCENARIOS[scenario]
+        # Warm-up: imports, template compilation, render pool start
+        await drive(port, weights, args.concurrency, args.warmup, share_ids, seed=0)
+        before, started = cpu_snapshot(server.pid, workers), time.perf_counter()
+        samples = await drive(port, weights, args.concurrency, args.duration, share_ids, seed=1)
+        elapsed = time.perf_counter() - started
+        cpu = cpu_usage(before, cpu_snapshot(server.pid, workers), elapsed)
+    finally:
+        stop_server(server)
+    return {"summary": summarize(samples, elapsed), "workers": cpu}
+
+
+def print_report(key: str, run: dict, out) -> None:
+    print(f"\n{key}", file=out)
+    for kind, s in run["summary"].items():
+        print(f"  {kind:14} {s['requests']:>7} req {s['errors']:>5} err {s['rps']:>9.1f} rps  "
+              f"p50 {s['p50_ms']:>8.2f}  p95 {s['p95_ms']:>8.2f}  p99 {s['p99_ms']:>8.2f} ms", file=out)
+    for w in run["workers"]:
+        print(f"  worker {w['pid']:>7}  cpu {w['cpu_pct']:>6.1f}%  render processes {w['subprocess_cpu_pct']:>6.1f}%", file=out)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", default="mixed", help=f"one of {', '.join(SCENARIOS)}, comma-separated, or all")
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated uvicorn worker counts")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent keep-alive connections")
+    parser.add_argument("--duration", type=float, default=20, help="seconds measured per run")
+    parser.add_argument("--warmup", type=float, default=3, help="seconds of unmeasured load first")
+    parser.add_argument("--export-cache", action="store_true", help="leave the export cache on")
+    parser.add_argument("--output", help="write the JSON result here (default: stdout)")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against a stored result")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative regression")
+    args = parser.parse_args()
+
+    scenarios = list(SCENARIOS) if args.scenario == "all" else args.scenario.split(",")
+    for scenario in scenarios:
+        if scenario not in SCENARIOS:
+            parser.error(f"unknown scenario {scenario}")
+    worker_counts = [int(w) for w in args.workers.split(",")]
+
+    redis = RedisStandIn()
+    redis.start()
+    result = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git": git_revision(),
+            "cpus": os.cpu_count(),
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "export_cache": args.export_cache,
+        },
+        "metrics": {},
+        "runs": {},
+    }
+    try:
+        for scenario in scenarios:
+            for workers in worker_counts:
+                key = f"load.{scenario}.w{workers}"
+                run = asyncio.run(run_load(scenario, workers, redis, args))
+                print_report(key, run, sys.stderr)
+                result["runs"][key] = run
+                for kind, stats in run["summary"].items():
+                    prefix = key if kind == "all" else f"{key}.{kind}"
+                    for name in ("rps", "p50_ms", "p95_ms", "p99_ms"):
+                        result["metrics"][f"{prefix}.{name}"] = stats[name]
+                result["metrics"][f"{key}.cpu_pct"] = round(sum(w["cpu_pct"] + w["subprocess_cpu_pct"] for w in run["workers"]), 1)
+    finally:
+        redis.stop()
+    result["meta"]["redis_commands"] = redis.commands
+
+    text = json.dumps(result, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if not args.compare:
+        return 0
+    return report_comparison(result["metrics"], args.compare, args.threshold)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
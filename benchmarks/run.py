@@ -0,0 +1,306 @@
+"""Reproducible benchmark suite with JSON output and baseline comparison.
+
+Run from the repository root:
+
+    python benchmarks/run.py [--quick] [--only micro,e2e] [--output results.json]
+    python benchmarks/run.py --compare baseline.json [--threshold 0.10]
+
+Two groups of benchmarks are run:
+
+* ``micro``: ``calculate_old_regime_tax`` / ``calculate_new_regime_tax`` per
+  call, over several income distributions (uniform, log-normal around typical
+  salaries, clustered on slab edges and around the 87A rebate limit).
+* ``e2e``: ``/calculate-tax``, ``/export/pdf``, ``/export/excel``, ``/share``
+  and ``GET /share/{id}`` through ``TestClient`` at several concurrency
+  levels. Every export request is for a different report, so exports are
+  rendered; ``export_pdf_cached`` repeats one report to time cache hits.
+  Storage talks to the Redis at ``REDIS_URL`` when one is given, otherwise
+  to the load-test harness's in-process RESP stand-in, so no Redis server
+  is needed and the Redis code paths are still exercised.
+
+Every metric is a number keyed by a stable name such as
+``e2e.calculate_tax.c8.rps``. With ``--compare`` the run is checked against a
+stored result: metrics that got worse by more than ``--threshold`` are listed
+and the exit status is 1. Use ``--save-baseline PATH`` to write the current
+run as the new baseline.
+"""
+import argparse
+import atexit
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Redis given by the caller, if any; otherwise e2e starts a stand-in
+REDIS_URL = os.getenv("REDIS_URL") or None
+os.environ.setdefault("REDIS_URL", "")
+# All requests come from one TestClient; renders must not be rate limited
+os.environ.setdefault("TAXYNC_EXPORT_RATE", "0")
+# A fresh export cache per run, so renders left on disk by an earlier run
+# are not timed as cache hits
+if not os.getenv("TAXYNC_EXPORT_CACHE_DIR"):
+    os.environ["TAXYNC_EXPORT_CACHE_DIR"] = tempfile.mkdtemp(prefix="taxync-bench-exports-")
+    atexit.register(shutil.rmtree, os.environ["TAXYNC_EXPORT_CACHE_DIR"], ignore_errors=True)
+
+import numpy as np  # noqa: E402
+
+# Metrics where a larger value is better; everything else is a latency/cost
+HIGHER_IS_BETTER = ("rps",)
+
+FORM_DATA = {"income": 1850000, "section80C": 150000, "section80D": 25000, "hra": 120000, "employer": "Acme"}
+TAX_RESULT = {
+    "old_regime_tax": 296400,
+    "new_regime_tax": 249600,
+    "savings": 46800,
+    "suggestions": [f"Suggestion {i}" for i in range(5)],
+}
+
+
+def income_distributions(n: int, seed: int = 7) -> dict:
+    """Named arrays of ``n`` incomes that exercise different slab paths."""
+    from tax_rules import DEFAULT_FY, get_regime
+
+    rng = np.random.default_rng(seed)
+    edges = np.array(get_regime(DEFAULT_FY, "old").breakpoints() + get_regime(DEFAULT_FY, "new").breakpoints())
+    edges = edges[edges > 0]
+    return {
+        "uniform": rng.uniform(0, 5_000_000, n),
+        "lognormal": rng.lognormal(np.log(900_000), 0.6, n),
+        "slab_edges": rng.choice(edges, n) + 50_000 + rng.uniform(-2_000, 2_000, n),
+        "rebate_zone": rng.uniform(400_000, 900_000, n),
+    }
+
+
+def timed_calls(fn, args: list, repeats: int) -> float:
+    """Median over ``repeats`` passes of the mean nanoseconds per call."""
+    passes = []
+    for _ in range(repeats):
+        started = time.perf_counter_ns()
+        for a in args:
+            fn(*a)
+        passes.append((time.perf_counter_ns() - started) / len(args))
+    return statistics.median(passes)
+
+
+def run_micro(n: int, repeats: int) -> dict:
+    from main import calculate_new_regime_tax, calculate_old_regime_tax
+
+    metrics = {}
+    for name, incomes in income_distributions(n).items():
+        incomes = incomes.tolist()
+        old_args = [(income, 200_000.0) for income in incomes]
+        new_args = [(income, 50_000.0) for income in incomes]
+        metrics[f"micro.old_regime.{name}.ns_per_call"] = round(timed_calls(calculate_old_regime_tax, old_args, repeats), 1)
+        metrics[f"micro.new_regime.{name}.ns_per_call"] = round(timed_calls(calculate_new_regime_tax, new_args, repeats), 1)
+    return metrics
+
+
+def use_local_redis(store):
+    """Point ``store`` at ``REDIS_URL``, or at a fresh ``RedisStandIn``.
+
+    Returns the backend name and the stand-in to stop (None for a real Redis).
+    """
+    if REDIS_URL:
+        store.url = REDIS_URL
+        return "redis", None
+    from loadtest import RedisStandIn
+
+    redis = RedisStandIn()
+    redis.start()
+    store.url = redis.url
+    return "redis-stand-in", redis
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    return sorted_values[int(q * (len(sorted_values) - 1))]
+
+
+def load(client, concurrency: int, requests: int, call) -> dict:
+    """Issue ``requests`` calls of ``call(client, i)`` from ``concurrency`` threads."""
+    def one(i):
+        started = time.perf_counter()
+        response = call(client, i)
+        elapsed = time.perf_counter() - started
+        assert response.status_code == 200, (response.status_code, response.text[:200])
+        return elapsed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = sorted(executor.map(one, range(requests)))
+    elapsed = time.perf_counter() - started
+    return {
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(1000 * percentile(latencies, 0.50), 3),
+        "p95_ms": round(1000 * percentile(latencies, 0.95), 3),
+        "p99_ms": round(1000 * percentile(latencies, 0.99), 3),
+    }
+
+
+def e2e_scenarios(share_ids: list) -> dict:
+    """name -> (requests multiplier, call(client, i))."""
+    export = {"formData": FORM_DATA, "taxResult": TAX_RESULT}
+    # Shared by every export call (warm-ups and each concurrency level), so no
+    # two rendering requests send the same report and hit the export cache
+    unique = itertools.count()
+    # ...and none matches a report rendered by an earlier run (e.g. in a Redis export cache)
+    run = uuid.uuid4().hex[:8]
+
+    def render(path):
+        def call(client, i):
+            form_data = dict(FORM_DATA, employee_id=f"bench-{run}-{next(unique)}")
+            return client.post(path, json={"formData": form_data, "taxResult": TAX_RESULT})
+        return call
+
+    def calculate_tax(client, i):
+        # Unique incomes, so every request is computed rather than cached
+        return client.post("/calculate-tax", json={"income": 1_000_000 + i * 7, "section80C": 100000, "hra": 60000})
+
+    def share(client, i):
+        response = client.post("/share", json={"formData": FORM_DATA, "taxResult": TAX_RESULT})
+        share_ids.append(response.json()["reportId"])
+        return response
+
+    def share_read(client, i):
+        return client.get(f"/share/{share_ids[i % len(share_ids)]}")
+
+    return {
+        "calculate_tax": (1.0, calculate_tax),
+        "export_pdf": (0.1, render("/export/pdf")),
+        "export_excel": (0.1, render("/export/excel")),
+        # The same report every time: export cache hits after the warm-up
+        "export_pdf_cached": (0.5, lambda client, i: client.post("/export/pdf", json=export)),
+        "share": (1.0, share),
+        "share_read": (1.0, share_read),
+    }
+
+
+def run_e2e(requests: int, concurrency: list) -> tuple:
+    from fastapi.testclient import TestClient
+
+    import main
+
+    backend, redis = use_local_redis(main.store)
+    metrics = {}
+    share_ids: list = []
+    try:
+        with TestClient(main.app) as client:
+            for name, (multiplier, call) in e2e_scenarios(share_ids).items():
+                n = max(4, int(requests * multiplier))
+                call(client, 0)  # warm-up: imports, template compilation, pool start
+                for c in concurrency:
+                    for key, value in load(client, c, n, call).items():
+                        metrics[f"e2e.{name}.c{c}.{key}"] = value
+        if not main.store.redis_available:
+            # A silent fallback would make this a memory-store benchmark
+            raise RuntimeError(f"Redis at {main.store.url} failed during the run; see the warnings above")
+    finally:
+        if redis is not None:
+            redis.stop()
+    return metrics, backend
+
+
+def git_revision() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Rows of (metric, baseline, current, change, regressed) for shared metrics.
+
+    ``change`` is the relative change in the "worse" direction, so positive
+    means slower for latencies and lower throughput for ``rps``.
+    """
+    rows = []
+    for name in sorted(set(current) & set(baseline)):
+        before, after = baseline[name], current[name]
+        if not before:
+            continue
+        change = (after - before) / before
+        if name.rsplit(".", 1)[-1] in HIGHER_IS_BETTER:
+            change = -change
+        rows.append((name, before, after, change, change > threshold))
+    return rows
+
+
+def report_comparison(metrics: dict, baseline_path: str, threshold: float) -> int:
+    """Print ``compare`` against a stored result; 1 if anything regressed."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    rows = compare(metrics, baseline["metrics"], threshold)
+    regressions = [row for row in rows if row[4]]
+    out = sys.stderr
+    print(f"\nvs {baseline_path} (git {baseline['meta'].get('git')}), threshold {threshold:.0%} (+ is an improvement):", file=out)
+    for name, before, after, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"  {name:48} {before:>12} -> {after:>12}  {-change:+7.1%}{flag}", file=out)
+    print(f"{len(regressions)} regression(s) in {len(rows)} metrics", file=out)
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", default="micro,e2e", help="comma-separated groups to run")
+    parser.add_argument("--quick", action="store_true", help="small sizes for a smoke run")
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--requests", type=int, help="requests per e2e scenario and concurrency level")
+    parser.add_argument("--output", help="write the JSON result here (default: stdout)")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against a stored result")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative regression")
+    parser.add_argument("--save-baseline", metavar="PATH", help="also write this run as a baseline")
+    args = parser.parse_args()
+
+    groups = set(args.only.split(","))
+    requests = args.requests or (40 if args.quick else 400)
+    concurrency = [int(c) for c in args.concurrency.split(",")]
+    # Logs go to a real handler, as in production, but not to the terminal
+    import logging
+    logging.getLogger().handlers[:] = [logging.FileHandler(os.devnull)]
+
+    result = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "quick": args.quick,
+        },
+        "metrics": {},
+    }
+    if "micro" in groups:
+        result["metrics"].update(run_micro(2_000 if args.quick else 20_000, 3 if args.quick else 7))
+    if "e2e" in groups:
+        metrics, backend = run_e2e(requests, concurrency)
+        result["meta"]["storage"] = backend
+        result["metrics"].update(metrics)
+
+    text = json.dumps(result, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            f.write(text + "\n")
+
+    if not args.compare:
+        return 0
+    return report_comparison(result["metrics"], args.compare, args.threshold)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""Read-through result cache.
+
+Lookups go to a bounded in-process LRU/TTL cache first, then Redis, and only
+then compute the value. Computed values are written back to both layers.
+"""
+import hashlib
+import inspect
+import json
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+MISSING = object()
+
+
+def canonicalize(value: Any) -> Any:
+    """Normalize a JSON-like payload so equivalent requests hash the same.
+
+    Integral floats become ints (``1200000.0`` -> ``1200000``) and ``-0.0``
+    becomes ``0``; containers are normalized recursively.
+    """
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, float):
+        if math.isfinite(value) and value.is_integer():
+            return int(value)
+        return value
+    if isinstance(value, int):
+        return value
+    if isinstance(value, dict):
+        return {str(k): canonicalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [canonicalize(v) for v in value]
+    return value
+
+
+def canonical_json(payload: Any) -> str:
+    return json.dumps(canonicalize(payload), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def canonical_key(prefix: str, payload: Any) -> str:
+    """Cache key ``<prefix>:<sha256 of the canonical JSON payload>``."""
+    return f"{prefix}:{hashlib.sha256(canonical_json(payload).encode()).hexdigest()}"
+
+
+class LocalTTLCache:
+    """Bounded LRU cache whose entries also expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return MISSING
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                return MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store ``value``; ``ttl`` overrides the cache-wide expiry for this entry."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class ReadThroughCache:
+    """Local LRU -> Redis -> compute, with hit/miss counters.
+
+    ``store`` is a ``storage.Storage`` (or anything with async ``get``/``set``);
+    values are stored there as JSON with a ``redis_ttl`` expiry. With
+    ``flights`` (a ``single_flight.SingleFlight``) concurrent misses for one
+    key share a single Redis lookup and computation.
+    """
+
+    def __init__(self, name: str, local: LocalTTLCache, store: Any, redis_ttl: int = 3600, flights: Any = None):
+        self.name = name
+        self.local = local
+        self.store = store
+        self.redis_ttl = redis_ttl
+        self.flights = flights
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.redis_errors = 0
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Any], bypass: bool = False, refresh: bool = False) -> Any:
+        """Return the cached value for ``key``, computing it on a miss.
+
+        ``bypass`` skips the cache entirely; ``refresh`` skips the lookup but
+        stores the freshly computed value.
+        """
+        if bypass:
+            self.bypassed += 1
+            return await _maybe_await(compute())
+
+        if not refresh:
+            value = self.local.get(key)
+            if value is not MISSING:
+                self.local_hits += 1
+                return value
+            if self.flights is not None:
+                return await self.flights.do(key, lambda: self._load(key, compute), lookup=lambda: self._redis_get(key))
+            return await self._load(key, compute)
+        return await self._compute(key, compute)
+
+    async def _load(self, key: str, compute: Callable[[], Any]) -> Any:
+        value = await self._redis_get(key)
+        if value is not MISSING:
+            self.redis_hits += 1
+            self.local.set(key, value)
+            return value
+        return await self._compute(key, compute)
+
+    async def _compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        self.misses += 1
+        value = await _maybe_await(compute())
+        self.local.set(key, value)
+        await self._redis_set(key, value)
+        return value
+
+    async def _redis_get(self, key: str) -> Any:
+        try:
+            raw = await self.store.get(key)
+        except Exception as e:
+            self.redis_errors += 1
+            logging.warning(f"Redis cache read failed: {e}")
+            return MISSING
+        if raw is None:
+            return MISSING
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return MISSING
+
+    async def _redis_set(self, key: str, value: Any) -> None:
+        try:
+            await self.store.set(key, json.dumps(value), ex=self.redis_ttl)
+        except Exception as e:
+            self.redis_errors += 1
+            logging.warning(f"Redis caching failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.local_hits + self.redis_hits
+        lookups = hits + self.misses
+        return {
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "evictions": self.local.evictions,
+            "expirations": self.local.expirations,
+            "redis_errors": self.redis_errors,
+            "local_size": len(self.local),
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+async def _maybe_await(value: Any) -> Any:
+    if inspect.isawaitable(value):
+        return await value
+    return value
@@ -0,0 +1,284 @@
+"""Streaming Excel writer built on openpyxl's write-only mode.
+
+Rows are written straight to each sheet's temporary XML part instead of
+being kept as a cell grid, so memory stays flat however many rows a sheet
+has. Column widths are measured from the values as they are appended: a
+sheet buffers its first ``sample_rows`` rows, fixes the widths from them
+(the ``<cols>`` element precedes the row data in the sheet XML), and streams
+every later row directly.
+
+The single-employee report and the whole-organisation workbook are both
+layouts on top of this writer.
+"""
+from copy import copy
+from typing import Any, BinaryIO, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import Cell
+from openpyxl.chart import PieChart, Reference
+from openpyxl.styles import Alignment, Font, PatternFill
+from openpyxl.utils import get_column_letter
+
+from tax_engine import DEDUCTION_FIELDS, calculate_batch, records_to_columns
+
+CURRENCY_FORMAT = '₹#,##0'
+
+HEADER_FONT = Font(name='Arial', size=14, bold=True, color='FFFFFF')
+HEADER_FILL = PatternFill(start_color='663399', end_color='663399', fill_type='solid')
+SUBHEADER_FONT = Font(name='Arial', size=12, bold=True, color='663399')
+TITLE_FONT = Font(name='Arial', size=18, bold=True, color='663399')
+FOOTER_FONT = Font(name='Arial', size=10, italic=True, color='808080')
+CENTER_ALIGNMENT = Alignment(horizontal='center', vertical='center')
+
+
+def _display_length(value: Any, number_format: Optional[str]) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and number_format and '#,##0' in number_format:
+        return len(f"{value:,.0f}") + 1
+    return len(str(value))
+
+
+class StreamingSheet:
+    """Write-only worksheet that sizes its columns from the data written."""
+
+    def __init__(self, workbook: "StreamingWorkbook", title: str, sample_rows: int = 200,
+                 min_width: int = 8, max_width: int = 80):
+        self.workbook = workbook
+        self.ws = workbook.wb.create_sheet(title)
+        self.sample_rows = sample_rows
+        self.min_width = min_width
+        self.max_width = max_width
+        self.widths: Dict[int, int] = {}
+        self.row_count = 0
+        self._pending: Optional[List[list]] = []
+        self._styles: Dict[tuple, Any] = {}
+
+    def cell(self, value: Any, font: Optional[Font] = None, fill: Optional[PatternFill] = None,
+             number_format: Optional[str] = None, alignment: Optional[Alignment] = None) -> Cell:
+        """A styled cell for ``append``.
+
+        Resolving a style registers it with the workbook, which costs more
+        than writing the cell, so each distinct style is resolved once and
+        its style array copied onto later cells.
+        """
+        c = WriteOnlyCell(self.ws, value=value)
+        if font is None and fill is None and number_format is None and alignment is None:
+            return c
+        key = (font, fill, number_format, alignment)
+        style = self._styles.get(key)
+        if style is None:
+            if font is not None:
+                c.font = font
+            if fill is not None:
+                c.fill = fill
+            if number_format is not None:
+                c.number_format = number_format
+            if alignment is not None:
+                c.alignment = alignment
+            style = self._styles[key] = copy(c._style)
+        else:
+            c._style = copy(style)
+        return c
+
+    def append(self, values: Sequence[Any], measure: bool = True) -> int:
+        """Append a row and return its 1-based row number.
+
+        Pass ``measure=False`` for rows (such as merged titles) that should
+        not widen their columns.
+        """
+        if measure:
+            for col, value in enumerate(values, 1):
+                if isinstance(value, Cell):
+                    length = _display_length(value.value, value.number_format)
+                else:
+                    length = _display_length(value, None)
+                if length > self.widths.get(col, 0):
+                    self.widths[col] = length
+        self.row_count += 1
+        if self._pending is not None:
+            self._pending.append(list(values))
+            if len(self._pending) >= self.sample_rows:
+                self.flush()
+        else:
+            self.ws.append(values)
+        return self.row_count
+
+    def merge(self, ref: str) -> None:
+        self.ws.merged_cells.add(ref)
+
+    def add_chart(self, chart, anchor: str) -> None:
+        self.ws.add_chart(chart, anchor)
+
+    def flush(self) -> None:
+        """Fix column widths from the rows seen so far and write them out."""
+        if self._pending is None:
+            return
+        for col, length in self.widths.items():
+            width = min(self.max_width, max(self.min_width, length + 2))
+            self.ws.column_dimensions[get_column_letter(col)].width = width
+        pending, self._pending = self._pending, None
+        for row in pending:
+            self.ws.append(row)
+
+
+class StreamingWorkbook:
+    """A write-only workbook made of ``StreamingSheet``s."""
+
+    def __init__(self):
+        self.wb = Workbook(write_only=True)
+        self.sheets: List[StreamingSheet] = []
+
+    def sheet(self, title: str, **kwargs) -> StreamingSheet:
+        sheet = StreamingSheet(self, title, **kwargs)
+        self.sheets.append(sheet)
+        return sheet
+
+    def save(self, target: Union[str, BinaryIO]) -> None:
+        for sheet in self.sheets:
+            sheet.flush()
+        self.wb.save(target)
+
+
+def _to_number(x) -> float:
+    """Safely coerce a form value to a number (non-numeric, None -> 0)."""
+    try:
+        return float(x)
+    except Exception:
+        return 0.0
+
+
+def write_tax_report(book: StreamingWorkbook, form_data: dict, tax_data: dict) -> None:
+    """The single-employee "Tax Report" sheet layout."""
+    ws = book.sheet("Tax Report")
+
+    def header(value):
+        return ws.cell(value, font=HEADER_FONT, fill=HEADER_FILL)
+
+    income = form_data.get('income', 0)
+    # Safely sum numeric deductions (ignore non-numeric, None)
+    total_deductions = sum(_to_number(v) for k, v in form_data.items() if k not in ['income', 'name'])
+    old_taxable = income - total_deductions
+
+    ws.append([ws.cell('TAXYNC - Tax Analysis Report', font=TITLE_FONT, alignment=CENTER_ALIGNMENT)], measure=False)
+    ws.merge('A1:E1')
+    ws.append([])
+    ws.append([ws.cell('Tax Summary', font=SUBHEADER_FONT), None, None,
+               ws.cell('Detailed Regime Comparison', font=SUBHEADER_FONT)])
+    ws.append([header('Description'), header('Amount (₹)'), None,
+               header('Description'), header('Old Regime'), header('New Regime')])
+
+    tax_summary = [
+        ['Annual Income', income],
+        ['Old Regime Tax', tax_data.get('old_regime_tax', 0)],
+        ['New Regime Tax', tax_data.get('new_regime_tax', 0)],
+        ['Total Savings', tax_data.get('savings', 0)]
+    ]
+    comparison_data = [
+        ['Gross Income', income, income],
+        ['Deductions', total_deductions, 0],
+        ['Taxable Income', old_taxable, income],
+        ['Tax Payable', tax_data.get('old_regime_tax', 0), tax_data.get('new_regime_tax', 0)]
+    ]
+    for i, ((desc, amount), comparison) in enumerate(zip(tax_summary, comparison_data)):
+        row = [desc, ws.cell(amount, number_format=CURRENCY_FORMAT), None, comparison[0]]
+        # The first comparison row is left unformatted, as in the original layout
+        row += [ws.cell(v, number_format=CURRENCY_FORMAT) if i else v for v in comparison[1:]]
+        ws.append(row)
+
+    # Suggestions
+    if tax_data.get('suggestions'):
+        ws.append([])
+        ws.append([ws.cell('Tax Optimization Suggestions', font=SUBHEADER_FONT)])
+        for suggestion in tax_data['suggestions']:
+            ws.append([f"• {suggestion}"])
+
+    chart = PieChart()
+    chart.title = "Tax Comparison"
+    labels = Reference(ws.ws, min_col=1, min_row=6, max_row=8)
+    data = Reference(ws.ws, min_col=2, min_row=6, max_row=8)
+    chart.add_data(data, titles_from_data=False)
+    chart.set_categories(labels)
+    ws.add_chart(chart, "D4")
+
+    # Footer
+    ws.append([])
+    last_row = ws.append([ws.cell("Created with Taxync | Developed by Somil Yadav",
+                                  font=FOOTER_FONT, alignment=CENTER_ALIGNMENT)], measure=False)
+    ws.merge(f'A{last_row}:E{last_row}')
+
+
+ORGANISATION_COLUMNS = (
+    ('Employee', None),
+    ('Annual Income', CURRENCY_FORMAT),
+    ('Total Deductions', CURRENCY_FORMAT),
+    ('Old Regime Tax', CURRENCY_FORMAT),
+    ('New Regime Tax', CURRENCY_FORMAT),
+    ('Savings (Old - New)', CURRENCY_FORMAT),
+    ('Recommended Regime', None),
+)
+
+
+def write_organisation_workbook(target: Union[str, BinaryIO], employees: List[dict], chunk_size: int = 5000) -> None:
+    """Whole-organisation workbook: a Summary sheet and one row per employee.
+
+    ``employees`` are request-shaped dicts (income, deductions) with an
+    optional ``name`` or ``employee_id``. Taxes are computed with the batch
+    engine in chunks of ``chunk_size`` rows.
+    """
+    book = StreamingWorkbook()
+    summary = book.sheet("Summary")
+    detail = book.sheet("Employees")
+
+    header = [detail.cell(title, font=HEADER_FONT, fill=HEADER_FILL) for title, _ in ORGANISATION_COLUMNS]
+    detail.append(header)
+
+    totals = {"old": 0.0, "new": 0.0, "best": 0.0, "income": 0.0, "prefer_old": 0, "prefer_new": 0, "tie": 0}
+    for start in range(0, len(employees), chunk_size):
+        chunk = employees[start:start + chunk_size]
+        columns = records_to_columns(chunk)
+        result = calculate_batch(columns)
+        deductions = sum(columns[name] for name in DEDUCTION_FIELDS)
+        savings = result["savings"]
+        totals["old"] += float(result["old_regime_tax"].sum())
+        totals["new"] += float(result["new_regime_tax"].sum())
+        totals["best"] += float(np.minimum(result["old_regime_tax"], result["new_regime_tax"]).sum())
+        totals["income"] += float(columns["income"].sum())
+        totals["prefer_old"] += int(np.count_nonzero(savings < 0))
+        totals["prefer_new"] += int(np.count_nonzero(savings > 0))
+        totals["tie"] += int(np.count_nonzero(savings == 0))
+        rows = zip(chunk, columns["income"].tolist(), deductions.tolist(), result["old_regime_tax"].tolist(),
+                   result["new_regime_tax"].tolist(), savings.tolist())
+        for offset, (employee, income, deduction, old_tax, new_tax, saving) in enumerate(rows):
+            name = employee.get('name') or employee.get('employee_id') or f"Employee {start + offset + 1}"
+            regime = "New" if saving > 0 else ("Old" if saving < 0 else "Either")
+            detail.append([
+                str(name),
+                detail.cell(income, number_format=CURRENCY_FORMAT),
+                detail.cell(deduction, number_format=CURRENCY_FORMAT),
+                detail.cell(old_tax, number_format=CURRENCY_FORMAT),
+                detail.cell(new_tax, number_format=CURRENCY_FORMAT),
+                detail.cell(saving, number_format=CURRENCY_FORMAT),
+                regime,
+            ])
+
+    summary.append([summary.cell('TAXYNC - Organisation Tax Summary', font=TITLE_FONT)], measure=False)
+    summary.merge('A1:C1')
+    summary.append([])
+    summary.append([summary.cell('Metric', font=HEADER_FONT, fill=HEADER_FILL),
+                    summary.cell('Value', font=HEADER_FONT, fill=HEADER_FILL)])
+    for label, value, number_format in (
+        ('Employees', len(employees), None),
+        ('Total Income', totals["income"], CURRENCY_FORMAT),
+        ('Total Old Regime Tax', totals["old"], CURRENCY_FORMAT),
+        ('Total New Regime Tax', totals["new"], CURRENCY_FORMAT),
+        ('Total Tax at Best Regime', totals["best"], CURRENCY_FORMAT),
+        ('Employees better off in Old Regime', totals["prefer_old"], None),
+        ('Employees better off in New Regime', totals["prefer_new"], None),
+        ('Employees indifferent', totals["tie"], None),
+    ):
+        summary.append([label, summary.cell(value, number_format=number_format)])
+
+    book.save(target)
@@ -0,0 +1,178 @@
+"""Content-addressed cache of rendered PDF/Excel exports.
+
+An export is identified by a hash of everything that determines its bytes:
+the canonical ``formData`` and ``taxResult``, a digest of the chart image,
+the template (or workbook layout) version and the format. The same hash is
+the response ETag, so a client that already holds the file can be answered
+with 304 before anything is looked up or rendered.
+
+Two stores are available:
+
+* ``DiskExportCache`` keeps one file per export in a directory shared by all
+  workers, reads them through ``mmap`` (pages come straight from the page
+  cache, no copy into the heap) and evicts least-recently-used files once
+  the directory exceeds ``max_bytes``.
+* ``RedisExportCache`` stores the bytes in the key-value store with a TTL;
+  size is bounded there by ``max_entry_bytes`` per export and by the Redis
+  ``maxmemory`` LRU policy overall.
+"""
+import hashlib
+import logging
+import mmap
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Optional, Union
+
+from cache import canonical_json
+from metrics import REGISTRY
+
+EXPORT_LOOKUPS = REGISTRY.counter(
+    "taxync_export_cache_lookups_total", "Export cache lookups by format and outcome.", ("format", "result"),
+)
+
+Buffer = Union[bytes, mmap.mmap]
+
+
+def export_key(fmt: str, form_data: dict, tax_result: dict, chart_image: Optional[str], version: str) -> str:
+    """Hex sha256 identifying one rendered export."""
+    chart = hashlib.sha256(chart_image.encode()).hexdigest() if chart_image else None
+    payload = {"format": fmt, "version": version, "formData": form_data, "taxResult": tax_result, "chart": chart}
+    return hashlib.sha256(canonical_json(payload).encode()).hexdigest()
+
+
+def etag_for(key: str) -> str:
+    return f'"{key}"'
+
+
+def etag_matches(if_none_match: Optional[str], key: str) -> bool:
+    """True if an ``If-None-Match`` header value names this export."""
+    if not if_none_match:
+        return False
+    etag = etag_for(key)
+    return any(tag.strip().removeprefix("W/") in (etag, "*") for tag in if_none_match.split(","))
+
+
+class DiskExportCache:
+    """Size-bounded LRU directory of rendered exports, read via mmap."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        # key -> size, least recently used first; rebuilt from the directory
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        entries = []
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name.startswith(".") or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._index[name] = size
+        self.size = sum(self._index.values())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    async def get(self, key: str) -> Optional[Buffer]:
+        try:
+            with open(self._path(key), "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size == 0:
+                    return None
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            with self._lock:
+                if self._index.pop(key, None) is not None:
+                    self.size = sum(self._index.values())
+            return None
+        with self._lock:
+            if key not in self._index:
+                # Written by another worker
+                self._index[key] = size
+                self.size += size
+            self._index.move_to_end(key)
+        try:
+            # Keeps LRU order across restarts and for other workers
+            os.utime(self._path(key))
+        except OSError:
+            pass
+        return data
+
+    async def put(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self._path(key))
+        except OSError as e:
+            logging.warning(f"Export cache write failed: {e}")
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            self.size += len(data) - self._index.pop(key, 0)
+            self._index[key] = len(data)
+            evicted = []
+            while self.size > self.max_bytes and self._index:
+                old_key, old_size = self._index.popitem(last=False)
+                self.size -= old_size
+                evicted.append(old_key)
+        for old_key in evicted:
+            try:
+                # Open mmaps of the file stay valid after unlink
+                os.remove(self._path(old_key))
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        return {"backend": "disk", "entries": len(self._index), "bytes": self.size, "max_bytes": self.max_bytes}
+
+
+class RedisExportCache:
+    """Exports in the key-value store under ``export:<key>`` with a TTL."""
+
+    def __init__(self, store: Any, ttl: int, max_entry_bytes: int):
+        self.store = store
+        self.ttl = ttl
+        self.max_entry_bytes = max_entry_bytes
+
+    async def get(self, key: str) -> Optional[Buffer]:
+        try:
+            return await self.store.get(f"export:{key}")
+        except Exception as e:
+            logging.warning(f"Export cache read failed: {e}")
+            return None
+
+    async def put(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_entry_bytes:
+            return
+        try:
+            await self.store.set(f"export:{key}", data, ex=self.ttl)
+        except Exception as e:
+            logging.warning(f"Export cache write failed: {e}")
+
+    def stats(self) -> dict:
+        return {"backend": "redis", "ttl": self.ttl, "max_entry_bytes": self.max_entry_bytes}
+
+
+def from_env(store: Any):
+    """Export cache configured by TAXYNC_EXPORT_CACHE (``disk``, ``redis`` or
+    ``off``), TAXYNC_EXPORT_CACHE_DIR, TAXYNC_EXPORT_CACHE_MAX_MB and
+    TAXYNC_EXPORT_CACHE_TTL; None when disabled."""
+    backend = os.getenv("TAXYNC_EXPORT_CACHE", "disk").lower()
+    max_bytes = int(float(os.getenv("TAXYNC_EXPORT_CACHE_MAX_MB", "256")) * 1024 * 1024)
+    if backend == "disk":
+        directory = os.getenv("TAXYNC_EXPORT_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "taxync-exports")
+        return DiskExportCache(directory, max_bytes)
+    if backend == "redis":
+        return RedisExportCache(store, int(os.getenv("TAXYNC_EXPORT_CACHE_TTL", "86400")), max_entry_bytes=max_bytes)
+    return None
@@ -0,0 +1,263 @@
+"""Bulk export jobs: render many reports in the background, download as a ZIP.
+
+Each rendered report is spooled to ``<job_dir>/<job_id>/`` as soon as it is
+finished, and job metadata is kept both in the store (Redis, when
+available) and in ``job.json`` next to the files, so finished work survives
+a restart. The metadata is written when the job starts and finishes; while
+it runs, progress counts go to a small ``export_job:<id>:progress`` key,
+refreshed at least every ``stale_after / 3`` seconds as a heartbeat so
+readers in any worker can tell a long render from a dead job. Downloads stream a ZIP assembled on the fly from the spooled
+files, so the archive is never held in memory.
+"""
+import asyncio
+import io
+import json
+import logging
+import os
+import re
+import shutil
+import time
+import uuid
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from report_charts import DEFAULT_CHART
+from report_pool import PoolSaturated, ReportPool
+from report_templates import DEFAULT_TEMPLATE
+from reports import render_excel, render_pdf
+
+FORMATS = {
+    "pdf": (render_pdf, "pdf"),
+    "excel": (render_excel, "xlsx"),
+}
+
+ZIP_CHUNK_SIZE = 64 * 1024
+
+
+class JobNotFound(Exception):
+    pass
+
+
+class JobNotReady(Exception):
+    pass
+
+
+class _ChunkSink(io.RawIOBase):
+    """Unseekable write target that hands written bytes back in chunks."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _safe_name(value: Any) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]+", "_", str(value)).strip("_")[:40]
+
+
+class ExportJobManager:
+    """Creates, tracks and packages bulk export jobs."""
+
+    def __init__(self, store, pool: ReportPool, job_dir: str, ttl: int = 7 * 86400,
+                 concurrency: int = 4, stale_after: float = 60.0):
+        self.store = store
+        self.pool = pool
+        self.job_dir = Path(job_dir)
+        self.ttl = ttl
+        self.concurrency = concurrency
+        self.stale_after = stale_after
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # One progress writer per job at a time, so counts land in order
+        self._save_locks: Dict[str, asyncio.Lock] = {}
+
+    @classmethod
+    def from_env(cls, store, pool: ReportPool) -> "ExportJobManager":
+        """Configure from TAXYNC_EXPORT_JOB_DIR and TAXYNC_EXPORT_JOB_TTL."""
+        return cls(
+            store,
+            pool,
+            job_dir=os.getenv("TAXYNC_EXPORT_JOB_DIR", os.path.join(os.getcwd(), ".export_jobs")),
+            ttl=int(os.getenv("TAXYNC_EXPORT_JOB_TTL", str(7 * 86400))),
+            concurrency=max(1, pool.workers),
+        )
+
+    def _path(self, job_id: str) -> Path:
+        return self.job_dir / job_id
+
+    async def _save(self, job: Dict[str, Any]) -> None:
+        job["updated_at"] = time.time()
+        data = json.dumps(job)
+        await asyncio.to_thread(self._write_local, job["id"], data)
+        await self.store.set(f"export_job:{job['id']}", data, ex=self.ttl)
+
+    async def _save_progress(self, job: Dict[str, Any]) -> None:
+        """Record the counts and a fresh ``updated_at``; the size of this
+        write does not grow with the job."""
+        async with self._save_locks.setdefault(job["id"], asyncio.Lock()):
+            progress = {"completed": job["completed"], "failed": job["failed"], "updated_at": time.time()}
+            await self.store.set(f"export_job:{job['id']}:progress", json.dumps(progress), ex=self.ttl)
+
+    async def _heartbeat(self, job: Dict[str, Any]) -> None:
+        while True:
+            await asyncio.sleep(self.stale_after / 3)
+            try:
+                await self._save_progress(job)
+            except Exception as e:
+                logging.warning(f"Export job {job['id']}: heartbeat failed: {e}")
+
+    def _write_local(self, job_id: str, data: str) -> None:
+        path = self._path(job_id)
+        path.mkdir(parents=True, exist_ok=True)
+        tmp = path / "job.json.tmp"
+        tmp.write_text(data)
+        tmp.replace(path / "job.json")
+
+    async def create(self, fmt: str, reports: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Register a job and start rendering it in the background."""
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported export format: {fmt}")
+        if not reports:
+            raise ValueError("At least one report is required")
+        await asyncio.to_thread(self.cleanup_expired)
+
+        job = {
+            "id": str(uuid.uuid4()),
+            "format": fmt,
+            "status": "queued",
+            "total": len(reports),
+            "completed": 0,
+            "failed": 0,
+            "errors": [],
+            "files": [],
+            "created_at": time.time(),
+        }
+        await self._save(job)
+        task = asyncio.create_task(self._run(job, reports))
+        self._tasks[job["id"]] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job["id"], None))
+        return job
+
+    async def _run(self, job: Dict[str, Any], reports: List[Dict[str, Any]]) -> None:
+        render, extension = FORMATS[job["format"]]
+        job["status"] = "running"
+        await self._save(job)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        files: List[Optional[str]] = [None] * len(reports)
+
+        async def render_one(index: int, report: Dict[str, Any]) -> None:
+            form_data = report.get("formData") or {}
+            args = (form_data, report.get("taxResult") or {})
+            if job["format"] == "pdf":
+                args += (
+                    report.get("chartImage"),
+                    report.get("template") or DEFAULT_TEMPLATE,
+                    report.get("chartType") or DEFAULT_CHART,
+                )
+            async with semaphore:
+                while True:
+                    try:
+                        content = await self.pool.run(render, *args)
+                        break
+                    except PoolSaturated as e:
+                        # Background work yields to interactive exports
+                        await asyncio.sleep(e.retry_after)
+            label = _safe_name(form_data.get("name") or form_data.get("employee_id") or "")
+            name = f"{index + 1:05d}{'_' + label if label else ''}.{extension}"
+            await asyncio.to_thread((self._path(job["id"]) / name).write_bytes, content)
+            files[index] = name
+            job["completed"] += 1
+            try:
+                await self._save_progress(job)
+            except Exception:
+                # Not recorded, so not counted; guarded() reports the failure
+                files[index] = None
+                job["completed"] -= 1
+                raise
+
+        async def guarded(index: int, report: Dict[str, Any]) -> None:
+            try:
+                await render_one(index, report)
+            except Exception as e:
+                logging.exception(f"Export job {job['id']}: report {index} failed")
+                job["failed"] += 1
+                job["errors"].append({"index": index, "error": str(e)})
+                await self._save_progress(job)
+
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            await asyncio.gather(*(guarded(i, r) for i, r in enumerate(reports)))
+        finally:
+            heartbeat.cancel()
+        job["files"] = [name for name in files if name]
+        job["status"] = "completed" if not job["failed"] else ("failed" if not job["files"] else "completed_with_errors")
+        try:
+            await self._save(job)
+        finally:
+            self._save_locks.pop(job["id"], None)
+
+    async def get(self, job_id: str) -> Dict[str, Any]:
+        """Job metadata from the store, falling back to the local spool."""
+        if not re.fullmatch(r"[0-9a-f-]{36}", job_id):
+            raise JobNotFound(job_id)
+        raw = await self.store.get(f"export_job:{job_id}")
+        if raw is None:
+            path = self._path(job_id) / "job.json"
+            try:
+                raw = await asyncio.to_thread(path.read_text)
+            except FileNotFoundError:
+                raise JobNotFound(job_id)
+        job = json.loads(raw)
+        if job["status"] in ("queued", "running"):
+            progress = await self.store.get(f"export_job:{job_id}:progress")
+            if progress is not None:
+                # Errors are only listed once the job finishes
+                progress = json.loads(progress)
+                job.update(progress, updated_at=max(job.get("updated_at", 0), progress["updated_at"]))
+        if (job["status"] in ("queued", "running") and job_id not in self._tasks
+                and time.time() - job.get("updated_at", 0) > self.stale_after):
+            # The worker that ran this job went away before finishing it
+            job["status"] = "interrupted"
+        return job
+
+    def iter_zip(self, job: Dict[str, Any]) -> Iterator[bytes]:
+        """Stream a ZIP of the job's rendered files, one chunk at a time."""
+        if job["status"] not in ("completed", "completed_with_errors"):
+            raise JobNotReady(job["status"])
+        return self._zip_chunks(self._path(job["id"]), job["files"])
+
+    def _zip_chunks(self, path: Path, names: List[str]) -> Iterator[bytes]:
+        sink = _ChunkSink()
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as zf:
+            for name in names:
+                with open(path / name, "rb") as src, zf.open(name, "w") as dest:
+                    while True:
+                        chunk = src.read(ZIP_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        dest.write(chunk)
+                        yield sink.drain()
+                yield sink.drain()
+        yield sink.drain()
+
+    def cleanup_expired(self) -> None:
+        """Remove spooled jobs older than the TTL."""
+        if not self.job_dir.exists():
+            return
+        cutoff = time.time() - self.ttl
+        for entry in self.job_dir.iterdir():
+            try:
+                if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                    shutil.rmtree(entry, ignore_errors=True)
+            except OSError:
+                pass
@@ -0,0 +1,316 @@
+"""Append-only columnar history of ``/calculate-tax`` requests and results.
+
+``HistoryStore.record`` appends one row (inputs, both regimes' tax, the
+plan and the advisor's saving per head) to an in-memory buffer; nothing
+touches the disk on the request path. A background flusher writes the
+buffer as an immutable segment file every ``flush_seconds`` or once
+``flush_rows`` rows are waiting, off the event loop. Segments are Parquet
+when pyarrow is installed and ``.npz`` (one NumPy array per column)
+otherwise; the file name carries the time range it covers, so queries skip
+segments outside the requested window without opening them. Each worker
+writes its own segments into the shared directory.
+
+``aggregates`` scans the segments with pandas (imported lazily, it is only
+needed here) for the finance reports: regime preference, savings by income
+band and advisor hit rates.
+"""
+import asyncio
+import logging
+import math
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from tax_engine import ADVISOR_HEADS, REQUEST_FIELDS
+
+if TYPE_CHECKING:
+    import pandas
+
+try:
+    import pyarrow  # noqa: F401
+except ImportError:  # optional
+    pyarrow = None
+
+INPUT_COLUMNS = tuple(name for name, _ in REQUEST_FIELDS)
+RESULT_COLUMNS = ("old_regime_tax", "new_regime_tax", "savings", "plan_saving")
+HEADS = tuple(head for head, *_ in ADVISOR_HEADS)
+ADVICE_COLUMNS = tuple(f"advice_{head}" for head in HEADS)
+COLUMNS = ("ts", "fy") + INPUT_COLUMNS + RESULT_COLUMNS + ADVICE_COLUMNS
+
+# Lower bounds of the default income bands, in rupees
+DEFAULT_BANDS = (0, 500_000, 1_000_000, 1_500_000, 2_500_000, 5_000_000)
+
+
+def history_row(request: Dict[str, Any], result: Dict[str, Any]) -> tuple:
+    """One history row, in ``COLUMNS`` order, from a validated request and its response."""
+    advice = {s["head"]: s["saving"] for s in result.get("ranked_suggestions", ())}
+    return (
+        time.time(),
+        request["fy"],
+        *(float(request[name]) for name in INPUT_COLUMNS),
+        result["old_regime_tax"],
+        result["new_regime_tax"],
+        result["savings"],
+        result["deduction_plan"]["saving"],
+        *(advice.get(head, 0) for head in HEADS),
+    )
+
+
+def to_columns(rows: Sequence[tuple]) -> Dict[str, np.ndarray]:
+    values = list(zip(*rows))
+    columns = {"ts": np.array(values[0], dtype=np.float64), "fy": np.array(values[1], dtype=str)}
+    for i, name in enumerate(COLUMNS[2:], start=2):
+        dtype = np.float64 if name in INPUT_COLUMNS else np.int64
+        columns[name] = np.array(values[i], dtype=dtype)
+    return columns
+
+
+class HistoryStore:
+    """Buffered writer and reader of history segments in ``directory``."""
+
+    def __init__(self, directory: str, flush_rows: int = 4096, flush_seconds: float = 5.0,
+                 max_buffered: int = 100_000, retention_days: float = 30):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.max_buffered = max_buffered
+        self.retention_days = retention_days
+        self.recorded = 0
+        self.dropped = 0
+        self.segments_written = 0
+        self._buffer: List[tuple] = []
+        self._seq = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls) -> Optional["HistoryStore"]:
+        """Configure from TAXYNC_HISTORY (``on`` enables; off by default),
+        TAXYNC_HISTORY_DIR (default ``.history`` in the working directory),
+        TAXYNC_HISTORY_FLUSH_ROWS, TAXYNC_HISTORY_FLUSH_SECONDS and
+        TAXYNC_HISTORY_RETENTION_DAYS (default 30; 0 keeps everything);
+        None when disabled."""
+        if os.getenv("TAXYNC_HISTORY", "off").lower() not in ("on", "1", "true", "yes"):
+            return None
+        return cls(
+            os.getenv("TAXYNC_HISTORY_DIR") or os.path.join(os.getcwd(), ".history"),
+            flush_rows=int(os.getenv("TAXYNC_HISTORY_FLUSH_ROWS", "4096")),
+            flush_seconds=float(os.getenv("TAXYNC_HISTORY_FLUSH_SECONDS", "5")),
+            retention_days=float(os.getenv("TAXYNC_HISTORY_RETENTION_DAYS", "30")),
+        )
+
+    def record(self, request: Dict[str, Any], result: Dict[str, Any]) -> None:
+        """Buffer one calculation; rows beyond ``max_buffered`` are dropped."""
+        if len(self._buffer) >= self.max_buffered:
+            self.dropped += 1
+            return
+        self._buffer.append(history_row(request, result))
+        self.recorded += 1
+        if len(self._buffer) >= self.flush_rows and self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        """Start the background flusher on the running event loop."""
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """Stop the flusher and write whatever is still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+                if self.retention_days:
+                    await asyncio.to_thread(self.expire, time.time() - self.retention_days * 86400)
+            except Exception:
+                logging.exception("History flush failed")
+
+    async def flush(self) -> Optional[Path]:
+        """Write the buffered rows as one segment, in a thread."""
+        if not self._buffer:
+            return None
+        rows, self._buffer = self._buffer, []
+        self._seq += 1
+        try:
+            path = await asyncio.to_thread(self._write_segment, rows, self._seq)
+        except Exception:
+            # Keep the rows for the next attempt, within the buffer bound
+            self._buffer = (rows + self._buffer)[:self.max_buffered]
+            raise
+        self.segments_written += 1
+        return path
+
+    def _write_segment(self, rows: List[tuple], seq: int) -> Path:
+        columns = to_columns(rows)
+        first, last = int(columns["ts"].min() * 1000), int(math.ceil(columns["ts"].max() * 1000))
+        name = f"seg-{first}-{last}-{os.getpid()}-{seq}"
+        if pyarrow is not None:
+            import pyarrow.parquet as pq
+
+            path = self.directory / f"{name}.parquet"
+            tmp = self.directory / f".{name}.parquet.tmp"
+            pq.write_table(pyarrow.table(columns), tmp)
+        else:
+            path = self.directory / f"{name}.npz"
+            tmp = self.directory / f".{name}.tmp.npz"
+            np.savez_compressed(tmp, **columns)
+        os.replace(tmp, path)
+        return path
+
+    def segments(self, since: Optional[float] = None, until: Optional[float] = None) -> List[Path]:
+        """Segment files that may hold rows with ``since <= ts <= until``."""
+        found = []
+        for path in sorted(self.directory.glob("seg-*")):
+            try:
+                first, last = (int(part) / 1000 for part in path.name.split("-")[1:3])
+            except ValueError:
+                continue
+            if (since is None or last >= since) and (until is None or first <= until):
+                found.append(path)
+        return found
+
+    def expire(self, before: float) -> int:
+        """Delete segments whose rows are all older than ``before``."""
+        removed = 0
+        for path in self.segments(until=before):
+            if int(path.name.split("-")[2]) / 1000 < before:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def read(self, columns: Iterable[str], since: Optional[float] = None, until: Optional[float] = None,
+             fy: Optional[str] = None, buffered: Sequence[tuple] = ()) -> "pandas.DataFrame":
+        """The requested columns of every row in the window (and of ``fy``,
+        if given), from the segments plus ``buffered`` rows (this worker's
+        unflushed ones). Rows are filtered per segment, before pandas sees them."""
+        import pandas as pd
+
+        columns = list(dict.fromkeys(columns))
+        frames = []
+        for path in self.segments(since, until):
+            try:
+                if path.suffix == ".parquet":
+                    table = pd.read_parquet(path, columns=list(dict.fromkeys(["ts", "fy", *columns])))
+                    frames.append(_select({name: table[name].to_numpy() for name in table}, columns, since, until, fy))
+                else:
+                    with np.load(path) as segment:
+                        # npz members are loaded one by one, so only the columns used are read
+                        frames.append(_select(segment, columns, since, until, fy))
+            except (OSError, KeyError, ValueError) as e:
+                logging.warning(f"Skipping unreadable history segment {path.name}: {e}")
+        if buffered:
+            frames.append(_select(to_columns(buffered), columns, since, until, fy))
+        if not frames:
+            return pd.DataFrame({name: np.array([], dtype=str if name == "fy" else np.float64) for name in columns})
+        return pd.concat(frames, ignore_index=True)
+
+    def aggregates(self, fy: Optional[str] = None, since: Optional[float] = None, until: Optional[float] = None,
+                   bands: Sequence[float] = DEFAULT_BANDS) -> Dict[str, Any]:
+        """Regime preference, savings by income band and advisor hit rates.
+
+        Blocking (reads segments); run it in a thread. Includes the rows
+        still buffered in this worker.
+        """
+        frame = self.read(("income", "savings", "plan_saving") + ADVICE_COLUMNS, since, until, fy, list(self._buffer))
+        return aggregate_frame(frame, bands)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "directory": str(self.directory),
+            "format": "parquet" if pyarrow is not None else "npz",
+            "buffered": len(self._buffer),
+            "recorded": self.recorded,
+            "dropped": self.dropped,
+            "segments_written": self.segments_written,
+        }
+
+
+def aggregate_frame(frame: "pandas.DataFrame", bands: Sequence[float] = DEFAULT_BANDS) -> Dict[str, Any]:
+    """The aggregates of a frame of history rows."""
+    import pandas as pd
+
+    total = len(frame)
+    # savings is old minus new regime tax: negative when the old regime is cheaper
+    savings = frame["savings"].to_numpy()
+    old, new = savings < 0, savings > 0
+    regimes = {"old": int(old.sum()), "new": int(new.sum()), "equal": int(total - old.sum() - new.sum())}
+
+    edges = sorted(bands)
+    labels = [f"{int(lo)}-{int(hi)}" for lo, hi in zip(edges, edges[1:])] + [f"{int(edges[-1])}+"]
+    band = pd.cut(frame["income"], bins=[*edges, math.inf], labels=labels, right=False)
+    grouped = pd.DataFrame({
+        "band": band,
+        "savings": savings,
+        "best_regime_saving": np.abs(savings),
+        "prefers_old": old,
+        "plan_saving": frame["plan_saving"].to_numpy(),
+    }).groupby("band", observed=False)
+    by_band = grouped.agg(
+        count=("savings", "size"),
+        mean_savings=("savings", "mean"),
+        mean_best_regime_saving=("best_regime_saving", "mean"),
+        old_regime_share=("prefers_old", "mean"),
+        mean_plan_saving=("plan_saving", "mean"),
+    )
+
+    advisor = {}
+    for head, column in zip(HEADS, ADVICE_COLUMNS):
+        values = frame[column].to_numpy()
+        hits = values > 0
+        advisor[head] = {
+            "hits": int(hits.sum()),
+            "hit_rate": _round(hits.mean()) if total else None,
+            "mean_saving": _round(values[hits].mean()) if hits.any() else None,
+        }
+
+    return {
+        "count": total,
+        "regime_preference": {
+            name: {"count": count, "share": _round(count / total) if total else None} for name, count in regimes.items()
+        },
+        "savings_by_income_band": [
+            {"band": label, **{key: (_round(value) if key != "count" else int(value)) for key, value in row.items()}}
+            for label, row in by_band.iterrows()
+        ],
+        "advisor": advisor,
+    }
+
+
+def _select(segment: Mapping[str, np.ndarray], columns: List[str], since: Optional[float],
+            until: Optional[float], fy: Optional[str]) -> "pandas.DataFrame":
+    import pandas as pd
+
+    mask = None
+    if since is not None or until is not None:
+        ts = segment["ts"]
+        mask = np.ones(len(ts), dtype=bool)
+        if since is not None:
+            mask &= ts >= since
+        if until is not None:
+            mask &= ts <= until
+    if fy is not None:
+        matches = segment["fy"] == fy
+        mask = matches if mask is None else mask & matches
+    return pd.DataFrame({name: segment[name] if mask is None else segment[name][mask] for name in columns})
+
+
+def _round(value: float) -> Optional[float]:
+    return None if value is None or not math.isfinite(value) else round(float(value), 4)
@@ -1,39 +1,64 @@
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, Response
-from pydantic import BaseModel
-from typing import Dict, Optional, List
+from fastapi.responses import JSONResponse, StreamingResponse, Response
+from starlette.requests import ClientDisconnect
+from pydantic import BaseModel, Field, field_validator
+from pydantic_core import PydanticCustomError
+from typing import Annotated, Dict, Optional, List, Literal
+import asyncio
 import uuid
 import json
 import io
+from contextlib import asynccontextmanager
 from datetime import datetime
-import numpy as np
-import pandas as pd
-import redis
-import hashlib
 import logging
 import math
-import base64
- 
-
- 
-
-# PDF and Excel imports
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_CENTER
-from reportlab.graphics.shapes import Drawing
-from reportlab.graphics.charts.piecharts import Pie
-from reportlab.graphics.charts.barcharts import VerticalBarChart
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment
-from openpyxl.chart import PieChart, Reference
+import os
+import tempfile
+import time
+from access_log import AccessLogMiddleware
+from cache import MISSING, LocalTTLCache, ReadThroughCache, canonical_key
+import export_cache as export_caches
+from export_cache import EXPORT_LOOKUPS, etag_for, etag_matches, export_key
+from profiling import PROFILE_ID_HEADER, Profiler, profile_async, profile_call
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY, MetricsMiddleware, observe_stages
+from storage import Storage
+from report_pool import PoolSaturated, ReportPool
+from reports import EXCEL_REPORT_VERSION, iter_chunks, prewarm, render_excel_timed, render_organisation_excel, render_pdf_timed
+from report_charts import DEFAULT_CHART
+from report_templates import DEFAULT_TEMPLATE, TEMPLATES, template_version
+from export_jobs import ExportJobManager, JobNotFound, JobNotReady
+from history import DEFAULT_BANDS, HistoryStore
+from rate_limit import RateLimiter, client_id, retry_after
+from single_flight import SingleFlight
+from tax_engine import calculate_batch, records_to_columns, to_columns, batch_to_records
+from tax_optimizer import optimize
+from tax_stream import calculate_stream, csv_lines, iter_lines, ndjson_lines, parse_csv, parse_ndjson
+from simulation import simulate
+from shares import load_share, save_share, serialize_share
+from tax_rules import DEFAULT_FY, available_years, get_regime
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warmup = None
+    if os.getenv("TAXYNC_PREWARM_EXPORTS", "").lower() in ("1", "true", "yes"):
+        # Load ReportLab/openpyxl in the render workers after startup,
+        # without delaying readiness for /calculate-tax
+        warmup = asyncio.create_task(report_pool.prewarm(prewarm))
+    if history is not None:
+        history.start()
+    yield
+    if warmup is not None:
+        warmup.cancel()
+    if history is not None:
+        await history.stop()
+    report_pool.shutdown()
+    await store.close()
 
 # FastAPI app
-app = FastAPI(title="Taxync API", version="1.0.0")
+app = FastAPI(title="Taxync API", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -43,513 +68,846 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.middleware("http")
-async def log_requests_and_errors(request: Request, call_next):
-    logging.info(f"Request: {request.method} {request.url}")
-    try:
-        response = await call_next(request)
-        return response
-    except Exception as e:
-        logging.exception("Exception caught in middleware")
-        raise HTTPException(status_code=500, detail="Internal Server Error from middleware")
+# Sampled access log; errors and slow requests are always logged
+app.add_middleware(AccessLogMiddleware, **AccessLogMiddleware.options_from_env())
+# Per-route latency histograms, served at /metrics
+app.add_middleware(MetricsMiddleware)
 
 # Basic logging setup
-logging.basicConfig(level=logging.INFO)
-
-# Redis setup
-try:
-    redis_client = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
-    redis_client.ping()
-except:
-    redis_client = None
+logging.basicConfig(level=os.getenv("TAXYNC_LOG_LEVEL", "INFO").upper())
+logger = logging.getLogger("taxync")
+
+@app.exception_handler(RequestValidationError)
+async def invalid_number_handler(request: Request, exc: RequestValidationError):
+    """Answer 400 "Invalid numeric value for <field>" for bad numbers, as
+    /calculate-tax always has; other validation errors keep FastAPI's 422."""
+    for error in exc.errors():
+        if error["type"] in NUMBER_ERRORS and len(error["loc"]) > 1:
+            return JSONResponse(status_code=400, content={"detail": f"Invalid numeric value for {error['loc'][-1]}"})
+        if error["type"] in RANGE_ERRORS and len(error["loc"]) > 1:
+            field = ".".join(str(part) for part in error["loc"][1:])
+            return JSONResponse(status_code=400, content={"detail": f"{field}: {error['msg']}"})
+    return await request_validation_exception_handler(request, exc)
+
+# Redis setup: async pooled client, connected lazily, with an in-memory fallback
+store = Storage.from_env()
+
+# Report rendering runs on a bounded process pool off the event loop
+report_pool = ReportPool.from_env()
+
+# Opt-in cProfile of sampled or token-flagged requests, served at /profiles
+profiler = Profiler.from_env()
+
+async def run_on_report_pool(route: str, request: Request, fn, *args):
+    """``report_pool.run(fn, *args)``, profiled in the worker when the
+    profiler wants this request. Returns ``(result, profile id or None)``."""
+    if not profiler.wants(route, request.headers):
+        return await report_pool.run(fn, *args), None
+    started = time.perf_counter()
+    result, stats = await report_pool.run(profile_call, fn, *args)
+    return result, profiler.save(route, stats, time.perf_counter() - started)
+
+# Shared reports live for 24 hours
+SHARE_TTL = int(os.getenv("TAXYNC_SHARE_TTL", "86400"))
+
+# Serialized shared reports, kept until their share expires. Shares are
+# immutable, so hot links are served without Redis or JSON encoding.
+shared_report_cache = LocalTTLCache(maxsize=int(os.getenv("TAXYNC_SHARE_CACHE_SIZE", "1024")), ttl=SHARE_TTL)
+
+# Rendered exports by content hash: disk (mmap reads) or Redis, LRU-bounded
+export_cache = export_caches.from_env(store)
+
+# Identical renders in flight at once run once (across workers with TAXYNC_SINGLE_FLIGHT=redis)
+export_flights = SingleFlight.from_env("export", store)
+# Per-client token buckets for the rendering endpoints
+export_limiter = RateLimiter.from_env("export", store)
+# Header a trusted proxy puts the client address in, e.g. X-Forwarded-For
+RATE_LIMIT_CLIENT_HEADER = os.getenv("TAXYNC_RATE_LIMIT_CLIENT_HEADER") or None
+
+async def check_export_rate(request: Request, renders: int = 1) -> None:
+    """Answer 429 with Retry-After once the client has used up its render budget."""
+    if export_limiter is None:
+        return
+    if renders > export_limiter.burst:
+        raise HTTPException(status_code=400,
+                            detail=f"At most {int(export_limiter.burst)} reports per request under the export rate limit")
+    client = client_id(request.headers, request.client.host if request.client else None, RATE_LIMIT_CLIENT_HEADER)
+    wait = await export_limiter.acquire(client, renders)
+    if wait:
+        raise HTTPException(status_code=429, detail="Too many export requests, please retry later.",
+                            headers={"Retry-After": retry_after(wait)})
+
+# Columnar history of calculations, flushed to segment files in the background
+history = HistoryStore.from_env()
+
+async def cached_export(route: str, fmt: str, key: str, request: Request, fn, *args):
+    """Bytes of the export identified by ``key`` and its response headers.
+
+    Content is None when the client's If-None-Match already names this
+    export (answer 304). Otherwise it comes from the export cache, or is
+    rendered with ``fn(*args)`` on the report pool and stored there. Cache
+    misses count against the client's rate limit, charged before joining a
+    render so a 429 reaches only that client, and concurrent requests for the
+    same export share one render.
+    """
+    headers = {"ETag": etag_for(key), "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), key):
+        EXPORT_LOOKUPS.inc(fmt, "not_modified")
+        return None, headers
+    use_cache = export_cache is not None and not cache_bypassed(request, f"export-{fmt}")
+    if use_cache:
+        content = await export_cache.get(key)
+        if content is not None:
+            EXPORT_LOOKUPS.inc(fmt, "hit")
+            return content, headers
+    EXPORT_LOOKUPS.inc(fmt, "miss")
+    await check_export_rate(request)
+
+    async def render():
+        started = time.perf_counter()
+        (content, stages), profile_id = await run_on_report_pool(route, request, fn, *args)
+        # Stages are timed in the worker; the rest of the round trip is queueing and IPC
+        stages["pool"] = time.perf_counter() - started - sum(stages.values())
+        observe_stages(f"export_{fmt}", stages)
+        if use_cache:
+            await export_cache.put(key, content)
+        return content, profile_id
+
+    async def rendered_elsewhere():
+        content = await export_cache.get(key)
+        return None if content is None else (content, None)
+
+    if export_flights is None:
+        content, profile_id = await render()
+    else:
+        content, profile_id = await export_flights.do(key, render, lookup=rendered_elsewhere if use_cache else None)
+    if profile_id:
+        headers[PROFILE_ID_HEADER] = profile_id
+    return content, headers
+
+def pool_saturated_response(exc: PoolSaturated) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": str(exc.retry_after)})
+
+# Bulk export jobs, spooled to disk and tracked in Redis
+export_jobs = ExportJobManager.from_env(store, report_pool)
+EXPORT_JOB_MAX_REPORTS = int(os.getenv("TAXYNC_EXPORT_JOB_MAX_REPORTS", "5000"))
+
+# Result cache: in-process LRU/TTL in front of Redis
+tax_result_cache = ReadThroughCache(
+    "tax_calc",
+    LocalTTLCache(
+        maxsize=int(os.getenv("TAXYNC_LOCAL_CACHE_SIZE", "4096")),
+        ttl=float(os.getenv("TAXYNC_LOCAL_CACHE_TTL", "300")),
+    ),
+    store,
+    redis_ttl=3600,
+    # Computing is cheaper than a Redis lock, so misses coalesce per worker only
+    flights=SingleFlight.from_env("tax_calc", None),
+)
+SIMULATION_MAX_POINTS = int(os.getenv("TAXYNC_SIMULATION_MAX_POINTS", "100000"))
+# Break-even incomes are solved per deduction scenario
+SIMULATION_MAX_SCENARIOS = int(os.getenv("TAXYNC_SIMULATION_MAX_SCENARIOS", "1000"))
+
+@REGISTRY.collector
+def collect_app_metrics():
+    """Cache and render pool counters, read from their own stats at scrape time."""
+    stats = tax_result_cache.stats()
+    cache = {"cache": tax_result_cache.name}
+    yield ("taxync_cache_lookups_total", "counter", "Result cache lookups by outcome.", [
+        (dict(cache, result=result), stats[key])
+        for result, key in (("local_hit", "local_hits"), ("redis_hit", "redis_hits"), ("miss", "misses"), ("bypass", "bypassed"))
+    ])
+    yield ("taxync_cache_hit_ratio", "gauge", "Result cache hits over lookups.", [(cache, stats["hit_ratio"])])
+    yield ("taxync_cache_local_size", "gauge", "Entries in the in-process result cache.", [(cache, stats["local_size"])])
+    yield ("taxync_store_fallback_ops_total", "counter", "Store operations served by the in-memory fallback.",
+           [({}, store.fallback_ops)])
+    pool = report_pool.stats()
+    yield ("taxync_report_pool_in_flight", "gauge", "Renders running or queued.", [({}, pool["in_flight"])])
+    yield ("taxync_report_pool_renders_total", "counter", "Renders by outcome.", [
+        ({"result": result}, pool[result]) for result in ("completed", "failed", "rejected")
+    ])
+
+# Comma-separated endpoint names that never use the result cache, e.g. "calculate-tax"
+CACHE_BYPASS_ENDPOINTS = {e.strip() for e in os.getenv("TAXYNC_CACHE_BYPASS", "").split(",") if e.strip()}
+
+def cache_bypassed(request: Request, endpoint: str) -> bool:
+    """True if caching is disabled for this endpoint or the request opts out."""
+    return endpoint in CACHE_BYPASS_ENDPOINTS or "no-store" in request.headers.get("cache-control", "")
+
+def cache_refresh_requested(request: Request) -> bool:
+    """True if the client asked to revalidate (Cache-Control: no-cache)."""
+    return "no-cache" in request.headers.get("cache-control", "")
 
 # Models
+# Floats that reject NaN and +/-Infinity during validation
+FiniteFloat = Annotated[float, Field(allow_inf_nan=False)]
+# Validation error types answered with "Invalid numeric value for <field>"
+NUMBER_ERRORS = {"finite_number", "float_parsing", "float_type"}
+# Bound violations, answered with 400 "<field path>: <message>"
+RANGE_ERRORS = {"greater_than_equal", "less_than_equal"}
+
 class TaxCalculationRequest(BaseModel):
-    income: float
-    section80C: float = 0.0
-    section80D: float = 0.0
-    hra: float = 0.0
-    home_loan_interest: float = 0.0
-    standard_deduction: float = 50000.0
-    edu_loan_interest: float = 0.0
-    donations: float = 0.0
+    income: FiniteFloat
+    section80C: FiniteFloat = 0.0
+    section80D: FiniteFloat = 0.0
+    hra: FiniteFloat = 0.0
+    home_loan_interest: FiniteFloat = 0.0
+    standard_deduction: FiniteFloat = 50000.0
+    edu_loan_interest: FiniteFloat = 0.0
+    donations: FiniteFloat = 0.0
+    # Financial year whose rule table to apply, e.g. "2025-26"
+    fy: str = DEFAULT_FY
 
 class ExportRequest(BaseModel):
     formData: dict
     taxResult: dict
+    # PNG data URL of the dashboard chart; when omitted the PDF gets a vector
+    # chart of chartType drawn server-side ("none" for no chart)
     chartImage: Optional[str] = None
+    chartType: Literal["bar", "pie", "none"] = DEFAULT_CHART
+    # PDF report template: summary, detailed or employer
+    template: str = DEFAULT_TEMPLATE
+
+    @field_validator("taxResult")
+    @classmethod
+    def tax_amounts_are_finite(cls, value: dict) -> dict:
+        # JSON NaN/Infinity would otherwise reach the charts and summary table
+        for amount in value.values():
+            if isinstance(amount, float) and not math.isfinite(amount):
+                raise PydanticCustomError("finite_number", "Input should be a finite number")
+        return value
+
+class ExportJobRequest(BaseModel):
+    format: Literal["pdf", "excel"] = "pdf"
+    reports: List[ExportRequest]
+
+class OrganisationExportRequest(BaseModel):
+    # Request-shaped rows (income, deductions) with optional name/employee_id
+    employees: List[dict]
 
 class ShareRequest(BaseModel):
     formData: dict
     taxResult: dict
 
+class SimulationRange(BaseModel):
+    # Inclusive range start..stop in steps of step; stop defaults to start
+    start: FiniteFloat = 0.0
+    stop: Optional[FiniteFloat] = None
+    step: FiniteFloat = 1.0
+
+    def size(self) -> int:
+        if self.stop is None or self.stop == self.start:
+            return 1
+        if self.step <= 0 or self.stop < self.start or not math.isfinite(self.stop - self.start):
+            raise ValueError("Simulation ranges need start <= stop and a positive step")
+        steps = (self.stop - self.start) / self.step
+        # Checked before int(): a tiny step makes the quotient overflow to inf
+        if not math.isfinite(steps) or steps >= SIMULATION_MAX_POINTS:
+            raise ValueError(f"Simulation grid is limited to {SIMULATION_MAX_POINTS} points "
+                             f"and {SIMULATION_MAX_SCENARIOS} deduction scenarios")
+        return int(math.floor(steps + 1e-9)) + 1
+
+    def values(self) -> List[float]:
+        return [self.start + i * self.step for i in range(self.size())]
+
+# Bounds that keep income * (1 + hike / 100) ** year well inside float range
+HikePercent = Annotated[float, Field(allow_inf_nan=False, ge=-100, le=1000)]
+YearCount = Annotated[float, Field(allow_inf_nan=False, ge=0, le=100)]
+
+class HikeRange(SimulationRange):
+    start: HikePercent = 0.0
+    stop: Optional[HikePercent] = None
+
+class YearsRange(SimulationRange):
+    start: YearCount = 1.0
+    stop: Optional[YearCount] = None
+
+class SimulationRequest(BaseModel):
+    base: TaxCalculationRequest
+    hike_percent: HikeRange = HikeRange()
+    years: YearsRange = YearsRange()
+    # Deduction field name -> change applied to the base amount
+    deduction_deltas: Dict[str, SimulationRange] = {}
+
 class UserInfo(BaseModel):
     name: str
     email: str
     generatedAt: str
 
 # --- Tax Calculation Logic ---
-def get_tax_saving_for_investment(investment_amount: float, current_income: float, current_deductions: float) -> float:
+def get_tax_saving_for_investment(investment_amount: float, current_income: float, current_deductions: float,
+                                  fy: str = DEFAULT_FY) -> float:
     """Calculates the potential tax saving from an additional investment."""
-    tax_before = calculate_old_regime_tax(current_income, current_deductions)
-    tax_after = calculate_old_regime_tax(current_income, current_deductions + investment_amount)
+    tax_before = calculate_old_regime_tax(current_income, current_deductions, fy)
+    tax_after = calculate_old_regime_tax(current_income, current_deductions + investment_amount, fy)
     return max(0, tax_before - tax_after)
 
 def get_tax_slabs(regime: str) -> List[Dict[str, float]]:
     # This function is not used anywhere in the code, so it's not refactored
     pass
 
-def calculate_old_regime_tax(income: float, total_deductions: float = 0) -> float:
+def calculate_old_regime_tax(income: float, total_deductions: float = 0, fy: str = DEFAULT_FY) -> float:
     """
-    Calculates tax based on the old regime slabs for FY 2025-26.
-    Deductions are passed as a single total amount.
+    Calculates tax based on the old regime rules (default FY 2025-26).
+    Deductions are passed as a single total amount, or as a dict of amounts.
     """
+    if isinstance(total_deductions, dict):
+        total_deductions = sum(total_deductions.values())
     taxable_income = max(0, income - total_deductions)
+    # Slabs, 87A rebate and cess come from the compiled rule table
+    return get_regime(fy, "old").tax(taxable_income)
 
-    # Section 87A rebate: If taxable income <= ₹5,00,000, tax liability is zero (before cess)
-    if taxable_income <= 500000:
-        return 0.0
-
-    # FY 2025-26 Old Regime slabs
-    slabs = np.array([0, 250000, 500000, 1000000])
-    rates = np.array([0, 0.05, 0.20, 0.30])
-
-    tax = 0.0
-    for i in range(len(slabs)):
-        if i == len(slabs) - 1:
-            if taxable_income > slabs[i]:
-                tax += (taxable_income - slabs[i]) * rates[i]
-        else:
-            if taxable_income > slabs[i]:
-                slab_income = min(taxable_income, slabs[i + 1]) - slabs[i]
-                tax += slab_income * rates[i]
+def calculate_new_regime_tax(income: float, standard_deduction: Optional[float] = None, fy: str = DEFAULT_FY) -> float:
+    """Calculate tax under the New Regime (default FY 2025-26).
 
-    # 4% cess and rounding
-    tax_with_cess = tax * 1.04
-    return float(round(tax_with_cess))
-
-def calculate_new_regime_tax(income: float, standard_deduction: float = 50000) -> float:
-    """Calculate tax under New Regime for FY 2025-26.
-
-    - Applies standard deduction only (default ₹50,000).
-    - Slabs: 0–3L:0%, 3–6L:5%, 6–9L:10%, 9–12L:15%, 12–15L:20%, 15L+:30%
-    - Adds 4% Health & Education cess at the end.
+    - Applies standard deduction only (default: the FY's, ₹50,000 for 2025-26).
+    - Slabs, rebate and the 4% Health & Education cess come from the FY's rule table.
     - Rounds final tax to nearest integer.
     """
+    regime = get_regime(fy, "new")
+    if standard_deduction is None:
+        standard_deduction = regime.standard_deduction
     taxable_income = max(0.0, float(income) - float(standard_deduction))
-
-    # FY 2025-26 New Regime slabs
-    slabs = np.array([0, 300000, 600000, 900000, 1200000, 1500000])
-    rates = np.array([0, 0.05, 0.10, 0.15, 0.20, 0.30])
-
-    tax = 0.0
-    for i in range(len(slabs)):
-        if i == len(slabs) - 1:
-            if taxable_income > slabs[i]:
-                tax += (taxable_income - slabs[i]) * rates[i]
-        else:
-            if taxable_income > slabs[i]:
-                slab_income = min(taxable_income, slabs[i + 1]) - slabs[i]
-                tax += slab_income * rates[i]
-
-    tax_with_cess = tax * 1.04
-    return float(round(tax_with_cess))
+    return regime.tax(taxable_income)
 
 
 @app.get("/")
 async def root():
     return {"message": "Taxync API is running", "version": "1.0.0"}
 
+def compute_tax_result(tax_request: TaxCalculationRequest) -> dict:
+    """Compute the /calculate-tax response for a validated request."""
+    income = tax_request.income
+    advice = optimize(tax_request.model_dump(), tax_request.fy)
+    old_tax = advice["old_regime_tax"]
+    new_tax = advice["new_regime_tax"]
+
+    old_taxable_income = advice["old_taxable_income"]
+
+    savings = old_tax - new_tax
+    logger.debug(
+        "/calculate-tax computed: old_taxable_income=%s, new_taxable_income=%s, old_tax=%s, new_tax=%s, savings=%s",
+        old_taxable_income, max(0, income - tax_request.standard_deduction), old_tax, new_tax, savings,
+    )
+
+    # --- Smart Tax Advisor Logic ---
+    # Savings per head come from tax_optimizer in closed form
+    suggestions = []
+    heads = {h["head"]: h for h in advice["heads"]}
+
+    # 1. Section 80C Suggestion
+    head = heads["section80C"]
+    if head["room"] and head["saving"] > 0:
+        suggestions.append(f"Invest ₹{head['room']:,.0f} more in Section 80C (e.g., ELSS, PPF) to save up to ₹{head['saving']:,.0f} in taxes.")
+
+    # 2. Section 80D Suggestion (assuming non-senior citizen)
+    head = heads["section80D"]
+    if head["room"] and head["saving"] > 0:
+        suggestions.append(f"Increase your health insurance premium by ₹{head['room']:,.0f} (Section 80D) to save up to ₹{head['saving']:,.0f} in taxes.")
+
+    # 3. Home Loan Interest Suggestion
+    head = heads["home_loan_interest"]
+    if head["room"] and head["saving"] > 0:
+        suggestions.append(f"Claiming up to ₹{head['room']:,.0f} more in Home Loan Interest (Section 24b) could save you ₹{head['saving']:,.0f}.")
+
+    # 4. NPS Suggestion (Section 80CCD(1B))
+    # This is a generic suggestion as we don't have NPS input yet.
+    # Only suggest NPS if total income is high enough to benefit.
+    head = heads["nps"]
+    if head["room"] and head["saving"] > 0:
+        suggestions.append(f"Consider investing ₹{head['room']:,.0f} in NPS (Section 80CCD(1B)) for an additional tax saving of up to ₹{head['saving']:,.0f}.")
+
+    # --- Format Response ---
+    # 1. Recommended Regime Module
+    if savings > 0:
+        regime_comparison = f"Old Regime saves ₹{abs(savings):,.0f} compared to New Regime."
+    elif savings < 0:
+        regime_comparison = f"New Regime saves ₹{abs(savings):,.0f} compared to Old Regime."
+    else:
+        regime_comparison = "Both regimes result in the same tax liability."
+
+    # 2. Tax Optimization Suggestions Module
+    if not suggestions:
+        suggestions.append("✅ You have already optimized your tax savings under current rules.")
+    
+    plan = advice["plan"]
+    result = {
+        "old_regime_tax": round(old_tax),
+        "new_regime_tax": round(new_tax),
+        "savings": round(savings),
+        "regime_comparison": regime_comparison,
+        "optimization_suggestions": suggestions,
+        # Structured advice: heads ranked by saving, and the combined plan
+        "ranked_suggestions": [
+            {"head": h["head"], "section": h["section"], "amount": round(h["amount"]), "saving": round(h["saving"])}
+            for h in advice["ranked"]
+        ],
+        "deduction_plan": {
+            "allocation": {k: round(v) for k, v in plan["allocation"].items()},
+            "total_investment": round(plan["total_investment"]),
+            "old_regime_tax": round(plan["old_regime_tax"]),
+            "saving": round(plan["saving"]),
+            "recommended_regime": plan["recommended_regime"],
+            "breakeven_extra_deduction": advice["breakeven"]["extra_deduction"],
+            "breakeven_reachable": advice["breakeven"]["reachable"],
+        },
+    }
+    return result
+
 @app.post("/calculate-tax")
-async def calculate_tax(request: Request):
+async def calculate_tax(tax_request: TaxCalculationRequest, request: Request):
     """Calculate tax with comprehensive analysis for FY 2025-26"""
+    if profiler.wants("/calculate-tax", request.headers) and profiler.acquire():
+        try:
+            started = time.perf_counter()
+            response, stats = await profile_async(calculate_tax_response, tax_request, request)
+        finally:
+            profiler.release()
+        response.headers[PROFILE_ID_HEADER] = profiler.save("/calculate-tax", stats, time.perf_counter() - started)
+        return response
+    return await calculate_tax_response(tax_request, request)
+
+def tax_result_key(tax_request: TaxCalculationRequest) -> str:
+    """Result cache key: the canonicalized request under the fingerprint of
+    its FY's rule file, so edited rules never serve results computed from
+    the old figures."""
+    fingerprint = get_regime(tax_request.fy, "old").fingerprint
+    return canonical_key(f"tax_calc:v2:{fingerprint}", tax_request.model_dump())
+
+async def calculate_tax_response(tax_request: TaxCalculationRequest, request: Request) -> JSONResponse:
+    try:
+        logger.debug("/calculate-tax payload: %s", tax_request)
+        if tax_request.fy not in available_years():
+            raise HTTPException(status_code=400, detail=f"No tax rules for FY {tax_request.fy}")
+
+        # Read-through cache keyed by the canonicalized request
+        started = time.perf_counter()
+        cache_key = tax_result_key(tax_request)
+        keyed = time.perf_counter()
+        computed = []
+
+        def compute():
+            compute_started = time.perf_counter()
+            value = compute_tax_result(tax_request)
+            computed.append(time.perf_counter() - compute_started)
+            return value
+
+        result = await tax_result_cache.get_or_compute(
+            cache_key,
+            compute,
+            bypass=cache_bypassed(request, "calculate-tax"),
+            refresh=cache_refresh_requested(request),
+        )
+        looked_up = time.perf_counter()
+        if history is not None:
+            history.record(tax_request.model_dump(), result)
+        # The result is plain JSON data; skip jsonable_encoder's recursive walk
+        response = JSONResponse(result)
+        compute_seconds = computed[0] if computed else 0.0
+        observe_stages("calculate_tax", {
+            "cache_key": keyed - started,
+            "cache": looked_up - keyed - compute_seconds,
+            "compute": compute_seconds,
+            "serialize": time.perf_counter() - looked_up,
+        })
+        return response
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Unhandled error in /calculate-tax")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/simulate")
+async def simulate_tax(request: SimulationRequest):
+    """Old/new regime tax over a grid of salary hikes, years and deduction deltas.
+
+    One request replaces a /calculate-tax round-trip per what-if scenario.
+    Columns are flattened in C order over ``axes``; ``breakeven`` lists the
+    incomes where the cheaper regime flips for each deduction scenario.
+    """
+    base = request.base
+    if base.fy not in available_years():
+        raise HTTPException(status_code=400, detail=f"No tax rules for FY {base.fy}")
     try:
-        raw_data = await request.json()
-        logging.info(f"Raw /calculate-tax payload: {raw_data}")
-        tax_request = TaxCalculationRequest(**raw_data)
-
-        # Apply Indian FY 2025-26 tax slabs
-        income = tax_request.income
-        logging.info(
-            f"/calculate-tax payload: income={tax_request.income}, section80C={tax_request.section80C}, "
-            f"section80D={tax_request.section80D}, hra={tax_request.hra}, home_loan_interest={tax_request.home_loan_interest}, "
-            f"standard_deduction={tax_request.standard_deduction}, edu_loan_interest={tax_request.edu_loan_interest}, donations={tax_request.donations}"
+        sizes = [request.hike_percent.size(), request.years.size()]
+        deltas = {name: r.size() for name, r in request.deduction_deltas.items()}
+        scenarios = math.prod(deltas.values())
+        if math.prod(sizes) * scenarios > SIMULATION_MAX_POINTS or scenarios > SIMULATION_MAX_SCENARIOS:
+            raise ValueError(f"Simulation grid is limited to {SIMULATION_MAX_POINTS} points "
+                             f"and {SIMULATION_MAX_SCENARIOS} deduction scenarios")
+        return simulate(
+            base.model_dump(),
+            request.hike_percent.values(),
+            request.years.values(),
+            {name: r.values() for name, r in request.deduction_deltas.items()},
+            base.fy,
         )
-        
-        # Validate numeric inputs are finite
-        for field_name, val in [
-            ("income", tax_request.income),
-            ("section80C", tax_request.section80C),
-            ("section80D", tax_request.section80D),
-            ("hra", tax_request.hra),
-            ("home_loan_interest", tax_request.home_loan_interest),
-            ("standard_deduction", tax_request.standard_deduction),
-            ("edu_loan_interest", tax_request.edu_loan_interest),
-            ("donations", tax_request.donations),
-        ]:
-            try:
-                if not math.isfinite(float(val)):
-                    raise ValueError
-            except Exception:
-                raise HTTPException(status_code=400, detail=f"Invalid numeric value for {field_name}")
-        
-        # Create a deductions dictionary for the old regime calculation
-        deductions = {
-            "section80C": tax_request.section80C,
-            "section80D": tax_request.section80D,
-            "hra": tax_request.hra,
-            "home_loan_interest": tax_request.home_loan_interest,
-            "standard_deduction": tax_request.standard_deduction,
-            "edu_loan_interest": tax_request.edu_loan_interest,
-            "donations": tax_request.donations
-        }
-
-        # Use the dedicated calculation functions for consistency and correctness
-        total_deductions = sum(deductions.values())
-        old_tax = calculate_old_regime_tax(income, total_deductions)
-        new_tax = calculate_new_regime_tax(income, tax_request.standard_deduction)
-
-        old_taxable_income = max(0, income - sum(deductions.values()))
-
-        savings = old_tax - new_tax
-        logging.info(
-            f"/calculate-tax computed: old_taxable_income={old_taxable_income}, new_taxable_income={max(0, income - tax_request.standard_deduction)}, old_tax={old_tax}, new_tax={new_tax}, savings={savings}"
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus text exposition of request, stage, store and cache metrics."""
+    return Response(REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
+def check_profile_access(request: Request) -> None:
+    if not profiler.enabled:
+        raise HTTPException(status_code=404, detail="Profiling is not enabled.")
+    if not profiler.tokens:
+        raise HTTPException(status_code=403, detail="Set TAXYNC_PROFILE_TOKENS to read profiles.")
+    if not profiler.authorized(request.headers):
+        raise HTTPException(status_code=403, detail="A valid X-Profile-Token is required.")
+
+@app.get("/profiles")
+async def list_profiles(request: Request):
+    """Stored profiles, newest first."""
+    check_profile_access(request)
+    return {"profiles": profiler.list()}
+
+@app.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, request: Request, format: Literal["text", "pstats"] = "text", sort: str = "cumulative"):
+    """A stored profile as a pstats report, or as a ``.prof`` file for snakeviz/pstats."""
+    check_profile_access(request)
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found or evicted.")
+    if format == "pstats":
+        return Response(
+            Profiler.to_pstats(profile),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f"attachment; filename=profile_{profile_id}.prof"},
         )
-        
-        # --- Smart Tax Advisor Logic ---
-        suggestions = []
-        current_deductions = sum(deductions.values())
-        
-
-        # 1. Section 80C Suggestion
-        if tax_request.section80C < 150000:
-            remaining_80c = 150000 - tax_request.section80C
-            potential_saving = get_tax_saving_for_investment(remaining_80c, income, current_deductions)
-            if potential_saving > 0:
-                suggestions.append(f"Invest ₹{remaining_80c:,.0f} more in Section 80C (e.g., ELSS, PPF) to save up to ₹{potential_saving:,.0f} in taxes.")
-
-        # 2. Section 80D Suggestion (assuming non-senior citizen)
-        if tax_request.section80D < 25000:
-            remaining_80d = 25000 - tax_request.section80D
-            potential_saving = get_tax_saving_for_investment(remaining_80d, income, current_deductions)
-            if potential_saving > 0:
-                suggestions.append(f"Increase your health insurance premium by ₹{remaining_80d:,.0f} (Section 80D) to save up to ₹{potential_saving:,.0f} in taxes.")
-
-        # 3. Home Loan Interest Suggestion
-        if tax_request.home_loan_interest < 200000:
-            remaining_interest = 200000 - tax_request.home_loan_interest
-            potential_saving = get_tax_saving_for_investment(remaining_interest, income, current_deductions)
-            if potential_saving > 0:
-                suggestions.append(f"Claiming up to ₹{remaining_interest:,.0f} more in Home Loan Interest (Section 24b) could save you ₹{potential_saving:,.0f}.")
-
-        # 4. NPS Suggestion (Section 80CCD(1B))
-        # This is a generic suggestion as we don't have NPS input yet.
-        # Only suggest NPS if total income is high enough to benefit.
-        if income > 750000: # Threshold where higher tax slabs are hit
-            potential_nps_saving = get_tax_saving_for_investment(50000, income, current_deductions)
-            if potential_nps_saving > 0:
-                suggestions.append(f"Consider investing ₹50,000 in NPS (Section 80CCD(1B)) for an additional tax saving of up to ₹{potential_nps_saving:,.0f}.")
-
-        # --- Format Response ---
-        # 1. Recommended Regime Module
-        if savings > 0:
-            regime_comparison = f"Old Regime saves ₹{abs(savings):,.0f} compared to New Regime."
-        elif savings < 0:
-            regime_comparison = f"New Regime saves ₹{abs(savings):,.0f} compared to Old Regime."
+    try:
+        return Response(Profiler.to_text(profile, sort), media_type="text/plain")
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"Unknown sort key: {sort}")
+
+@app.get("/history/aggregates")
+async def get_history_aggregates(request: Request, fy: Optional[str] = None, since: Optional[datetime] = None,
+                                 until: Optional[datetime] = None, bands: Optional[str] = None):
+    """Aggregates over recorded calculations: regime preference, savings by
+    income band (``bands``: comma-separated lower bounds) and advisor hit
+    rates, optionally for one FY and a ``since``/``until`` window. Needs an
+    X-Profile-Token from TAXYNC_PROFILE_TOKENS, like /profiles."""
+    if history is None:
+        raise HTTPException(status_code=404, detail="Calculation history is disabled")
+    if not profiler.tokens:
+        raise HTTPException(status_code=403, detail="Set TAXYNC_PROFILE_TOKENS to read calculation history.")
+    if not profiler.authorized(request.headers):
+        raise HTTPException(status_code=403, detail="A valid X-Profile-Token is required.")
+    try:
+        band_edges = [float(b) for b in bands.split(",")] if bands else DEFAULT_BANDS
+        if not all(math.isfinite(b) for b in band_edges):
+            raise ValueError
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bands must be comma-separated numbers")
+    result = await asyncio.to_thread(
+        history.aggregates, fy, since.timestamp() if since else None, until.timestamp() if until else None, band_edges,
+    )
+    return JSONResponse(result)
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Hit/miss/eviction counters for the result caches."""
+    return {
+        tax_result_cache.name: tax_result_cache.stats(),
+        "storage": store.stats(),
+        "exports": export_cache.stats() if export_cache is not None else None,
+        "single_flight": {
+            flights.name: flights.stats() for flights in (tax_result_cache.flights, export_flights) if flights is not None
+        },
+    }
+
+@app.post("/calculate-tax/batch")
+async def calculate_tax_batch(request: Request):
+    """Calculate tax for a whole batch of requests in one vectorized pass.
+
+    Accepts a JSON array of request objects, a JSON object of columns, or
+    NDJSON (one request object per line), taxed under the ``fy`` query
+    parameter's rules. Results are returned in input order, as NDJSON when
+    the input was NDJSON.
+    """
+    fy = request.query_params.get("fy", DEFAULT_FY)
+    if fy not in available_years():
+        raise HTTPException(status_code=400, detail=f"No tax rules for FY {fy}")
+    content_type = request.headers.get("content-type", "")
+    ndjson = "ndjson" in content_type or "jsonl" in content_type
+    try:
+        body = await request.body()
+        if ndjson:
+            columns = records_to_columns([json.loads(line) for line in body.splitlines() if line.strip()])
         else:
-            regime_comparison = "Both regimes result in the same tax liability."
-
-        # 2. Tax Optimization Suggestions Module
-        if not suggestions:
-            suggestions.append("✅ You have already optimized your tax savings under current rules.")
-        
-        result = {
-            "old_regime_tax": round(old_tax),
-            "new_regime_tax": round(new_tax),
-            "savings": round(savings),
-            "regime_comparison": regime_comparison,
-            "optimization_suggestions": suggestions,
-        }
-
-        # Cache the result in Redis if available
-        if redis_client:
-            try:
-                # Use a hash of the request as the key
-                request_dict = tax_request.dict()
-                # Sort keys to ensure consistent hashing
-                sorted_request_str = json.dumps(request_dict, sort_keys=True)
-                cache_key = f"tax_calc:{hashlib.sha256(sorted_request_str.encode()).hexdigest()}"
-                redis_client.set(cache_key, json.dumps(result), ex=3600)  # Cache for 1 hour
-                logging.info(f"Cached result for key: {cache_key}")
-            except Exception as e:
-                logging.warning(f"Redis caching failed: {e}")
-
-        return result
+            payload = json.loads(body)
+            if isinstance(payload, list):
+                columns = records_to_columns(payload)
+            elif isinstance(payload, dict):
+                columns = to_columns(payload)
+            else:
+                raise ValueError("Expected a JSON array of requests or an object of columns")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        results = batch_to_records(calculate_batch(columns, fy))
     except Exception as e:
-        logging.exception("Unhandled error in /calculate-tax")
+        logger.exception("Unhandled error in /calculate-tax/batch")
         raise HTTPException(status_code=500, detail=str(e))
 
+    if ndjson:
+        content = "".join(json.dumps(r) + "\n" for r in results)
+        return Response(content=content, media_type="application/x-ndjson")
+    return {"results": results}
+
+class DuplexStreamingResponse(StreamingResponse):
+    """A ``StreamingResponse`` sent while the request body is still being
+    read. It does not listen for disconnects meanwhile, as that listener
+    would swallow the body; a disconnect ends ``request.stream()`` instead."""
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+@app.post("/calculate-tax/stream")
+async def calculate_tax_stream(request: Request, format: Optional[Literal["ndjson", "csv"]] = None):
+    """Calculate tax for an NDJSON or CSV body of any size, streaming.
+
+    The body is read and taxed ``tax_stream.CHUNK_ROWS`` rows at a time, and
+    each chunk's results are sent before more is read, so memory does not
+    grow with the input. Rows that fail validation get an inline ``error``.
+    Output is NDJSON or CSV (``format``, default: the input's format).
+    """
+    fy = request.query_params.get("fy", DEFAULT_FY)
+    if fy not in available_years():
+        raise HTTPException(status_code=400, detail=f"No tax rules for FY {fy}")
+    content_type = request.headers.get("content-type", "")
+    csv_input = "csv" in content_type
+    csv_output = format == "csv" or (format is None and csv_input)
+    lines = iter_lines(request.stream())
+    parsed = parse_csv(lines) if csv_input else parse_ndjson(lines)
+    # Read the first chunk before answering, so a bad CSV header is a 400
+    try:
+        first = [await parsed.__anext__()]
+    except StopAsyncIteration:
+        first = []
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def rows():
+        for batch in first:
+            yield batch
+        async for batch in parsed:
+            yield batch
+
+    async def body():
+        if csv_output:
+            yield csv_lines([], header=True)
+        try:
+            async for results in calculate_stream(rows(), fy):
+                yield csv_lines(results) if csv_output else ndjson_lines(results)
+        except ClientDisconnect:
+            logger.info("/calculate-tax/stream client disconnected")
+
+    return DuplexStreamingResponse(body(), media_type="text/csv" if csv_output else "application/x-ndjson")
+
  
 
 @app.post("/export/pdf")
-async def export_pdf(request: ExportRequest):
+async def export_pdf(request: ExportRequest, http_request: Request):
     """Export tax report as PDF with dynamic data and charts"""
     try:
-        tax_data = request.taxResult
-        form_data = request.formData
-        
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18)
-        
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30,
-            alignment=TA_CENTER,
-            textColor=colors.Color(0.4, 0.2, 0.6)
-        )
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=16,
-            spaceAfter=12,
-            textColor=colors.Color(0.4, 0.2, 0.6)
+        if request.template not in TEMPLATES:
+            raise HTTPException(status_code=400, detail=f"Unknown report template: {request.template}")
+        chart = request.chartImage or f"chart:{request.chartType}"
+        key = export_key("pdf", request.formData, request.taxResult, chart, template_version(request.template))
+        content, headers = await cached_export(
+            "/export/pdf", "pdf", key, http_request, render_pdf_timed,
+            request.formData, request.taxResult, request.chartImage, request.template, request.chartType,
         )
-        
-        story = []
-        story.append(Paragraph("TAXYNC - Tax Analysis Report", title_style))
-        story.append(Spacer(1, 20))
-        
-        # Tax Summary Table
-        tax_table_data = [
-            ['Description', 'Amount (₹)'],
-            ['Annual Income', f"₹{form_data.get('income', 0):,}"],
-            ['Old Regime Tax', f"₹{tax_data.get('old_regime_tax', 0):,}"],
-            ['New Regime Tax', f"₹{tax_data.get('new_regime_tax', 0):,}"],
-            ['Total Savings', f"₹{tax_data.get('savings', 0):,}"]
-        ]
-        tax_table = Table(tax_table_data, colWidths=[3*inch, 2*inch])
-        tax_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.Color(0.4, 0.2, 0.6)),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        story.append(tax_table)
-        story.append(Spacer(1, 20))
-
-        # Suggestions
-        if tax_data.get('suggestions'):
-            story.append(Paragraph("<b>Tax Optimization Suggestions:</b>", styles['Heading3']))
-            for suggestion in tax_data['suggestions']:
-                story.append(Paragraph(f"• {suggestion}", styles['Normal']))
-            story.append(Spacer(1, 20))
-
-        # Add chart image if available
-        if request.chartImage:
-            try:
-                # Decode base64 image
-                # Expected format: "data:image/png;base64,iVBORw0KGgo..."
-                header, encoded = request.chartImage.split(",", 1)
-                decoded_image = base64.b64decode(encoded)
-                image_buffer = io.BytesIO(decoded_image)
-                
-                # Add image to PDF
-                story.append(Spacer(1, 20))
-                story.append(Paragraph("<b>Tax Distribution Chart:</b>", styles['Heading3']))
-                img = Image(image_buffer, width=4*inch, height=3*inch)
-                img.hAlign = 'CENTER'
-                story.append(img)
-                story.append(Spacer(1, 20))
-            except Exception as e:
-                logging.error(f"Failed to process chart image: {e}")
-
-        # Footer
-        footer_style = ParagraphStyle('Footer', parent=styles['Normal'], fontSize=10, alignment=TA_CENTER, textColor=colors.grey)
-        story.append(Spacer(1, 40))
-        story.append(Paragraph("Generated by Taxync – Developed by Somil Yadav © 2025", footer_style))
-        
-        doc.build(story)
-        buffer.seek(0)
-        
+        if content is None:
+            return Response(status_code=304, headers=headers)
         return StreamingResponse(
-            io.BytesIO(buffer.read()),
+            iter_chunks(content),
             media_type="application/pdf",
-            headers={"Content-Disposition": f"attachment; filename=Tax_Report_{datetime.now().year}.pdf"}
+            headers={
+                "Content-Disposition": f"attachment; filename=Tax_Report_{datetime.now().year}.pdf",
+                "Content-Length": str(len(content)),
+                **headers,
+            }
         )
+    except PoolSaturated as e:
+        raise pool_saturated_response(e)
+    except HTTPException:
+        raise
     except Exception as e:
-        logging.exception("Unhandled error in /export/pdf")
+        logger.exception("Unhandled error in /export/pdf")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/export/excel")
-async def export_excel(request: ExportRequest):
+async def export_excel(request: ExportRequest, http_request: Request):
     """Export tax report as Excel with dynamic data and charts"""
     try:
-        tax_data = request.taxResult
-        form_data = request.formData
-
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Tax Report"
-
-        header_font = Font(name='Arial', size=14, bold=True, color='FFFFFF')
-        header_fill = PatternFill(start_color='663399', end_color='663399', fill_type='solid')
-        subheader_font = Font(name='Arial', size=12, bold=True, color='663399')
-        center_alignment = Alignment(horizontal='center', vertical='center')
-
-        ws.merge_cells('A1:E1')
-        ws['A1'] = 'TAXYNC - Tax Analysis Report'
-        ws['A1'].font = Font(name='Arial', size=18, bold=True, color='663399')
-        ws['A1'].alignment = center_alignment
-
-        ws['A3'] = 'Tax Summary'
-        ws['A3'].font = subheader_font
-
-        headers = ['Description', 'Amount (₹)']
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=4, column=col, value=header)
-            cell.font = header_font
-            cell.fill = header_fill
-
-        tax_summary = [
-            ['Annual Income', form_data.get('income', 0)],
-            ['Old Regime Tax', tax_data.get('old_regime_tax', 0)],
-            ['New Regime Tax', tax_data.get('new_regime_tax', 0)],
-            ['Total Savings', tax_data.get('savings', 0)]
-        ]
-
-        for row, (desc, amount) in enumerate(tax_summary, 5):
-            ws.cell(row=row, column=1, value=desc)
-            ws.cell(row=row, column=2, value=amount).number_format = '₹#,##0'
-
-        # Detailed Comparison Table
-        ws['D3'] = 'Detailed Regime Comparison'
-        ws['D3'].font = subheader_font
-
-        comparison_headers = ['Description', 'Old Regime', 'New Regime']
-        for col, header in enumerate(comparison_headers, 4):
-            cell = ws.cell(row=4, column=col, value=header)
-            cell.font = header_font
-            cell.fill = header_fill
-
-        # Safely sum numeric deductions (ignore non-numeric, None)
-        def _to_number(x):
-            try:
-                return float(x)
-            except Exception:
-                return 0.0
-
-        total_deductions = sum(_to_number(v) for k, v in form_data.items() if k not in ['income', 'name'])
-        old_taxable = form_data.get('income', 0) - total_deductions
-
-        comparison_data = [
-            ['Gross Income', form_data.get('income', 0), form_data.get('income', 0)],
-            ['Deductions', total_deductions, 0],
-            ['Taxable Income', old_taxable, form_data.get('income', 0)],
-            ['Tax Payable', tax_data.get('old_regime_tax', 0), tax_data.get('new_regime_tax', 0)]
-        ]
-
-        for row, data_row in enumerate(comparison_data, 5):
-            for col, value in enumerate(data_row, 4):
-                cell = ws.cell(row=row, column=col, value=value)
-                if row > 5:
-                    cell.number_format = '₹#,##0'
-
-        # Suggestions
-        if tax_data.get('suggestions'):
-            ws['A10'] = 'Tax Optimization Suggestions'
-            ws['A10'].font = subheader_font
-            for i, suggestion in enumerate(tax_data['suggestions'], 11):
-                ws[f'A{i}'] = f"• {suggestion}"
-
-        # Chart (best-effort; don't fail export if chart references are invalid)
-        try:
-            chart = PieChart()
-            chart.title = "Tax Comparison"
-            labels = Reference(ws, min_col=1, min_row=6, max_row=8)
-            data = Reference(ws, min_col=2, min_row=6, max_row=8)
-            chart.add_data(data, titles_from_data=False)
-            chart.set_categories(labels)
-            ws.add_chart(chart, "D4")
-        except Exception as e:
-            logging.warning(f"Excel chart generation skipped: {e}")
-
-        # Auto-adjust column widths
-        for col in ws.columns:
-            max_length = 0
-            for cell in col:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except: pass
-            adjusted_width = (max_length + 2)
-            ws.column_dimensions[col[0].column_letter].width = adjusted_width
-
-        # Footer
-        last_row = ws.max_row + 2
-        ws.merge_cells(f'A{last_row}:E{last_row}')
-        footer_cell = ws[f'A{last_row}']
-        footer_cell.value = "Created with Taxync | Developed by Somil Yadav"
-        footer_cell.font = Font(name='Arial', size=10, italic=True, color='808080')
-        footer_cell.alignment = center_alignment
-
-        buffer = io.BytesIO()
-        wb.save(buffer)
-        buffer.seek(0)
-
-        content = buffer.getvalue()
-        return Response(
-            content=content,
+        key = export_key("excel", request.formData, request.taxResult, None, EXCEL_REPORT_VERSION)
+        content, headers = await cached_export(
+            "/export/excel", "excel", key, http_request, render_excel_timed, request.formData, request.taxResult,
+        )
+        if content is None:
+            return Response(status_code=304, headers=headers)
+        return StreamingResponse(
+            iter_chunks(content),
             media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             headers={
-                "Content-Disposition": f"attachment; filename=Tax_Report_{datetime.now().year}.xlsx"
+                "Content-Disposition": f"attachment; filename=Tax_Report_{datetime.now().year}.xlsx",
+                "Content-Length": str(len(content)),
+                **headers,
             },
         )
+    except PoolSaturated as e:
+        raise pool_saturated_response(e)
+    except HTTPException:
+        raise
     except Exception as e:
-        logging.exception("Unhandled error in /export/excel")
+        logger.exception("Unhandled error in /export/excel")
         raise HTTPException(status_code=500, detail=str(e))
 
+def iter_file_and_remove(path: str, chunk_size: int = 64 * 1024):
+    """Stream a spooled file in chunks, deleting it once sent."""
+    try:
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+@app.post("/export/excel/organisation")
+async def export_organisation_excel(request: OrganisationExportRequest, http_request: Request):
+    """Export a whole-organisation workbook: a summary sheet plus one row per employee."""
+    if not request.employees:
+        raise HTTPException(status_code=400, detail="At least one employee is required")
+    await check_export_rate(http_request)
+    fd, path = tempfile.mkstemp(prefix="taxync_org_", suffix=".xlsx")
+    os.close(fd)
+    try:
+        # Rendered off-process straight to disk, then streamed from there
+        await report_pool.run(render_organisation_excel, path, request.employees)
+    except Exception as e:
+        os.remove(path)
+        if isinstance(e, PoolSaturated):
+            raise pool_saturated_response(e)
+        if isinstance(e, ValueError):
+            raise HTTPException(status_code=400, detail=str(e))
+        logger.exception("Unhandled error in /export/excel/organisation")
+        raise HTTPException(status_code=500, detail=str(e))
+    return StreamingResponse(
+        iter_file_and_remove(path),
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        headers={
+            "Content-Disposition": f"attachment; filename=Organisation_Tax_Report_{datetime.now().year}.xlsx",
+            "Content-Length": str(os.path.getsize(path)),
+        },
+    )
+
+@app.get("/export/pool")
+async def get_report_pool_stats():
+    """Saturation metrics for the report rendering pool, and the export rate limiter's counters."""
+    return {**report_pool.stats(), "rate_limit": export_limiter.stats() if export_limiter is not None else None}
+
+@app.post("/export/jobs", status_code=202)
+async def create_export_job(request: ExportJobRequest, http_request: Request):
+    """Queue a bulk export; poll /export/jobs/{id} and download when complete."""
+    if len(request.reports) > EXPORT_JOB_MAX_REPORTS:
+        raise HTTPException(status_code=400, detail=f"At most {EXPORT_JOB_MAX_REPORTS} reports per job")
+    unknown = {r.template for r in request.reports} - set(TEMPLATES)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown report template: {', '.join(sorted(unknown))}")
+    await check_export_rate(http_request, len(request.reports))
+    try:
+        job = await export_jobs.create(request.format, [r.model_dump() for r in request.reports])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"jobId": job["id"], "status": job["status"], "total": job["total"]}
+
+@app.get("/export/jobs/{job_id}")
+async def get_export_job(job_id: str):
+    """Progress of a bulk export job."""
+    try:
+        job = await export_jobs.get(job_id)
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail="Export job not found or has expired.")
+    return {
+        "jobId": job["id"],
+        "format": job["format"],
+        "status": job["status"],
+        "total": job["total"],
+        "completed": job["completed"],
+        "failed": job["failed"],
+        "errors": job["errors"],
+    }
+
+@app.get("/export/jobs/{job_id}/download")
+async def download_export_job(job_id: str):
+    """Stream the finished job's reports as a ZIP archive."""
+    try:
+        job = await export_jobs.get(job_id)
+        chunks = export_jobs.iter_zip(job)
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail="Export job not found or has expired.")
+    except JobNotReady as e:
+        raise HTTPException(status_code=409, detail=f"Export job is not complete (status: {e})")
+    return StreamingResponse(
+        chunks,
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename=Tax_Reports_{job_id}.zip"},
+    )
+
 @app.post("/share")
 async def create_shareable_link(request: ShareRequest):
     """Create a shareable link by saving report data to Redis."""
-    if not redis_client:
-        raise HTTPException(status_code=503, detail="Redis is not available.")
-    
     try:
-        report_id = str(uuid.uuid4())
-        report_data = {
-            "formData": request.formData,
-            "taxResult": request.taxResult,
-            "createdAt": datetime.utcnow().isoformat()
-        }
-        
-        # Store the report data in Redis for 24 hours (86400 seconds)
-        redis_client.setex(f"report:{report_id}", 86400, json.dumps(report_data))
-        
+        # Stored once per distinct report, compressed; each share is a small alias
+        report_id = await save_share(store, request.formData, request.taxResult, SHARE_TTL)
         return {"reportId": report_id}
     except Exception as e:
-        logging.error(f"Failed to create shareable link: {e}")
+        logger.error("Failed to create shareable link: %s", e)
         raise HTTPException(status_code=500, detail="Could not create shareable link.")
 
 @app.get("/share/{report_id}")
-async def get_shared_report(report_id: str):
-    """Retrieve a shared report from Redis by its ID."""
-    if not redis_client:
-        raise HTTPException(status_code=503, detail="Redis is not available.")
+async def get_shared_report(report_id: str, request: Request):
+    """Retrieve a shared report by its ID.
 
-    try:
-        report_data_json = redis_client.get(f"report:{report_id}")
-        if not report_data_json:
+    Shares never change, so responses carry a strong ETag and
+    ``Cache-Control: public, immutable`` with a max-age of the share's
+    remaining lifetime; a matching If-None-Match gets 304.
+    """
+    entry = shared_report_cache.get(report_id)
+    if entry is MISSING:
+        try:
+            report_data = await load_share(store, report_id)
+            remaining = await store.ttl(f"report:{report_id}") if report_data is not None else -2
+        except Exception as e:
+            logger.error("Failed to retrieve shared report %s: %s", report_id, e)
+            raise HTTPException(status_code=500, detail="Could not retrieve report.")
+
+        if report_data is None:
             raise HTTPException(status_code=404, detail="Report not found or has expired.")
-        
-        report_data = json.loads(report_data_json)
-        return report_data
-    except Exception as e:
-        logging.error(f"Failed to retrieve shared report {report_id}: {e}")
-        raise HTTPException(status_code=500, detail="Could not retrieve report.")
+        # -1: stored without expiry (e.g. by an old deployment)
+        remaining = SHARE_TTL if remaining < 0 else remaining
+        body, etag = serialize_share(report_data)
+        entry = (time.monotonic() + remaining, body, etag)
+        shared_report_cache.set(report_id, entry, ttl=remaining)
+
+    expires_at, body, etag = entry
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={max(0, int(expires_at - time.monotonic()))}, immutable",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag.strip('"')):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,145 @@
+"""Opt-in request profiling with bounded, retrievable results.
+
+A request is profiled when the caller sends an allow-listed token in the
+``X-Profile-Token`` header, or when sampling is enabled with
+``TAXYNC_PROFILE_EVERY=N`` (one request in N per route). Handlers ask
+``Profiler.wants`` whether to profile, run the work under ``profile_async``
+(in the event loop) or ``profile_call`` (in a render worker, for exports),
+and ``save`` the stats. Responses then carry ``X-Profile-Id``; the stats are served at
+``/profiles/{id}``, to callers with an allow-listed token only. Without
+``TAXYNC_PROFILE_TOKENS`` sampled profiles are kept but not served.
+
+cProfile sees a single thread, and concurrent coroutines in the event
+loop would blur the profile, so only one in-loop profile runs at a time.
+Requests that arrive while one is running are simply not profiled.
+"""
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from access_log import LogSampler
+
+PROFILE_HEADER = "x-profile-token"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+Stats = Dict[tuple, tuple]
+
+
+def profile_call(fn: Callable[..., Any], *args: Any) -> Tuple[Any, Stats]:
+    """Run ``fn(*args)`` under cProfile and return ``(result, raw stats)``.
+
+    The raw stats are plain tuples, so this can run in a worker process and
+    send them back with the result.
+    """
+    profile = cProfile.Profile()
+    result = profile.runcall(fn, *args)
+    profile.create_stats()
+    return result, profile.stats
+
+
+async def profile_async(fn: Callable[..., Awaitable[Any]], *args: Any) -> Tuple[Any, Stats]:
+    """Await ``fn(*args)`` with cProfile enabled on the event loop thread."""
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        result = await fn(*args)
+    finally:
+        profile.disable()
+    profile.create_stats()
+    return result, profile.stats
+
+
+class _RawStats:
+    """Adapter so ``pstats.Stats`` can load a raw stats dict."""
+
+    def __init__(self, stats: Stats):
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+class Profiler:
+    def __init__(self, every: int = 0, tokens: Optional[List[str]] = None, max_profiles: int = 20):
+        self.every = every
+        self.tokens = frozenset(tokens or ())
+        self.max_profiles = max_profiles
+        self._samplers: Dict[str, LogSampler] = {}
+        self._profiles: "OrderedDict[str, dict]" = OrderedDict()
+        self._busy = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "Profiler":
+        """Configure from TAXYNC_PROFILE_EVERY (0 disables sampling),
+        TAXYNC_PROFILE_TOKENS (comma-separated) and TAXYNC_PROFILE_MAX_STORED."""
+        return cls(
+            every=int(os.getenv("TAXYNC_PROFILE_EVERY", "0")),
+            tokens=[t.strip() for t in os.getenv("TAXYNC_PROFILE_TOKENS", "").split(",") if t.strip()],
+            max_profiles=int(os.getenv("TAXYNC_PROFILE_MAX_STORED", "20")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.every > 0 or bool(self.tokens)
+
+    def authorized(self, headers: Any) -> bool:
+        """True if the request carries an allow-listed token. With no tokens
+        configured nobody is: sampled profiles stay unreadable over HTTP."""
+        return bool(self.tokens) and headers.get(PROFILE_HEADER) in self.tokens
+
+    def wants(self, route: str, headers: Any) -> bool:
+        """Whether to profile this request: an allow-listed token, or the route's 1-in-N sample."""
+        if not self.enabled:
+            return False
+        if self.tokens and headers.get(PROFILE_HEADER) in self.tokens:
+            return True
+        sampler = self._samplers.get(route)
+        if sampler is None:
+            sampler = self._samplers[route] = LogSampler(self.every)
+        return sampler()
+
+    def acquire(self) -> bool:
+        """Claim the single in-loop profiling slot without waiting."""
+        return self._busy.acquire(blocking=False)
+
+    def release(self) -> None:
+        self._busy.release()
+
+    def save(self, route: str, stats: Stats, seconds: float) -> str:
+        """Store raw stats under a new id, evicting the oldest beyond ``max_profiles``."""
+        profile_id = uuid.uuid4().hex
+        self._profiles[profile_id] = {
+            "id": profile_id,
+            "route": route,
+            "created": time.time(),
+            "seconds": round(seconds, 6),
+            "stats": stats,
+        }
+        while len(self._profiles) > self.max_profiles:
+            self._profiles.popitem(last=False)
+        return profile_id
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        return self._profiles.get(profile_id)
+
+    def list(self) -> List[dict]:
+        return [{k: v for k, v in p.items() if k != "stats"} for p in reversed(self._profiles.values())]
+
+    @staticmethod
+    def to_pstats(profile: dict) -> bytes:
+        """The stats in the ``pstats`` file format (as written by ``dump_stats``)."""
+        return marshal.dumps(profile["stats"])
+
+    @staticmethod
+    def to_text(profile: dict, sort: str = "cumulative", limit: int = 40) -> str:
+        out = io.StringIO()
+        stats = pstats.Stats(_RawStats(profile["stats"]), stream=out)
+        stats.sort_stats(sort).print_stats(limit)
+        return out.getvalue()
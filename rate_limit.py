@@ -0,0 +1,135 @@
+"""Per-client token-bucket rate limiting.
+
+Each client gets a bucket of ``burst`` tokens that refills at ``rate``
+tokens per second; a request takes a token per render (one, or one per
+report of a bulk job) or is refused with the time until enough are
+available. Buckets live in a bounded in-process LRU, so each
+worker limits on its own, or, with a ``store``, in Redis, where a Lua
+script updates the bucket atomically and the limit holds across workers.
+While Redis is unavailable the local buckets are used.
+"""
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Optional
+
+from metrics import REGISTRY
+
+RATE_LIMITED = REGISTRY.counter(
+    "taxync_rate_limited_total", "Requests refused by the rate limiter.", ("limiter",),
+)
+
+# KEYS[1] = bucket; ARGV = rate (tokens/s), burst, cost.
+# Returns {allowed (0/1), milliseconds until enough tokens}.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = clock[1] * 1000 + math.floor(clock[2] / 1000)
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate / 1000)
+local allowed, wait = 0, 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    wait = math.ceil((cost - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst * 1000 / rate) + 1000)
+return {allowed, wait}
+"""
+
+
+class RateLimiter:
+    """Token buckets keyed by client."""
+
+    def __init__(self, name: str, rate: float, burst: float, store: Any = None, max_clients: int = 10000):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.store = store
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.limited = 0
+
+    @classmethod
+    def from_env(cls, name: str, store: Any) -> Optional["RateLimiter"]:
+        """Configure from TAXYNC_EXPORT_RATE (tokens per second per client;
+        0, the default, disables: None), TAXYNC_EXPORT_BURST and
+        TAXYNC_RATE_LIMIT_REDIS (``on`` keeps the buckets in Redis, shared by
+        all workers). Behind a proxy, also set TAXYNC_RATE_LIMIT_CLIENT_HEADER,
+        or every user shares the proxy's bucket."""
+        rate = float(os.getenv("TAXYNC_EXPORT_RATE", "0"))
+        if rate <= 0:
+            return None
+        shared = os.getenv("TAXYNC_RATE_LIMIT_REDIS", "off").lower() in ("on", "1", "true", "yes")
+        return cls(name, rate, float(os.getenv("TAXYNC_EXPORT_BURST", "30")), store=store if shared else None)
+
+    async def acquire(self, client: str, cost: float = 1.0) -> float:
+        """Take ``cost`` tokens from ``client``'s bucket: 0 if allowed,
+        otherwise the seconds until the request would be."""
+        wait = None
+        if self.store is not None:
+            result = await self.store.eval(TOKEN_BUCKET_SCRIPT, [f"ratelimit:{self.name}:{client}"],
+                                           [self.rate, self.burst, cost])
+            if result is not None:
+                wait = 0.0 if int(result[0]) else int(result[1]) / 1000
+        if wait is None:
+            wait = self._acquire_local(client, cost)
+        if wait:
+            self.limited += 1
+            RATE_LIMITED.inc(self.name)
+        else:
+            self.allowed += 1
+        return wait
+
+    def _acquire_local(self, client: str, cost: float) -> float:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = [self.burst, now]
+                while len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= cost:
+                bucket[0] -= cost
+                return 0.0
+            return (cost - bucket[0]) / self.rate
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "shared": self.store is not None,
+            "clients": len(self._buckets),
+            "allowed": self.allowed,
+            "limited": self.limited,
+        }
+
+
+def client_id(headers: Mapping[str, str], peer: Optional[str], header: Optional[str] = None) -> str:
+    """The client a request is counted against: the first address in
+    ``header`` (e.g. X-Forwarded-For, set by a trusted proxy) if given and
+    present, else the peer address."""
+    if header:
+        value = headers.get(header)
+        if value:
+            return value.split(",")[0].strip()
+    return peer or "unknown"
+
+
+def retry_after(wait: float) -> str:
+    """A Retry-After value (whole seconds, at least 1) for ``wait`` seconds."""
+    return str(max(1, math.ceil(wait)))
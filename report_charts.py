@@ -0,0 +1,122 @@
+"""Vector charts for PDF reports, drawn with ReportLab graphics.
+
+The charts mirror the dashboard's Chart.js ones (old vs new regime bar,
+old/new/savings pie) but are built server-side from ``taxResult``, so the
+browser no longer uploads a base64 PNG with every export and the PDF embeds
+a few hundred bytes of vector paths instead of a bitmap.
+
+A chart only depends on three amounts, and at 4 inches wide differences
+below three significant figures are invisible, so drawings are cached per
+bucket of rounded amounts. Exact figures are in the summary table. The
+chart widgets are expanded to plain shapes once, when cached, so a build
+only emits the paths. Each build gets its own shallow copy of the drawing,
+because platypus records layout state (e.g. ``_postponed``) on flowables.
+"""
+import copy
+import math
+from functools import lru_cache
+from typing import TYPE_CHECKING, Tuple
+
+if TYPE_CHECKING:
+    from reportlab.graphics.shapes import Drawing
+
+CHART_TYPES = ("bar", "pie", "none")
+DEFAULT_CHART = "bar"
+
+# Same palette as the dashboard charts
+OLD_COLOR = "#663399"
+NEW_COLOR = "#f59e0b"
+SAVINGS_COLOR = "#10b981"
+
+WIDTH = 288  # 4 inches
+HEIGHT = 216  # 3 inches
+
+
+def bucket(amount: float, digits: int = 3) -> int:
+    """``amount`` rounded to ``digits`` significant figures."""
+    amount = round(float(amount))
+    magnitude = len(str(abs(amount)))
+    if magnitude <= digits:
+        return amount
+    step = 10 ** (magnitude - digits)
+    return int(round(amount / step) * step)
+
+
+def _amount(tax_data: dict, key: str) -> float:
+    """The amount at ``key``; 0 if it is missing, not a number or not finite."""
+    try:
+        amount = float(tax_data.get(key) or 0)
+    except (TypeError, ValueError):
+        return 0.0
+    return amount if math.isfinite(amount) else 0.0
+
+
+def chart_key(kind: str, tax_data: dict) -> Tuple[str, int, int, int]:
+    return (
+        kind,
+        bucket(_amount(tax_data, "old_regime_tax")),
+        bucket(_amount(tax_data, "new_regime_tax")),
+        bucket(_amount(tax_data, "savings")),
+    )
+
+
+def tax_chart(kind: str, tax_data: dict) -> "Drawing":
+    """The chart drawing for ``tax_data``; ``kind`` is "bar" or "pie"."""
+    return copy.copy(_drawing(*chart_key(kind, tax_data)))
+
+
+@lru_cache(maxsize=512)
+def _drawing(kind: str, old_tax: int, new_tax: int, savings: int) -> "Drawing":
+    from reportlab.graphics.charts.barcharts import VerticalBarChart
+    from reportlab.graphics.charts.legends import Legend
+    from reportlab.graphics.charts.piecharts import Pie
+    from reportlab.graphics.shapes import Circle, Drawing, String
+    from reportlab.lib import colors
+
+    drawing = Drawing(WIDTH, HEIGHT)
+    drawing.hAlign = "CENTER"
+    old_color, new_color, savings_color = (colors.HexColor(c) for c in (OLD_COLOR, NEW_COLOR, SAVINGS_COLOR))
+
+    if kind == "pie":
+        pie = Pie()
+        pie.x, pie.y, pie.width, pie.height = 30, 40, 150, 150
+        # Negative savings (new regime cheaper) have no slice
+        pie.data = [max(0, old_tax), max(0, new_tax), max(0, savings)]
+        if not any(pie.data):
+            # Nothing to split: say so rather than draw made-up slices
+            cx, cy, r = pie.x + pie.width / 2, pie.y + pie.height / 2, pie.width / 2
+            drawing.add(Circle(cx, cy, r, fillColor=colors.HexColor("#e5e7eb"), strokeColor=None))
+            drawing.add(String(cx, cy - 4, "No tax payable", textAnchor="middle", fontName="Helvetica", fontSize=11))
+            return drawing
+        pie.labels = None
+        pie.slices.strokeWidth = 0
+        for i, color in enumerate((old_color, new_color, savings_color)):
+            pie.slices[i].fillColor = color
+        drawing.add(pie.draw())
+        legend = Legend()
+        legend.x, legend.y = 200, 130
+        legend.fontName, legend.fontSize = "Helvetica", 8
+        legend.colorNamePairs = [(old_color, "Old Regime Tax"), (new_color, "New Regime Tax"), (savings_color, "Tax Savings")]
+        drawing.add(legend.draw())
+        return drawing
+
+    chart = VerticalBarChart()
+    chart.x, chart.y, chart.width, chart.height = 50, 30, 210, 165
+    chart.data = [(old_tax, new_tax)]
+    chart.categoryAxis.categoryNames = ["Old Regime", "New Regime"]
+    chart.categoryAxis.labels.fontName = "Helvetica"
+    chart.categoryAxis.labels.fontSize = 8
+    chart.valueAxis.valueMin = 0
+    # Round the axis up to a whole leading digit so the top bar gets a tick
+    top = max(old_tax, new_tax, 1000)
+    step = 10 ** (len(str(top)) - 1)
+    chart.valueAxis.valueMax = -(-top // step) * step
+    chart.valueAxis.labels.fontName = "Helvetica"
+    chart.valueAxis.labels.fontSize = 7
+    chart.valueAxis.labelTextFormat = lambda v: f"{v:,.0f}"
+    chart.groupSpacing = 10
+    chart.bars.strokeWidth = 0
+    chart.bars[(0, 0)].fillColor = old_color
+    chart.bars[(0, 1)].fillColor = new_color
+    drawing.add(chart.draw())
+    return drawing
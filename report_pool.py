@@ -0,0 +1,137 @@
+"""Bounded worker pool for CPU-heavy report rendering.
+
+Rendering runs in a ``ProcessPoolExecutor`` so it never blocks the event
+loop. At most ``workers + queue_depth`` renders are admitted at once; beyond
+that ``run`` raises ``PoolSaturated`` so the API can answer 503 with a
+Retry-After hint instead of queueing without bound.
+"""
+import asyncio
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+
+class PoolSaturated(Exception):
+    """Raised when the render queue is full."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Report rendering queue is full; retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class ReportPool:
+    """Admission-controlled executor for report rendering.
+
+    ``workers=0`` renders in a single background thread instead of worker
+    processes, which is handy for development and tests.
+    """
+
+    def __init__(self, workers: int, queue_depth: int):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.capacity = max(1, workers) + queue_depth
+        self._executor: Optional[Executor] = None
+        self._restart_lock = threading.Lock()
+        self.in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.peak_in_flight = 0
+        self._render_seconds = 0.0
+
+    @classmethod
+    def from_env(cls) -> "ReportPool":
+        """Configure from TAXYNC_REPORT_WORKERS and TAXYNC_REPORT_QUEUE_DEPTH."""
+        default_workers = min(4, os.cpu_count() or 1)
+        return cls(
+            workers=int(os.getenv("TAXYNC_REPORT_WORKERS", str(default_workers))),
+            queue_depth=int(os.getenv("TAXYNC_REPORT_QUEUE_DEPTH", "16")),
+        )
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.workers > 0:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="report")
+        return self._executor
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free, from the mean render time."""
+        mean = self._render_seconds / self.completed if self.completed else 1.0
+        return max(1, math.ceil(mean * self.capacity / max(1, self.workers)))
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run ``fn(*args)`` on the pool, or raise ``PoolSaturated``."""
+        if self.in_flight >= self.capacity:
+            self.rejected += 1
+            raise PoolSaturated(self.retry_after())
+
+        self.in_flight += 1
+        self.submitted += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            executor = self._get_executor()
+            try:
+                result = await loop.run_in_executor(executor, fn, *args)
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM); start a fresh pool and retry once
+                result = await loop.run_in_executor(self._restart(executor), fn, *args)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+        self.completed += 1
+        self._render_seconds += time.perf_counter() - started
+        return result
+
+    def _restart(self, broken: Executor) -> Executor:
+        """A working executor in place of ``broken``. Only the first caller
+        to see a pool break replaces it; the others reuse the replacement
+        rather than shutting it down."""
+        with self._restart_lock:
+            if self._executor is broken:
+                logging.warning("Report worker pool broken; restarting it")
+                self.shutdown()
+            return self._get_executor()
+
+    async def prewarm(self, fn: Callable[[], Any]) -> None:
+        """Start the workers and run ``fn`` once per worker, outside admission
+        control, so the first real render does not pay for imports."""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        started = time.perf_counter()
+        await asyncio.gather(*(loop.run_in_executor(executor, fn) for _ in range(max(1, self.workers))))
+        logging.info(f"Report workers prewarmed in {time.perf_counter() - started:.2f}s")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        busy = min(self.in_flight, max(1, self.workers))
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "capacity": self.capacity,
+            "in_flight": self.in_flight,
+            "busy": busy,
+            "queued": self.in_flight - busy,
+            "utilization": round(self.in_flight / self.capacity, 4),
+            "peak_in_flight": self.peak_in_flight,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "mean_render_ms": round(1000 * self._render_seconds / self.completed, 2) if self.completed else 0.0,
+        }
@@ -0,0 +1,140 @@
+"""Named PDF report templates with per-process cached styles.
+
+Building ReportLab's sample stylesheet, paragraph styles, table styles and
+the static title/footer flowables is a measurable share of each export, so
+each template is compiled once per process by ``get_template`` and reused.
+Renders happen one at a time per worker (see ``report_pool``), so sharing
+the static flowables between builds is safe.
+
+ReportLab is imported when a template is first compiled, so the template
+specs can be imported (e.g. by the API for validation) without loading it.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+if TYPE_CHECKING:
+    from reportlab.lib.styles import StyleSheet1
+    from reportlab.platypus import Flowable
+
+DEFAULT_TEMPLATE = "summary"
+
+
+@dataclass(frozen=True)
+class TemplateSpec:
+    """Static description of a report template."""
+    name: str
+    # Part of the export cache key: bump when the output changes, including
+    # the charts drawn by report_charts
+    version: int
+    title: str
+    accent: Tuple[float, float, float]
+    footer: str
+    # Deduction breakdown and regime comparison tables
+    detailed: bool = False
+    # Subtitle with formData["employer"] under the title
+    branded: bool = False
+
+
+TEMPLATES: Dict[str, TemplateSpec] = {
+    "summary": TemplateSpec(
+        name="summary",
+        version=2,
+        title="TAXYNC - Tax Analysis Report",
+        accent=(0.4, 0.2, 0.6),
+        footer="Generated by Taxync – Developed by Somil Yadav © 2025",
+    ),
+    "detailed": TemplateSpec(
+        name="detailed",
+        version=2,
+        title="TAXYNC - Detailed Tax Analysis Report",
+        accent=(0.4, 0.2, 0.6),
+        footer="Generated by Taxync – Developed by Somil Yadav © 2025",
+        detailed=True,
+    ),
+    "employer": TemplateSpec(
+        name="employer",
+        version=2,
+        title="Employee Tax Statement",
+        accent=(0.06, 0.46, 0.43),
+        footer="Prepared with Taxync for your employer – Developed by Somil Yadav © 2025",
+        detailed=True,
+        branded=True,
+    ),
+}
+
+
+class CompiledTemplate:
+    """Styles and static flowables for one template, built once per process."""
+
+    def __init__(self, spec: TemplateSpec):
+        from reportlab.lib import colors
+        from reportlab.lib.enums import TA_CENTER
+        from reportlab.lib.styles import ParagraphStyle
+        from reportlab.platypus import Paragraph, Spacer, TableStyle
+
+        self.spec = spec
+        accent = colors.Color(*spec.accent)
+        self.accent = accent
+        self.styles: "StyleSheet1" = _sample_styles()
+        self.title_style = ParagraphStyle(
+            f'{spec.name}Title',
+            parent=self.styles['Heading1'],
+            fontSize=24,
+            spaceAfter=30,
+            alignment=TA_CENTER,
+            textColor=accent
+        )
+        self.subtitle_style = ParagraphStyle(
+            f'{spec.name}Subtitle',
+            parent=self.styles['Normal'],
+            fontSize=12,
+            alignment=TA_CENTER,
+            textColor=accent
+        )
+        self.footer_style = ParagraphStyle(
+            f'{spec.name}Footer',
+            parent=self.styles['Normal'],
+            fontSize=10,
+            alignment=TA_CENTER,
+            textColor=colors.grey
+        )
+        self.table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), accent),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ])
+        self.suggestions_heading = Paragraph("<b>Tax Optimization Suggestions:</b>", self.styles['Heading3'])
+        self.chart_heading = Paragraph("<b>Tax Distribution Chart:</b>", self.styles['Heading3'])
+        self.breakdown_heading = Paragraph("<b>Deduction Breakdown:</b>", self.styles['Heading3'])
+        self.comparison_heading = Paragraph("<b>Detailed Regime Comparison:</b>", self.styles['Heading3'])
+        self.spacer = Spacer(1, 20)
+        self._header = [Paragraph(spec.title, self.title_style), self.spacer]
+        self._footer = [Spacer(1, 40), Paragraph(spec.footer, self.footer_style)]
+
+    def header(self) -> List["Flowable"]:
+        return list(self._header)
+
+    def footer(self) -> List["Flowable"]:
+        return list(self._footer)
+
+
+@lru_cache(maxsize=1)
+def _sample_styles() -> "StyleSheet1":
+    from reportlab.lib.styles import getSampleStyleSheet
+
+    return getSampleStyleSheet()
+
+
+@lru_cache(maxsize=None)
+def get_template(name: str = DEFAULT_TEMPLATE) -> CompiledTemplate:
+    """Compiled template by name; raises ``KeyError`` for unknown names."""
+    return CompiledTemplate(TEMPLATES[name])
+
+
+def template_version(name: str) -> str:
+    """Identifier that changes whenever a template's output may change."""
+    spec = TEMPLATES[name]
+    return f"{spec.name}:v{spec.version}"
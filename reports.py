@@ -0,0 +1,221 @@
+"""PDF and Excel report rendering.
+
+These functions are pure (plain dicts in, bytes out) so they can run in a
+worker process from ``report_pool``. ReportLab and openpyxl are imported on
+first use, so importing this module (as the API does) stays cheap; call
+``prewarm`` to pay that cost ahead of the first export.
+"""
+import binascii
+import io
+import logging
+import time
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple
+from xml.sax.saxutils import escape as xml_escape
+
+from report_charts import DEFAULT_CHART, tax_chart
+from report_templates import DEFAULT_TEMPLATE, TEMPLATES, get_template
+
+PDF_STREAM_CHUNK_SIZE = 64 * 1024
+
+# Part of the export cache key; bump whenever render_excel's output changes
+EXCEL_REPORT_VERSION = "excel:v1"
+
+DEDUCTION_LABELS = (
+    ('section80C', 'Section 80C'),
+    ('section80D', 'Section 80D'),
+    ('hra', 'HRA'),
+    ('home_loan_interest', 'Home Loan Interest (24b)'),
+    ('standard_deduction', 'Standard Deduction'),
+    ('edu_loan_interest', 'Education Loan Interest (80E)'),
+    ('donations', 'Donations (80G)'),
+)
+
+
+def decode_chart_image(data_url: str) -> bytes:
+    """Decode a ``data:image/png;base64,...`` chart image.
+
+    ``a2b_base64`` reads the ASCII string directly, so unlike
+    ``split`` + ``b64decode`` this makes no intermediate bytes copy of the
+    encoded payload.
+    """
+    comma = data_url.find(",")
+    if comma < 0:
+        raise ValueError("Chart image is not a data URL")
+    return binascii.a2b_base64(data_url[comma + 1:])
+
+
+def iter_chunks(data: bytes, chunk_size: int = PDF_STREAM_CHUNK_SIZE) -> Iterator[memoryview]:
+    """Yield zero-copy slices of ``data`` for a StreamingResponse."""
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        yield view[start:start + chunk_size]
+
+
+def render_pdf(form_data: dict, tax_data: dict, chart_image: Optional[str] = None,
+               template: str = DEFAULT_TEMPLATE, chart_type: str = DEFAULT_CHART) -> bytes:
+    """Render the tax analysis PDF report."""
+    buffer = io.BytesIO()
+    write_pdf(buffer, form_data, tax_data, chart_image, template, chart_type=chart_type)
+    # BytesIO shares its buffer with the returned bytes instead of copying it
+    return buffer.getvalue()
+
+
+def render_pdf_timed(form_data: dict, tax_data: dict, chart_image: Optional[str] = None,
+                     template: str = DEFAULT_TEMPLATE, chart_type: str = DEFAULT_CHART) -> Tuple[bytes, Dict[str, float]]:
+    """``render_pdf`` plus the seconds spent in each stage, measured in the worker."""
+    stages: Dict[str, float] = {}
+    buffer = io.BytesIO()
+    write_pdf(buffer, form_data, tax_data, chart_image, template, stages, chart_type)
+    return buffer.getvalue(), stages
+
+
+def write_pdf(buffer: BinaryIO, form_data: dict, tax_data: dict, chart_image: Optional[str] = None,
+              template: str = DEFAULT_TEMPLATE, stages: Optional[Dict[str, float]] = None,
+              chart_type: str = DEFAULT_CHART) -> None:
+    """Render the tax analysis PDF report into ``buffer`` using a named template.
+
+    The chart is ``chart_image`` (a PNG data URL) when one is uploaded, and
+    otherwise a vector ``chart_type`` chart drawn from ``tax_data`` ("none"
+    omits it). If ``stages`` is given, it is filled with seconds spent on
+    the template, story building, the chart and ``doc.build``.
+    """
+    started = time.perf_counter()
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Image, Paragraph, SimpleDocTemplate, Table
+
+    tpl = get_template(template)
+    story_started = time.perf_counter()
+    chart_seconds = 0.0
+    styles = tpl.styles
+    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18)
+
+    story = tpl.header()
+    if tpl.spec.branded and form_data.get('employer'):
+        story.append(Paragraph(xml_escape(str(form_data['employer'])), tpl.subtitle_style))
+        story.append(tpl.spacer)
+
+    # Tax Summary Table
+    tax_table_data = [
+        ['Description', 'Amount (₹)'],
+        ['Annual Income', f"₹{form_data.get('income', 0):,}"],
+        ['Old Regime Tax', f"₹{tax_data.get('old_regime_tax', 0):,}"],
+        ['New Regime Tax', f"₹{tax_data.get('new_regime_tax', 0):,}"],
+        ['Total Savings', f"₹{tax_data.get('savings', 0):,}"]
+    ]
+    tax_table = Table(tax_table_data, colWidths=[3*inch, 2*inch])
+    tax_table.setStyle(tpl.table_style)
+    story.append(tax_table)
+    story.append(tpl.spacer)
+
+    if tpl.spec.detailed:
+        breakdown = [
+            [label, f"₹{_to_number(form_data.get(key)):,.0f}"]
+            for key, label in DEDUCTION_LABELS
+            if _to_number(form_data.get(key))
+        ]
+        if breakdown:
+            story.append(tpl.breakdown_heading)
+            table = Table([['Deduction', 'Amount (₹)']] + breakdown, colWidths=[3*inch, 2*inch])
+            table.setStyle(tpl.table_style)
+            story.append(table)
+            story.append(tpl.spacer)
+
+        income = _to_number(form_data.get('income'))
+        total_deductions = sum(_to_number(form_data.get(key)) for key, _ in DEDUCTION_LABELS)
+        story.append(tpl.comparison_heading)
+        table = Table([
+            ['Description', 'Old Regime', 'New Regime'],
+            ['Gross Income', f"₹{income:,.0f}", f"₹{income:,.0f}"],
+            ['Deductions', f"₹{total_deductions:,.0f}", f"₹{_to_number(form_data.get('standard_deduction', 50000)):,.0f}"],
+            ['Tax Payable', f"₹{tax_data.get('old_regime_tax', 0):,}", f"₹{tax_data.get('new_regime_tax', 0):,}"],
+        ], colWidths=[2*inch, 1.5*inch, 1.5*inch])
+        table.setStyle(tpl.table_style)
+        story.append(table)
+        story.append(tpl.spacer)
+
+    # Suggestions
+    if tax_data.get('suggestions'):
+        story.append(tpl.suggestions_heading)
+        for suggestion in tax_data['suggestions']:
+            story.append(Paragraph(f"• {suggestion}", styles['Normal']))
+        story.append(tpl.spacer)
+
+    # Add chart image if available
+    if chart_image:
+        try:
+            # Expected format: "data:image/png;base64,iVBORw0KGgo..."
+            decode_started = time.perf_counter()
+            image_buffer = io.BytesIO(decode_chart_image(chart_image))
+            chart_seconds = time.perf_counter() - decode_started
+
+            # Add image to PDF
+            story.append(tpl.spacer)
+            story.append(tpl.chart_heading)
+            img = Image(image_buffer, width=4*inch, height=3*inch)
+            img.hAlign = 'CENTER'
+            story.append(img)
+            story.append(tpl.spacer)
+        except Exception as e:
+            logging.error(f"Failed to process chart image: {e}")
+    elif chart_type != "none":
+        chart_started = time.perf_counter()
+        story.append(tpl.spacer)
+        story.append(tpl.chart_heading)
+        story.append(tax_chart(chart_type, tax_data))
+        story.append(tpl.spacer)
+        chart_seconds = time.perf_counter() - chart_started
+
+    story.extend(tpl.footer())
+    build_started = time.perf_counter()
+    doc.build(story)
+    if stages is not None:
+        stages["template"] = story_started - started
+        stages["story"] = build_started - story_started - chart_seconds
+        stages["chart"] = chart_seconds
+        stages["build"] = time.perf_counter() - build_started
+
+
+def _to_number(x) -> float:
+    """Safely coerce a form value to a number (non-numeric, None -> 0)."""
+    try:
+        return float(x)
+    except Exception:
+        return 0.0
+
+
+def render_excel(form_data: dict, tax_data: dict) -> bytes:
+    """Render the tax analysis Excel workbook."""
+    return render_excel_timed(form_data, tax_data)[0]
+
+
+def render_excel_timed(form_data: dict, tax_data: dict) -> Tuple[bytes, Dict[str, float]]:
+    """``render_excel`` plus the seconds spent writing and saving the workbook."""
+    started = time.perf_counter()
+    from excel_writer import StreamingWorkbook, write_tax_report
+
+    book = StreamingWorkbook()
+    write_tax_report(book, form_data, tax_data)
+    written = time.perf_counter()
+    buffer = io.BytesIO()
+    book.save(buffer)
+    return buffer.getvalue(), {"write": written - started, "save": time.perf_counter() - written}
+
+
+def render_organisation_excel(path: str, employees: list) -> str:
+    """Write the whole-organisation workbook to ``path`` and return it."""
+    from excel_writer import write_organisation_workbook
+
+    write_organisation_workbook(path, employees)
+    return path
+
+
+def prewarm() -> None:
+    """Import the rendering libraries and compile every report template."""
+    import excel_writer  # noqa: F401
+    from reportlab.graphics.charts.barcharts import VerticalBarChart  # noqa: F401
+    from reportlab.graphics.charts.piecharts import Pie  # noqa: F401
+    from reportlab.platypus import SimpleDocTemplate  # noqa: F401
+
+    for name in TEMPLATES:
+        get_template(name)
@@ -0,0 +1,130 @@
+"""Compact, deduplicated storage of shared reports.
+
+A shared report is stored once per distinct content, under
+``report_blob:<sha256>``, and each share gets a small alias
+``report:<id>`` pointing at it with its own creation time and TTL.
+
+Blobs are ``MAGIC + codec + zlib(payload)``. The payload is msgpack when it
+is installed and compact canonical JSON otherwise, and is compressed
+against a preset dictionary of the field names and advisor phrases every
+report repeats, which is what makes small reports compress well. Aliases are
+``ALIAS_MAGIC + digest + created_at``. Entries written before this format
+(plain JSON under ``report:<id>``) are still read.
+"""
+import hashlib
+import json
+import uuid
+import zlib
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from cache import canonical_json, canonicalize
+
+try:
+    import msgpack
+except ImportError:  # optional
+    msgpack = None
+
+MAGIC = b"TXR"
+ALIAS_MAGIC = b"TXA1"
+CODEC_JSON = b"j"
+CODEC_MSGPACK = b"m"
+
+# Preset zlib dictionary, version 1. Never edit it in place: blobs written
+# with it must stay readable. Add a new codec byte for a new dictionary.
+# The most common strings go last, where zlib finds them cheapest.
+ZDICT = "".join([
+    "createdAt", "ranked_suggestions", "deduction_plan", "allocation", "total_investment",
+    "recommended_regime", "breakeven_extra_deduction", "breakeven_reachable", "new_regime_tax", "old_regime_tax",
+    "home_loan_interest", "edu_loan_interest", "standard_deduction", "donations", "section80CCD_1B",
+    "Both regimes result in the same tax liability.",
+    "✅ You have already optimized your tax savings under current rules.",
+    "Consider investing ₹ in NPS (Section 80CCD(1B)) for an additional tax saving of up to ₹",
+    "Claiming up to ₹ more in Home Loan Interest (Section 24b) could save you ₹",
+    "Increase your health insurance premium by ₹ (Section 80D) to save up to ₹ in taxes.",
+    "Invest ₹ more in Section 80C (e.g., ELSS, PPF) to save up to ₹ in taxes.",
+    " Regime saves ₹ compared to New Regime.", " compared to Old Regime.",
+    '"regime_comparison":"', '"optimization_suggestions":["', '"savings":',
+    '"section80D":', '"section80C":', '"hra":', '"income":', '{"formData":{', '"taxResult":{',
+]).encode()
+
+
+def encode_report(form_data: Any, tax_result: Any) -> Tuple[str, bytes]:
+    """``(content digest, blob)`` for a shared report."""
+    payload = canonicalize({"formData": form_data, "taxResult": tax_result})
+    # The digest is over canonical JSON whatever the codec, so every worker
+    # agrees on it
+    canonical = canonical_json(payload).encode()
+    digest = hashlib.sha256(canonical).hexdigest()
+    if msgpack is not None:
+        codec, raw = CODEC_MSGPACK, msgpack.packb(payload, use_bin_type=True)
+    else:
+        codec, raw = CODEC_JSON, canonical
+    compressor = zlib.compressobj(9, zdict=ZDICT)
+    return digest, MAGIC + codec + compressor.compress(raw) + compressor.flush()
+
+
+def decode_report(blob: bytes) -> dict:
+    """Inverse of ``encode_report``; raises ``ValueError`` on unknown data."""
+    if blob[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not an encoded report")
+    codec = blob[len(MAGIC):len(MAGIC) + 1]
+    decompressor = zlib.decompressobj(zdict=ZDICT)
+    raw = decompressor.decompress(blob[len(MAGIC) + 1:]) + decompressor.flush()
+    if codec == CODEC_JSON:
+        return json.loads(raw)
+    if codec == CODEC_MSGPACK:
+        if msgpack is None:
+            raise ValueError("Report was encoded with msgpack, which is not installed")
+        return msgpack.unpackb(raw, raw=False)
+    raise ValueError(f"Unknown report codec {codec!r}")
+
+
+def encode_alias(digest: str, created_at: str) -> bytes:
+    return ALIAS_MAGIC + digest.encode() + created_at.encode()
+
+
+def decode_alias(value: bytes) -> Optional[Tuple[str, str]]:
+    """``(digest, created_at)``, or None for a legacy JSON entry."""
+    if value[:len(ALIAS_MAGIC)] != ALIAS_MAGIC:
+        return None
+    body = value[len(ALIAS_MAGIC):].decode()
+    return body[:64], body[64:]
+
+
+def serialize_share(report: dict) -> Tuple[bytes, str]:
+    """Response body (as ``JSONResponse`` renders it) and its strong ETag."""
+    body = json.dumps(report, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+    return body, '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+async def save_share(store: Any, form_data: Any, tax_result: Any, ttl: int) -> str:
+    """Store a report (once per content) and return a new share id."""
+    digest, blob = encode_report(form_data, tax_result)
+    blob_key = f"report_blob:{digest}"
+    # The blob must outlive every alias pointing at it
+    remaining = await store.ttl(blob_key)
+    if remaining == -2:
+        await store.set(blob_key, blob, ex=ttl)
+    elif 0 <= remaining < ttl:
+        await store.expire(blob_key, ttl)
+    report_id = str(uuid.uuid4())
+    await store.set(f"report:{report_id}", encode_alias(digest, datetime.utcnow().isoformat()), ex=ttl)
+    return report_id
+
+
+async def load_share(store: Any, report_id: str) -> Optional[dict]:
+    """The shared report as ``{formData, taxResult, createdAt}``, or None."""
+    value = await store.get(f"report:{report_id}")
+    if not value:
+        return None
+    alias = decode_alias(value)
+    if alias is None:
+        return json.loads(value)
+    digest, created_at = alias
+    blob = await store.get(f"report_blob:{digest}")
+    if not blob:
+        return None
+    report = decode_report(blob)
+    report["createdAt"] = created_at
+    return report
@@ -0,0 +1,83 @@
+"""What-if simulation: old/new regime tax over a grid of scenarios.
+
+A base request is projected over salary hikes, years and deduction deltas.
+The whole cartesian grid is taxed in one vectorized pass over the compiled
+rule tables, and the result is returned as flat columns (C order over the
+axes) plus the regime break-even incomes for every deduction scenario.
+"""
+import itertools
+from typing import Any, Dict, List, Mapping, Sequence
+
+import numpy as np
+
+from tax_engine import AMOUNT_LIMIT, DEDUCTION_FIELDS, new_regime_tax, old_regime_tax
+from tax_optimizer import regime_breakeven_incomes
+from tax_rules import DEFAULT_FY
+
+# Largest simulated income (in magnitude) whose taxes still fit in int64
+INCOME_LIMIT = AMOUNT_LIMIT
+
+
+def simulate(base: Mapping[str, float], hike_percent: Sequence[float], years: Sequence[int],
+             deduction_deltas: Mapping[str, Sequence[float]], fy: str = DEFAULT_FY) -> Dict[str, Any]:
+    """Tax every (hike, year, *deltas) combination of ``base``.
+
+    Income in a scenario is ``income * (1 + hike / 100) ** year``. Each
+    delta is added to the base value of its deduction field (floored at 0).
+    Raises ``ValueError`` if a scenario's income is not finite or exceeds
+    ``INCOME_LIMIT``.
+    """
+    for name in deduction_deltas:
+        if name not in DEDUCTION_FIELDS:
+            raise ValueError(f"Unknown deduction field: {name}")
+    axes: Dict[str, np.ndarray] = {
+        "hike_percent": np.asarray(hike_percent, dtype=float),
+        "year": np.asarray(years, dtype=float),
+    }
+    for name, deltas in deduction_deltas.items():
+        axes[name] = np.asarray(deltas, dtype=float)
+    grids = np.meshgrid(*axes.values(), indexing="ij")
+    grid = {name: g.reshape(-1) for name, g in zip(axes, grids)}
+
+    with np.errstate(over="ignore"):
+        income = base["income"] * (1 + grid["hike_percent"] / 100) ** grid["year"]
+    # Results are returned as int64; anything beyond that would come back as garbage
+    if not np.all(np.abs(income) < INCOME_LIMIT):
+        raise ValueError("Simulated income is out of range; reduce the hike, years or base income")
+    deductions = {}
+    for name in DEDUCTION_FIELDS:
+        value = np.full_like(income, base[name])
+        if name in grid:
+            value = np.maximum(0.0, value + grid[name])
+        deductions[name] = value
+    # Same summation order as /calculate-tax
+    total_deductions = np.zeros_like(income)
+    for name in DEDUCTION_FIELDS:
+        total_deductions = total_deductions + deductions[name]
+
+    old_tax = old_regime_tax(income, total_deductions, fy)
+    new_tax = new_regime_tax(income, deductions["standard_deduction"], fy)
+
+    # Break-even depends only on the deductions, not on hike or year
+    breakeven: List[Dict[str, Any]] = []
+    for combo in itertools.product(*(axes[name].tolist() for name in deduction_deltas)):
+        delta = dict(zip(deduction_deltas, combo))
+        values = {name: max(0.0, base[name] + delta[name]) if name in delta else base[name]
+                  for name in DEDUCTION_FIELDS}
+        breakeven.append({
+            "deltas": delta,
+            "incomes": regime_breakeven_incomes(sum(values.values()), values["standard_deduction"], fy),
+        })
+
+    return {
+        "fy": fy,
+        "axes": {name: values.tolist() for name, values in axes.items()},
+        "shape": [len(values) for values in axes.values()],
+        "columns": {
+            "income": np.round(income).astype(np.int64).tolist(),
+            "old_regime_tax": old_tax.astype(np.int64).tolist(),
+            "new_regime_tax": new_tax.astype(np.int64).tolist(),
+            "savings": (old_tax - new_tax).astype(np.int64).tolist(),
+        },
+        "breakeven": breakeven,
+    }
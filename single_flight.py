@@ -0,0 +1,103 @@
+"""Coalescing of identical concurrent work.
+
+``SingleFlight.do(key, fn)`` runs ``fn`` once per key at a time: callers
+that arrive while it is running wait for that run and share its result (or
+its exception) instead of repeating the work. The run is a task of its own,
+so a caller that disconnects does not cancel it for the others.
+
+With a ``store`` the flight also spans workers: the first worker to take a
+short-lived ``flight:<key>`` lock in Redis runs ``fn``, and the others poll
+``lookup`` (where the leader leaves its result, e.g. the result cache) until
+the value shows up or the lock goes away, then fall back to running ``fn``
+themselves.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from cache import MISSING
+
+
+class SingleFlight:
+    """Shares one in-flight run of ``fn`` among concurrent callers of a key."""
+
+    def __init__(self, name: str, store: Any = None, lock_ttl: int = 30, poll_interval: float = 0.05):
+        self.name = name
+        self.store = store
+        self.lock_ttl = lock_ttl
+        self.poll_interval = poll_interval
+        self._flights: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.remote_coalesced = 0
+
+    @classmethod
+    def from_env(cls, name: str, store: Any) -> Optional["SingleFlight"]:
+        """Configure from TAXYNC_SINGLE_FLIGHT: ``local`` (the default)
+        coalesces within the worker, ``redis`` also across workers, ``off``
+        disables (None)."""
+        mode = os.getenv("TAXYNC_SINGLE_FLIGHT", "local").lower()
+        if mode == "off":
+            return None
+        return cls(name, store=store if mode == "redis" else None,
+                   lock_ttl=int(os.getenv("TAXYNC_SINGLE_FLIGHT_LOCK_TTL", "30")))
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]],
+                 lookup: Optional[Callable[[], Awaitable[Any]]] = None) -> Any:
+        """The result of ``fn()``, shared with concurrent callers of ``key``.
+
+        ``lookup`` returns the value another worker's run has published, or
+        ``MISSING``/None; without it the flight stays in this worker.
+        """
+        task = self._flights.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.leaders += 1
+            run = self._run_remote(key, fn, lookup) if self.store is not None and lookup is not None else fn()
+            task = self._flights[key] = asyncio.ensure_future(run)
+            task.add_done_callback(lambda done: self._finished(key, done))
+        return await asyncio.shield(task)
+
+    def _finished(self, key: str, task: asyncio.Task) -> None:
+        self._flights.pop(key, None)
+        if not task.cancelled():
+            # Retrieved here too, in case every caller went away
+            task.exception()
+
+    async def _run_remote(self, key: str, fn: Callable[[], Awaitable[Any]],
+                          lookup: Callable[[], Awaitable[Any]]) -> Any:
+        lock = f"flight:{self.name}:{key}"
+        try:
+            leader = await self.store.set(lock, str(os.getpid()), ex=self.lock_ttl, nx=True)
+        except Exception as e:
+            logging.warning(f"Single-flight lock failed, running locally: {e}")
+            return await fn()
+        if not leader:
+            deadline = time.monotonic() + self.lock_ttl
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.poll_interval)
+                # Lock first: a value published before the lock went away is still seen
+                running = await self.store.get(lock) is not None
+                value = await lookup()
+                if value is not MISSING and value is not None:
+                    self.remote_coalesced += 1
+                    return value
+                if not running:
+                    break
+            return await fn()
+        try:
+            return await fn()
+        finally:
+            await self.store.delete(lock)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._flights),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "remote_coalesced": self.remote_coalesced,
+            "across_workers": self.store is not None,
+        }
@@ -23,9 +23,39 @@ export interface CalculationData {
   timestamp: string;
 }
 
+export interface SimulationRange {
+  start: number;
+  stop?: number;
+  step?: number;
+}
+
+export interface SimulationRanges {
+  hikePercent?: SimulationRange;
+  years?: SimulationRange;
+  deductionDeltas?: Record<string, SimulationRange>;
+}
+
+export interface SimulationResult {
+  fy: string;
+  axes: Record<string, number[]>;
+  shape: number[];
+  columns: {
+    income: number[];
+    old_regime_tax: number[];
+    new_regime_tax: number[];
+    savings: number[];
+  };
+  breakeven: Array<{
+    deltas: Record<string, number>;
+    incomes: Array<{ income: number; cheaper_above: 'old' | 'new' }>;
+  }>;
+}
+
 export declare function calculateTax(formData: TaxFormData): Promise<TaxResult>;
+export declare function simulateTax(formData: TaxFormData, ranges?: SimulationRanges): Promise<SimulationResult>;
+export declare function simulationPoint(simulation: SimulationResult, indices: Record<string, number>): TaxResult & { income: number };
 export declare function getLastCalculation(): Promise<CalculationData | null>;
-export declare function exportPDF(formData: TaxFormData, result: TaxResult, chartImage?: string): Promise<void>;
+export declare function exportPDF(formData: TaxFormData, result: TaxResult, chartType?: 'bar' | 'pie' | 'none'): Promise<void>;
 export declare function exportExcel(formData: TaxFormData, result: TaxResult): Promise<void>;
 
 export declare function createShareableLink(formData: TaxFormData, result: TaxResult): Promise<string>;
@@ -56,23 +56,19 @@ export const calculateTax = async (formData) => {
   }
 };
 
-// Get last calculation (try backend first, fallback to localStorage)
-export const getLastCalculation = async () => {
-  // Use localStorage only; backend route is not implemented
-  const stored = localStorage.getItem('lastTaxCalculation');
-  return stored ? JSON.parse(stored) : null;
-};
-
-// Export PDF report
-export const exportPDF = async (formData, taxResult, chartImage) => {
+// Tax a whole grid of what-if scenarios in one request.
+// ranges: { hikePercent, years, deductionDeltas } where each range is
+// { start, stop, step } and deductionDeltas maps a backend field name
+// (e.g. section80C) to a range of changes to the base amount.
+export const simulateTax = async (formData, ranges = {}) => {
   try {
-    const response = await fetch(`${API_BASE_URL}/export/pdf`, {
+    const response = await fetch(`${API_BASE_URL}/simulate`, {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
       },
       body: JSON.stringify({
-        formData: {
+        base: {
           income: formData.income,
           section80C: formData.section80C,
           section80D: formData.section80D,
@@ -82,25 +78,109 @@ export const exportPDF = async (formData, taxResult, chartImage) => {
           edu_loan_interest: formData.educationLoan,
           donations: formData.donations
         },
-        taxResult: taxResult,
-        chartImage: chartImage
+        hike_percent: ranges.hikePercent,
+        years: ranges.years,
+        deduction_deltas: ranges.deductionDeltas || {}
       })
     });
-
     if (!response.ok) {
-      throw new Error(`HTTP error! status: ${response.status}`);
+      const error = await response.json();
+      throw new Error(error.detail || 'Failed to run the simulation.');
     }
+    return await response.json();
+  } catch (error) {
+    console.error('Simulate tax error:', error);
+    throw error;
+  }
+};
+
+// Row of a simulation grid at the given axis indices, e.g. { hike_percent: 3, year: 0 }
+export const simulationPoint = (simulation, indices) => {
+  const names = Object.keys(simulation.axes);
+  let offset = 0;
+  names.forEach((name, i) => {
+    offset = offset * simulation.shape[i] + (indices[name] || 0);
+  });
+  return {
+    income: simulation.columns.income[offset],
+    old_regime_tax: simulation.columns.old_regime_tax[offset],
+    new_regime_tax: simulation.columns.new_regime_tax[offset],
+    savings: simulation.columns.savings[offset],
+  };
+};
+
+// Get last calculation (try backend first, fallback to localStorage)
+export const getLastCalculation = async () => {
+  // Use localStorage only; backend route is not implemented
+  const stored = localStorage.getItem('lastTaxCalculation');
+  return stored ? JSON.parse(stored) : null;
+};
+
+// Last download per export format, reused when the server answers 304
+const exportDownloads = new Map();
+
+const exportFormData = (formData) => ({
+  income: formData.income,
+  section80C: formData.section80C,
+  section80D: formData.section80D,
+  hra: formData.hra,
+  home_loan_interest: formData.homeLoanInterest,
+  standard_deduction: formData.standardDeduction,
+  edu_loan_interest: formData.educationLoan,
+  donations: formData.donations
+});
+
+// POST an export and return its blob. Exports are content-addressed: the
+// ETag identifies the exact report, so re-exporting the same report sends
+// If-None-Match and gets a 304 instead of a fresh download.
+const fetchExport = async (path, body) => {
+  const previous = exportDownloads.get(path);
+  const headers = { 'Content-Type': 'application/json' };
+  if (previous) {
+    headers['If-None-Match'] = previous.etag;
+  }
+  const response = await fetch(`${API_BASE_URL}${path}`, {
+    method: 'POST',
+    headers,
+    body: JSON.stringify(body)
+  });
+
+  if (response.status === 304 && previous) {
+    return previous.blob;
+  }
+  if (!response.ok) {
+    throw new Error(`HTTP error! status: ${response.status}`);
+  }
+
+  const blob = await response.blob();
+  const etag = response.headers.get('ETag');
+  if (etag) {
+    exportDownloads.set(path, { etag, blob });
+  }
+  return blob;
+};
+
+const downloadBlob = (blob, filename) => {
+  const url = window.URL.createObjectURL(blob);
+  const a = document.createElement('a');
+  a.style.display = 'none';
+  a.href = url;
+  a.download = filename;
+  document.body.appendChild(a);
+  a.click();
+  window.URL.revokeObjectURL(url);
+  document.body.removeChild(a);
+};
 
-    const blob = await response.blob();
-    const url = window.URL.createObjectURL(blob);
-    const a = document.createElement('a');
-    a.style.display = 'none';
-    a.href = url;
-    a.download = 'tax-comparison-report.pdf';
-    document.body.appendChild(a);
-    a.click();
-    window.URL.revokeObjectURL(url);
-    document.body.removeChild(a);
+// Export PDF report; the server draws a 'bar' or 'pie' chart from taxResult
+export const exportPDF = async (formData, taxResult, chartType = 'bar') => {
+  try {
+    const blob = await fetchExport('/export/pdf', {
+      formData: exportFormData(formData),
+      taxResult: taxResult,
+      chartType: chartType
+    });
+    downloadBlob(blob, 'tax-comparison-report.pdf');
   } catch (error) {
     console.error('Export PDF error:', error);
     throw error;
@@ -110,40 +190,11 @@ export const exportPDF = async (formData, taxResult, chartImage) => {
 // Export Excel report
 export const exportExcel = async (formData, taxResult) => {
   try {
-    const response = await fetch(`${API_BASE_URL}/export/excel`, {
-      method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-      },
-      body: JSON.stringify({
-        formData: {
-          income: formData.income,
-          section80C: formData.section80C,
-          section80D: formData.section80D,
-          hra: formData.hra,
-          home_loan_interest: formData.homeLoanInterest,
-          standard_deduction: formData.standardDeduction,
-          edu_loan_interest: formData.educationLoan,
-          donations: formData.donations
-        },
-        taxResult: taxResult
-      })
+    const blob = await fetchExport('/export/excel', {
+      formData: exportFormData(formData),
+      taxResult: taxResult
     });
-
-    if (!response.ok) {
-      throw new Error(`HTTP error! status: ${response.status}`);
-    }
-
-    const blob = await response.blob();
-    const url = window.URL.createObjectURL(blob);
-    const a = document.createElement('a');
-    a.style.display = 'none';
-    a.href = url;
-    a.download = 'tax-comparison-report.xlsx';
-    document.body.appendChild(a);
-    a.click();
-    window.URL.revokeObjectURL(url);
-    document.body.removeChild(a);
+    downloadBlob(blob, 'tax-comparison-report.xlsx');
   } catch (error) {
     console.error('Export Excel error:', error);
     throw error;
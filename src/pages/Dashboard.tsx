@@ -23,7 +23,8 @@ import {
   Share2,
   
 } from 'lucide-react';
-import { calculateTax as apiCalculateTax, createShareableLink } from '../api';
+import { calculateTax as apiCalculateTax, createShareableLink, simulateTax, simulationPoint } from '../api';
+import type { SimulationResult } from '../api';
 import { PieChart as RechartsPie, BarChart as RechartsBar, LineChart as RechartsLine, AreaChart as RechartsArea, Cell, XAxis, YAxis, CartesianGrid, Tooltip as RechartsTooltip, Legend as RechartsLegend, ResponsiveContainer, Bar, Pie, Line, Area } from 'recharts';
 import { LottieAnimation } from '../components/LottieAnimation';
 import dashboardAnimation from '../assets/dashboard-animation.json';
@@ -61,6 +62,9 @@ export function Dashboard() {
   const [future80C, setFuture80C] = useState(0);
   const [future80D, setFuture80D] = useState(0);
   const [simulationResult, setSimulationResult] = useState<TaxResult | null>(null);
+  // Whole what-if grid (every hike % for next year), fetched once per input change
+  const [simulationGrid, setSimulationGrid] = useState<SimulationResult | null>(null);
+  const [projection, setProjection] = useState<SimulationResult | null>(null);
 
   const [formData, setFormData] = useState<TaxFormData>({
     income: 1200000,
@@ -89,32 +93,17 @@ export function Dashboard() {
   ];
 
 
-  const handleCalculateTax = async (isSimulation = false) => {
+  const handleCalculateTax = async () => {
     setIsCalculating(true);
-    if (!isSimulation) {
-      setTaxResult(null); // Clear previous results to show loading state
-    }
+    setTaxResult(null); // Clear previous results to show loading state
     setError(null);
 
-    const payload = isSimulation
-      ? {
-          ...formData,
-          income: formData.income * (1 + salaryHike / 100),
-          section80C: future80C > 0 ? future80C : formData.section80C,
-          section80D: future80D > 0 ? future80D : formData.section80D,
-        }
-      : { ...formData };
+    const payload = { ...formData };
 
     try {
       // Step 1: Get core tax calculation results immediately.
       const result = await apiCalculateTax(payload);
 
-      if (isSimulation) {
-        setSimulationResult(result);
-        setIsCalculating(false);
-        return;
-      }
-
       // Step 2: Display core results instantly.
       setTaxResult(result);
       setIsCalculating(false); // Stop main loader
@@ -136,11 +125,49 @@ export function Dashboard() {
     }
   };
 
+  const runSimulation = async () => {
+    setError(null);
+    try {
+      // One request covers every position of the salary hike slider
+      const grid = await simulateTax(
+        {
+          ...formData,
+          section80C: future80C > 0 ? future80C : formData.section80C,
+          section80D: future80D > 0 ? future80D : formData.section80D,
+        },
+        { hikePercent: { start: 0, stop: 50, step: 1 }, years: { start: 1 } }
+      );
+      setSimulationGrid(grid);
+    } catch (error) {
+      console.error('Tax simulation failed:', error);
+      setError(error instanceof Error ? error.message : 'Failed to run the simulation.');
+    }
+  };
+
   useEffect(() => {
     if (isSimulating) {
-      handleCalculateTax(true);
+      runSimulation();
+    }
+  }, [isSimulating, formData, future80C, future80D]);
+
+  useEffect(() => {
+    if (simulationGrid) {
+      setSimulationResult(simulationPoint(simulationGrid, { hike_percent: salaryHike }));
+    }
+  }, [simulationGrid, salaryHike]);
+
+  useEffect(() => {
+    if (!taxResult || !formData.income) {
+      setProjection(null);
+      return;
     }
-  }, [isSimulating, salaryHike, formData, future80C, future80D]);
+    simulateTax(formData, { hikePercent: { start: growthRate || 0 }, years: { start: 1, stop: 5 } })
+      .then(setProjection)
+      .catch((error) => {
+        console.error('Tax projection failed:', error);
+        setProjection(null);
+      });
+  }, [taxResult, formData, growthRate]);
 
 
   // Helper: share via best available method (Web Share API > Clipboard > Legacy copy)
@@ -307,10 +334,16 @@ export function Dashboard() {
         { year: year + 5, oldRegime: 0, newRegime: 0 },
       ];
     }
+    const year = new Date().getFullYear();
+    if (projection) {
+      return projection.axes.year.map((offset, i) => {
+        const point = simulationPoint(projection, { year: i });
+        return { year: year + offset, oldRegime: point.old_regime_tax, newRegime: point.new_regime_tax };
+      });
+    }
     const baseIncome = formData.income || 0;
     const baseOldTax = taxResult?.old_regime_tax || 0;
     const baseNewTax = taxResult?.new_regime_tax || 0;
-    const year = new Date().getFullYear();
     const data = [] as Array<{ year: number; oldRegime: number; newRegime: number }>;
     for (let i = 1; i <= 5; i++) {
       const projectedIncome = baseIncome * Math.pow(1 + (growthRate || 0) / 100, i);
@@ -608,7 +641,7 @@ export function Dashboard() {
           {/* Tax Results Cards - Always Visible */}
           <div className="mt-8 flex justify-center items-center gap-4">
             <motion.button
-              onClick={() => handleCalculateTax(false)}
+              onClick={() => handleCalculateTax()}
               disabled={isCalculating}
               whileHover={{ scale: 1.02 }}
               whileTap={{ scale: 0.98 }}
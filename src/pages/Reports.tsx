@@ -1,4 +1,4 @@
-import { useState, useEffect, useRef } from 'react';
+import { useState, useEffect } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
 import { 
   FileText, 
@@ -36,8 +36,6 @@ ChartJS.register(
 );
 
 export function Reports() {
-  const pieChartRef = useRef<ChartJS<'pie', number[], string>>(null);
-  const barChartRef = useRef<ChartJS<'bar', number[], string>>(null);
   const [chartType, setChartType] = useState<'pie' | 'bar'>('pie');
   const [isLoadingPDF, setIsLoadingPDF] = useState(false);
   const [isLoadingExcel, setIsLoadingExcel] = useState(false);
@@ -87,9 +85,8 @@ export function Reports() {
     
     setIsLoadingPDF(true);
     try {
-            const chartRef = chartType === 'pie' ? pieChartRef : barChartRef;
-      const chartImage = chartRef.current?.toBase64Image();
-      await exportPDF(calculationData.formData, calculationData.result, chartImage);
+      // The server draws the selected chart as vector graphics in the PDF
+      await exportPDF(calculationData.formData, calculationData.result, chartType);
       setShowSuccess(true);
       setTimeout(() => setShowSuccess(false), 3000); 
     } catch (error) {
@@ -314,9 +311,9 @@ export function Reports() {
           </div>
           <div className="h-80">
             {chartType === 'pie' ? (
-              <Pie ref={pieChartRef} data={pieData} options={chartOptions} />
+              <Pie data={pieData} options={chartOptions} />
             ) : (
-              <Bar ref={barChartRef} data={barData} options={chartOptions} />
+              <Bar data={barData} options={chartOptions} />
             )}
           </div>
         </motion.div>
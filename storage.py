@@ -0,0 +1,244 @@
+"""Async key-value storage: pooled Redis with an in-memory fallback.
+
+``Storage`` talks to Redis through ``redis.asyncio`` with a bounded
+connection pool and short timeouts, so Redis round-trips never block the
+event loop. Connections are made lazily on first use. When Redis is
+unreachable the store marks it down for ``retry_interval`` seconds and serves
+reads and writes from a process-local ``MemoryStore`` in the meantime.
+"""
+import asyncio
+import logging
+import os
+import socket
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence, Union
+
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError, ResponseError
+
+from metrics import STORE_ERRORS, STORE_OP_LATENCY
+
+Value = Union[bytes, str]
+
+
+def _to_bytes(value: Value) -> bytes:
+    return value.encode() if isinstance(value, str) else bytes(value)
+
+
+class MemoryStore:
+    """Process-local store with Redis-like expiry semantics."""
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def _live(self, key: str) -> Optional[tuple]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at = entry[1]
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return entry
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._live(key)
+        return entry[0] if entry else None
+
+    async def set(self, key: str, value: Value, ex: Optional[int] = None, nx: bool = False) -> Optional[bool]:
+        if nx and self._live(key) is not None:
+            return None
+        expires_at = time.monotonic() + ex if ex else None
+        self._data[key] = (_to_bytes(value), expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        return True
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    async def ttl(self, key: str) -> int:
+        entry = self._live(key)
+        if entry is None:
+            return -2
+        if entry[1] is None:
+            return -1
+        return max(0, int(entry[1] - time.monotonic()))
+
+    async def expire(self, key: str, ex: int) -> None:
+        entry = self._live(key)
+        if entry is not None:
+            self._data[key] = (entry[0], time.monotonic() + ex)
+
+
+class Storage:
+    """Redis-backed store that degrades to ``MemoryStore`` while Redis is down."""
+
+    def __init__(
+        self,
+        url: Optional[str] = "redis://localhost:6379/0",
+        max_connections: int = 50,
+        socket_timeout: float = 0.5,
+        connect_timeout: float = 0.5,
+        retry_interval: float = 5.0,
+        fallback: Optional[MemoryStore] = None,
+    ):
+        self.url = url
+        self.max_connections = max_connections
+        self.socket_timeout = socket_timeout
+        self.connect_timeout = connect_timeout
+        self.retry_interval = retry_interval
+        self.fallback = fallback or MemoryStore()
+        self._client: Optional[aioredis.Redis] = None
+        self._scripts: Dict[str, Any] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._down_until = 0.0
+        self.errors = 0
+        self.fallback_ops = 0
+
+    @classmethod
+    def from_env(cls) -> "Storage":
+        """Configure from REDIS_URL (empty disables Redis), REDIS_MAX_CONNECTIONS,
+        REDIS_SOCKET_TIMEOUT, REDIS_CONNECT_TIMEOUT and REDIS_RETRY_INTERVAL."""
+        return cls(
+            url=os.getenv("REDIS_URL", "redis://localhost:6379/0") or None,
+            max_connections=int(os.getenv("REDIS_MAX_CONNECTIONS", "50")),
+            socket_timeout=float(os.getenv("REDIS_SOCKET_TIMEOUT", "0.5")),
+            connect_timeout=float(os.getenv("REDIS_CONNECT_TIMEOUT", "0.5")),
+            retry_interval=float(os.getenv("REDIS_RETRY_INTERVAL", "5")),
+        )
+
+    @property
+    def redis_available(self) -> bool:
+        """False while Redis is disabled or marked down after a failure."""
+        return self.url is not None and time.monotonic() >= self._down_until
+
+    def _redis(self) -> Optional[aioredis.Redis]:
+        if not self.redis_available:
+            return None
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            # Pooled connections are bound to the loop that created them
+            if self._client is not None:
+                self._retire(self._client, self._loop)
+            pool = aioredis.ConnectionPool.from_url(
+                self.url,
+                max_connections=self.max_connections,
+                socket_timeout=self.socket_timeout,
+                socket_connect_timeout=self.connect_timeout,
+            )
+            self._client = aioredis.Redis(connection_pool=pool)
+            self._loop = loop
+        return self._client
+
+    @staticmethod
+    def _retire(client: aioredis.Redis, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        """Close a client left behind by an earlier event loop."""
+        if loop is not None and loop.is_running():
+            # Still running in another thread: close it there
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+            return
+        # Its transports can only be closed through their stopped loop, so end
+        # the connections at the socket; Redis frees them now rather than when
+        # the client is garbage collected
+        pool = client.connection_pool
+        for connection in (*pool._available_connections, *pool._in_use_connections):
+            writer = getattr(connection, "_writer", None)
+            sock = writer.get_extra_info("socket") if writer is not None else None
+            if sock is not None:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+    def _mark_down(self, op: str, error: Exception) -> None:
+        self.errors += 1
+        self._down_until = time.monotonic() + self.retry_interval
+        logging.warning(f"Redis {op} failed, using in-memory store for {self.retry_interval:.0f}s: {error}")
+
+    async def _call(self, op: str, *args, **kwargs) -> Any:
+        started = time.perf_counter()
+        client = self._redis()
+        if client is None:
+            self.fallback_ops += 1
+            result = await getattr(self.fallback, op)(*args, **kwargs)
+            STORE_OP_LATENCY.observe(time.perf_counter() - started, op, "memory")
+            return result
+        try:
+            result = await getattr(client, op)(*args, **kwargs)
+            STORE_OP_LATENCY.observe(time.perf_counter() - started, op, "redis")
+            return result
+        except (RedisError, OSError, asyncio.TimeoutError) as e:
+            STORE_ERRORS.inc(op)
+            self._mark_down(op, e)
+            self.fallback_ops += 1
+            return await getattr(self.fallback, op)(*args, **kwargs)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = await self._call("get", key)
+        if value is None and self.redis_available:
+            # Entries written while Redis was down live in the fallback
+            value = await self.fallback.get(key)
+        return value
+
+    async def set(self, key: str, value: Value, ex: Optional[int] = None, nx: bool = False) -> bool:
+        """Store ``value``; with ``nx`` only if ``key`` is absent. True if it was stored."""
+        return bool(await self._call("set", key, value, ex=ex, nx=nx))
+
+    async def delete(self, key: str) -> None:
+        await self._call("delete", key)
+        await self.fallback.delete(key)
+
+    async def ttl(self, key: str) -> int:
+        remaining = await self._call("ttl", key)
+        if remaining == -2 and self.redis_available:
+            remaining = await self.fallback.ttl(key)
+        return remaining
+
+    async def expire(self, key: str, ex: int) -> None:
+        await self._call("expire", key, ex)
+
+    async def eval(self, script: str, keys: Sequence[str], args: Sequence[Any]) -> Any:
+        """Run a Lua script on Redis (by SHA once loaded); None while Redis
+        is unavailable or rejects the script, so callers keep local state."""
+        client = self._redis()
+        if client is None:
+            return None
+        started = time.perf_counter()
+        compiled = self._scripts.get(script)
+        if compiled is None or compiled.registered_client is not client:
+            compiled = self._scripts[script] = client.register_script(script)
+        try:
+            result = await compiled(keys=list(keys), args=list(args))
+        except ResponseError as e:
+            STORE_ERRORS.inc("eval")
+            logging.warning(f"Redis script failed: {e}")
+            return None
+        except (RedisError, OSError, asyncio.TimeoutError) as e:
+            STORE_ERRORS.inc("eval")
+            self._mark_down("eval", e)
+            return None
+        STORE_OP_LATENCY.observe(time.perf_counter() - started, "eval", "redis")
+        return result
+
+    async def close(self) -> None:
+        if self._client is not None:
+            if self._loop is not asyncio.get_running_loop():
+                self._retire(self._client, self._loop)
+            else:
+                try:
+                    await self._client.aclose()
+                except Exception:
+                    pass
+            self._client = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "redis_enabled": self.url is not None,
+            "redis_available": self.redis_available,
+            "errors": self.errors,
+            "fallback_ops": self.fallback_ops,
+        }
@@ -0,0 +1,153 @@
+"""Vectorized tax engine for columnar batches of tax calculation requests.
+
+Computes the same figures as the scalar calculators in ``main.py`` for a
+whole batch at once: slab tax is evaluated with the compiled rule tables
+from ``tax_rules`` and ``np.searchsorted``, so each column is a handful of
+array ops regardless of batch size.
+"""
+from typing import Dict, List, Mapping, Tuple
+
+import numpy as np
+
+from tax_rules import DEFAULT_FY, deduction_caps, get_regime
+
+# Request fields and their defaults, in the order the deductions are summed
+# by /calculate-tax (income is required and has no default).
+REQUEST_FIELDS: Tuple[Tuple[str, float], ...] = (
+    ("income", None),
+    ("section80C", 0.0),
+    ("section80D", 0.0),
+    ("hra", 0.0),
+    ("home_loan_interest", 0.0),
+    ("standard_deduction", 50000.0),
+    ("edu_loan_interest", 0.0),
+    ("donations", 0.0),
+)
+DEDUCTION_FIELDS = tuple(name for name, _ in REQUEST_FIELDS if name != "income")
+
+# Amounts must stay below this so taxes and savings fit the int64 results.
+AMOUNT_LIMIT = 1e18
+
+# Smart Tax Advisor heads: (name, request field or None, deduction cap, minimum income)
+ADVISOR_HEADS = (
+    ("section80C", "section80C", "section80C", None),
+    ("section80D", "section80D", "section80D", None),
+    ("home_loan_interest", "home_loan_interest", "section24b", None),
+    ("nps", None, "section80CCD_1B", 750000),
+)
+
+
+def old_regime_tax(income, total_deductions, fy: str = DEFAULT_FY) -> np.ndarray:
+    """Vectorized ``calculate_old_regime_tax``."""
+    taxable = np.maximum(0, np.asarray(income, dtype=float) - np.asarray(total_deductions, dtype=float))
+    return get_regime(fy, "old").tax_array(taxable)
+
+
+def new_regime_tax(income, standard_deduction=50000.0, fy: str = DEFAULT_FY) -> np.ndarray:
+    """Vectorized ``calculate_new_regime_tax``."""
+    taxable = np.maximum(0.0, np.asarray(income, dtype=float) - np.asarray(standard_deduction, dtype=float))
+    return get_regime(fy, "new").tax_array(taxable)
+
+
+def to_columns(data) -> Dict[str, np.ndarray]:
+    """Normalize a mapping of columns (or a pandas DataFrame) to float arrays.
+
+    Missing deduction columns take the request defaults. Raises ``ValueError``
+    naming the offending field and row for missing, non-numeric, non-finite
+    or out-of-range (``AMOUNT_LIMIT``) values.
+    """
+    if "income" not in data:
+        raise ValueError("Missing required field: income")
+    columns = {}
+    for name, default in REQUEST_FIELDS:
+        if name in data:
+            try:
+                col = np.asarray(data[name], dtype=float).reshape(-1)
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid numeric value for {name}")
+            if name != "income" and col.shape != columns["income"].shape:
+                raise ValueError(f"Column {name} has {col.size} values, expected {columns['income'].size}")
+        else:
+            col = np.full(columns["income"].shape, default, dtype=float)
+        bad = np.flatnonzero(~np.isfinite(col))
+        if bad.size:
+            raise ValueError(f"Invalid numeric value for {name} at row {int(bad[0])}")
+        bad = np.flatnonzero(np.abs(col) >= AMOUNT_LIMIT)
+        if bad.size:
+            raise ValueError(f"Value out of range for {name} at row {int(bad[0])}")
+        columns[name] = col
+    return columns
+
+
+def records_to_columns(records: List[Mapping]) -> Dict[str, np.ndarray]:
+    """Build request columns from a list of row objects, preserving order."""
+    data = {}
+    for name, default in REQUEST_FIELDS:
+        values = []
+        for i, row in enumerate(records):
+            if not isinstance(row, Mapping):
+                raise ValueError(f"Row {i} is not an object")
+            value = row.get(name, default)
+            if value is None:
+                raise ValueError(f"Missing required field: {name} at row {i}")
+            values.append(value)
+        data[name] = values
+    return to_columns(data)
+
+
+def calculate_batch(data, fy: str = DEFAULT_FY) -> Dict[str, np.ndarray]:
+    """Compute old/new regime tax, savings and advisor savings for a batch.
+
+    ``data`` is a mapping of request field name to array-like column, or a
+    pandas DataFrame, taxed under the rules of financial year ``fy``.
+    Results are arrays in input order; each advisor head reports 0 where
+    ``/calculate-tax`` would not make that suggestion.
+    """
+    columns = to_columns(data)
+    income = columns["income"]
+
+    # Same summation order as sum(deductions.values()) in /calculate-tax
+    total_deductions = np.zeros_like(income)
+    for name in DEDUCTION_FIELDS:
+        total_deductions = total_deductions + columns[name]
+
+    old_tax = old_regime_tax(income, total_deductions, fy)
+    new_tax = new_regime_tax(income, columns["standard_deduction"], fy)
+
+    caps = deduction_caps(fy)
+    suggestion_savings = {}
+    for head, field, cap_name, min_income in ADVISOR_HEADS:
+        cap = caps[cap_name]
+        if field is None:
+            amount = np.full_like(income, cap)
+            eligible = income > min_income
+        else:
+            amount = cap - columns[field]
+            eligible = columns[field] < cap
+        saving = np.maximum(0, old_tax - old_regime_tax(income, total_deductions + amount, fy))
+        suggestion_savings[head] = np.where(eligible, saving, 0.0)
+
+    return {
+        "old_regime_tax": old_tax,
+        "new_regime_tax": new_tax,
+        "savings": old_tax - new_tax,
+        "suggestion_savings": suggestion_savings,
+    }
+
+
+def batch_to_records(result: Dict[str, np.ndarray]) -> List[dict]:
+    """Convert ``calculate_batch`` output into per-row response objects."""
+    old_tax = np.round(result["old_regime_tax"]).astype(np.int64).tolist()
+    new_tax = np.round(result["new_regime_tax"]).astype(np.int64).tolist()
+    savings = np.round(result["savings"]).astype(np.int64).tolist()
+    heads = list(result["suggestion_savings"])
+    head_values = [np.round(result["suggestion_savings"][h]).astype(np.int64).tolist() for h in heads]
+    return [
+        {
+            "old_regime_tax": old_tax[i],
+            "new_regime_tax": new_tax[i],
+            "savings": savings[i],
+            "suggestion_savings": {h: values[i] for h, values in zip(heads, head_values)},
+        }
+        for i in range(len(old_tax))
+    ]
@@ -0,0 +1,111 @@
+"""Precomputed tax lookup tables, memory-mapped from ``.npy`` files.
+
+Tax depends on a regime's rules and the taxable income alone, so one 1-D
+table per (FY, regime) over a grid of taxable incomes answers every
+(income, deductions) pair on that grid, for the regime comparison and for
+every advisor "what if I invest X more" evaluation alike. Round incomes
+and deductions (almost all traffic) land on the grid and become an O(1)
+array read; anything else falls back to the live calculation.
+
+Tables are built ahead of time::
+
+    python tax_index.py build --dir build/tax-index [--fy 2025-26] [--step 100] [--max 10000000]
+
+and enabled by pointing ``TAXYNC_TAX_INDEX_DIR`` at that directory. The
+file name carries the rule file's fingerprint, so a table built from other
+slabs is never even opened, and each table is spot-checked against the live
+calculation when it is attached.
+"""
+import argparse
+import os
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from tax_rules import REGIMES, CompiledRegime, available_years, get_regime
+
+DEFAULT_STEP = 100
+DEFAULT_MAX_TAXABLE = 10_000_000
+# Grid points checked against the live calculation when a table is attached
+SPOT_CHECKS = 64
+
+
+def index_filename(regime: CompiledRegime, step: int) -> str:
+    return f"tax-fy{regime.fy}-{regime.regime}-{regime.fingerprint}-step{step}.npy"
+
+
+def build_table(regime: CompiledRegime, step: int, max_taxable: int) -> np.ndarray:
+    """Final tax at taxable incomes ``0, step, ..., max_taxable``, computed
+    with the scalar path so lookups are exactly what it would return."""
+    return np.array([round(regime.raw_tax(float(t))) for t in range(0, max_taxable + 1, step)], dtype=np.int64)
+
+
+def write_index(directory: str, fy: str, step: int = DEFAULT_STEP, max_taxable: int = DEFAULT_MAX_TAXABLE) -> List[Path]:
+    """Build and write the tables of every regime in ``fy``."""
+    out = Path(directory)
+    out.mkdir(parents=True, exist_ok=True)
+    written = []
+    for name in REGIMES:
+        regime = get_regime(fy, name)
+        path = out / index_filename(regime, step)
+        tmp = path.with_suffix(".tmp.npy")
+        np.save(tmp, build_table(regime, step, max_taxable))
+        os.replace(tmp, path)
+        written.append(path)
+    return written
+
+
+def _spot_check(regime: CompiledRegime, table, step: int) -> bool:
+    n = len(table)
+    points = {0, n - 1}
+    points.update(int(b // step) for b in regime.breakpoints() if b // step < n)
+    points.update(np.linspace(0, n - 1, SPOT_CHECKS).astype(int).tolist())
+    return all(table[i] == round(regime.raw_tax(float(i * step))) for i in points)
+
+
+def attach(regime: CompiledRegime, directory: str) -> bool:
+    """Memory-map this regime's table from ``directory`` if one matches its
+    current rules, and make ``regime.tax`` use it."""
+    pattern = f"tax-fy{regime.fy}-{regime.regime}-{regime.fingerprint}-step*.npy"
+    for path in sorted(Path(directory).glob(pattern)):
+        step = int(path.stem.rsplit("-step", 1)[1])
+        table = np.load(path, mmap_mode="r")
+        if table.dtype != np.int64 or table.ndim != 1 or not len(table) or not _spot_check(regime, table, step):
+            continue
+        # Indexing a memoryview yields Python ints, without numpy scalars
+        regime.use_index(memoryview(table), step)
+        return True
+    return False
+
+
+def index_stats(fy: str) -> List[dict]:
+    stats = []
+    for name in REGIMES:
+        regime = get_regime(fy, name)
+        table: Optional[memoryview] = regime.index
+        stats.append({
+            "fy": fy,
+            "regime": name,
+            "attached": table is not None,
+            "step": regime.index_step,
+            "max_taxable": (len(table) - 1) * regime.index_step if table is not None else None,
+        })
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build precomputed tax lookup tables.")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--dir", required=True, help="output directory (then set TAXYNC_TAX_INDEX_DIR to it)")
+    parser.add_argument("--fy", action="append", help="financial year(s); default: all")
+    parser.add_argument("--step", type=int, default=DEFAULT_STEP)
+    parser.add_argument("--max", type=int, default=DEFAULT_MAX_TAXABLE, help="largest taxable income in the table")
+    args = parser.parse_args()
+    for fy in args.fy or available_years():
+        for path in write_index(args.dir, fy, args.step, args.max):
+            print(f"{path} ({path.stat().st_size // 1024} KiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Smart Tax Advisor: closed-form deduction advice from the compiled rule tables.
+
+Tax is piecewise linear in taxable income, so the saving from any extra
+deduction, the smallest deduction that still earns it, and the deduction at
+which the old regime overtakes the new one can all be read off the slab
+breakpoints of ``tax_rules.CompiledRegime`` in O(number of slabs), without
+re-running the calculator for every candidate amount.
+"""
+import math
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping
+
+from tax_engine import ADVISOR_HEADS, DEDUCTION_FIELDS
+from tax_rules import DEFAULT_FY, CompiledRegime, deduction_caps, get_regime
+
+HEAD_SECTIONS = {
+    "section80C": "80C",
+    "section80D": "80D",
+    "home_loan_interest": "24b",
+    "nps": "80CCD(1B)",
+}
+
+
+def max_taxable_for_slab_tax(regime: CompiledRegime, amount: float) -> float:
+    """Largest taxable income whose slab tax does not exceed ``amount``."""
+    for i in range(len(regime.lower) - 1, -1, -1):
+        if regime.base[i] <= amount:
+            if regime.rates[i] == 0:
+                return math.inf if i == len(regime.lower) - 1 else regime.lower[i + 1]
+            return regime.lower[i] + (amount - regime.base[i]) / regime.rates[i]
+    return 0.0
+
+
+def max_taxable_for_tax(regime: CompiledRegime, target: float) -> float:
+    """Largest whole-rupee taxable income taxed at most ``target`` in total.
+
+    Inverts rebate, surcharge and cess band by band, then settles the last
+    rupee against ``regime.tax`` so rounding is accounted for exactly.
+    """
+    if target < 0:
+        return 0.0
+    # Anything below target + 0.5 still rounds to at most target
+    limit = target + 0.5
+    # Surcharge bands, highest first: (lower bound exclusive, upper bound, multiplier)
+    bounds = [0.0] + regime.surcharge_thresholds
+    multipliers = [1.0] + [1 + r for r in regime.surcharge_rates]
+    best = 0.0
+    for j in range(len(bounds) - 1, -1, -1):
+        upper = bounds[j + 1] if j + 1 < len(bounds) else math.inf
+        t = min(upper, max_taxable_for_slab_tax(regime, limit / (multipliers[j] * regime.cess_multiplier)))
+        if t > bounds[j] or j == 0:
+            best = t
+            break
+    if regime.rebate_limit is not None:
+        if regime.rebate_max is None:
+            rebated = regime.rebate_limit
+        else:
+            rebated = min(regime.rebate_limit,
+                          max_taxable_for_slab_tax(regime, limit / regime.cess_multiplier + regime.rebate_max))
+        best = max(best, rebated)
+    if math.isinf(best):
+        return best
+    t = math.floor(best)
+    while t > 0 and regime.tax(t) > target:
+        t -= 1
+    while regime.tax(t + 1) <= target:
+        t += 1
+    return float(t)
+
+
+@lru_cache(maxsize=None)
+def zero_tax_ceiling(regime: CompiledRegime) -> float:
+    """Largest taxable income that pays no tax; deductions below it are wasted."""
+    return max_taxable_for_tax(regime, 0)
+
+
+def optimize(request: Mapping[str, float], fy: str = DEFAULT_FY) -> Dict[str, Any]:
+    """Advise on the deduction heads still open to a /calculate-tax request.
+
+    Returns the old/new regime tax, one entry per advisor head (in the
+    advisor's order, with the saving from filling that head alone, as the
+    suggestions have always been phrased), the heads ranked by saving, a
+    combined plan that allocates only the deductions that still reduce tax,
+    and the extra deduction at which the old regime becomes the cheaper one.
+    """
+    old = get_regime(fy, "old")
+    new = get_regime(fy, "new")
+    caps = deduction_caps(fy)
+    income = request["income"]
+    claimed = sum(request[name] for name in DEDUCTION_FIELDS)
+    taxable = max(0, income - claimed)
+    old_tax = old.tax(taxable)
+    new_tax = new.tax(max(0.0, float(income) - float(request["standard_deduction"])))
+    ceiling = zero_tax_ceiling(old)
+
+    heads: List[Dict[str, Any]] = []
+    for head, field, cap_name, min_income in ADVISOR_HEADS:
+        cap = caps[cap_name]
+        if field is None:
+            room = cap if income > min_income else 0
+        else:
+            room = cap - request[field] if request[field] < cap else 0
+        saving = max(0, old_tax - old.tax(max(0, income - (claimed + room)))) if room else 0
+        # Past the zero-tax ceiling extra deductions save nothing more
+        useful = min(room, max(0, taxable - ceiling))
+        heads.append({
+            "head": head,
+            "section": HEAD_SECTIONS[head],
+            "room": room,
+            "amount": useful,
+            "saving": saving,
+            "saving_per_rupee": round(saving / useful, 4) if useful else 0.0,
+        })
+
+    ranked = sorted((h for h in heads if h["saving"] > 0),
+                    key=lambda h: (-h["saving"], -h["saving_per_rupee"]))
+
+    # All heads reduce the same taxable income, so any split of the useful
+    # total is optimal; fill the best-ranked heads first.
+    remaining = min(sum(h["room"] for h in heads), max(0, taxable - ceiling))
+    allocation = {}
+    for h in ranked:
+        amount = min(h["room"], remaining)
+        if amount > 0:
+            allocation[h["head"]] = amount
+            remaining -= amount
+    invested = sum(allocation.values())
+    planned_tax = old.tax(max(0, income - (claimed + invested))) if invested else old_tax
+
+    breakeven_taxable = max_taxable_for_tax(old, new_tax)
+    extra = max(0, math.ceil(taxable - breakeven_taxable)) if taxable > breakeven_taxable else 0
+    total_room = sum(h["room"] for h in heads)
+
+    return {
+        "fy": fy,
+        "old_taxable_income": taxable,
+        "old_regime_tax": old_tax,
+        "new_regime_tax": new_tax,
+        "heads": heads,
+        "ranked": ranked,
+        "plan": {
+            "allocation": allocation,
+            "total_investment": invested,
+            "old_regime_tax": planned_tax,
+            "saving": old_tax - planned_tax,
+            "recommended_regime": "old" if planned_tax < new_tax else ("new" if planned_tax > new_tax else "either"),
+        },
+        "breakeven": {
+            "extra_deduction": extra,
+            "reachable": extra <= total_room,
+        },
+    }
+
+
+def regime_breakeven_incomes(total_deductions: float, standard_deduction: float,
+                             fy: str = DEFAULT_FY) -> List[Dict[str, Any]]:
+    """Gross incomes at which the cheaper regime flips, for fixed deductions.
+
+    The difference between old and new regime tax is piecewise linear in
+    gross income, with pieces bounded by both regimes' breakpoints (shifted
+    by their deductions). Each piece is solved for its root, and the sign
+    is read once between consecutive critical points. Each entry gives the
+    income and the regime that is cheaper just above it.
+    """
+    old = get_regime(fy, "old")
+    new = get_regime(fy, "new")
+
+    def diff(income: float) -> float:
+        return old.raw_tax(max(0.0, income - total_deductions)) - new.raw_tax(max(0.0, income - standard_deduction))
+
+    points = sorted({0.0} | {p + total_deductions for p in old.breakpoints() if p + total_deductions > 0}
+                    | {p + standard_deduction for p in new.breakpoints() if p + standard_deduction > 0})
+    # Past the last breakpoint both regimes are linear
+    points.append(points[-1] + 2.0)
+    critical = set(points)
+    for a, b in zip(points, points[1:]):
+        mid = (a + b) / 2
+        g_mid, g_b = diff(mid), diff(b)
+        slope = (g_b - g_mid) / (b - mid)
+        g_a = g_mid - slope * (mid - a)
+        if slope and g_a * g_b < 0:
+            critical.add(a - g_a / slope)
+    tail_slope = diff(points[-1] + 1) - diff(points[-1])
+    if tail_slope:
+        root = points[-1] - diff(points[-1]) / tail_slope
+        if root > points[-1]:
+            critical.add(root)
+
+    flips: List[Dict[str, Any]] = []
+    critical = sorted(critical)
+    previous = 0
+    for i, start in enumerate(critical):
+        end = critical[i + 1] if i + 1 < len(critical) else start + 2.0
+        if end - start < 1e-6:
+            continue
+        value = diff((start + end) / 2)
+        sign = 0 if abs(value) < 1e-9 else (1 if value > 0 else -1)
+        if sign and previous and sign != previous:
+            flips.append({"income": round(start), "cheaper_above": "new" if sign > 0 else "old"})
+        if sign:
+            previous = sign
+    return flips
@@ -0,0 +1,166 @@
+"""Versioned tax rule tables and the compiled per-regime calculators.
+
+Each financial year has a JSON file in ``rules/`` (``fy<FY>.json``) with
+the slabs, 87A rebate, surcharge bands and standard deduction of every
+regime, plus the cess rate and the deduction caps. ``get_regime`` compiles
+a regime once per process into cumulative tax at each slab's lower bound,
+so computing tax is a binary search plus one multiply-add. With
+``TAXYNC_TAX_INDEX_DIR`` set, round taxable incomes are read from a
+precomputed table instead (see ``tax_index``).
+"""
+import hashlib
+import json
+import os
+from bisect import bisect_left
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_FY = "2025-26"
+REGIMES = ("old", "new")
+
+
+def rules_dir() -> Path:
+    """Directory holding the rule files (TAXYNC_RULES_DIR overrides it)."""
+    return Path(os.getenv("TAXYNC_RULES_DIR", Path(__file__).resolve().parent / "rules"))
+
+
+@lru_cache(maxsize=1)
+def available_years() -> List[str]:
+    return sorted(path.stem[2:] for path in rules_dir().glob("fy*.json"))
+
+
+@lru_cache(maxsize=None)
+def load_rules(fy: str = DEFAULT_FY) -> Dict[str, Any]:
+    """Parsed rule file for ``fy``; raises ``ValueError`` if there is none."""
+    path = rules_dir() / f"fy{fy}.json"
+    if "/" in fy or not path.is_file():
+        raise ValueError(f"No tax rules for FY {fy}")
+    return json.loads(path.read_text())
+
+
+def rules_fingerprint(fy: str = DEFAULT_FY) -> str:
+    """Digest of the rule file; changes whenever any figure in it does."""
+    canonical = json.dumps(load_rules(fy), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+
+def deduction_caps(fy: str = DEFAULT_FY) -> Dict[str, float]:
+    return dict(load_rules(fy)["deduction_caps"])
+
+
+class CompiledRegime:
+    """One regime's rules for one financial year, ready to evaluate."""
+
+    def __init__(self, fy: str, regime: str, rules: Dict[str, Any], cess_rate: float, fingerprint: str):
+        self.fy = fy
+        self.regime = regime
+        self.fingerprint = fingerprint
+        slabs = rules["slabs"]
+        lower = [float(bound) for bound, _ in slabs]
+        rates = [float(rate) for _, rate in slabs]
+        if not lower or lower[0] != 0 or any(a >= b for a, b in zip(lower, lower[1:])):
+            raise ValueError(f"FY {fy} {regime} regime: slabs must start at 0 and increase")
+        # Tax accrued below each lower bound, accumulated left to right
+        # exactly as a slab-by-slab loop would add it
+        base = [0.0]
+        for i in range(1, len(lower)):
+            base.append(base[-1] + (lower[i] - lower[i - 1]) * rates[i - 1])
+        self.lower = lower
+        self.rates = rates
+        self.base = base
+        self._lower = np.asarray(lower)
+        self._rates = np.asarray(rates)
+        self._base = np.asarray(base)
+
+        rebate = rules.get("rebate") or {}
+        self.rebate_limit: Optional[float] = rebate.get("limit")
+        # None means the rebate wipes out the whole tax
+        self.rebate_max: Optional[float] = rebate.get("max")
+        bands = sorted(rules.get("surcharge") or [])
+        self.surcharge_thresholds = [float(t) for t, _ in bands]
+        self.surcharge_rates = [float(r) for _, r in bands]
+        self._surcharge_thresholds = np.asarray(self.surcharge_thresholds)
+        self._surcharge_multipliers = np.asarray([1.0] + [1 + r for r in self.surcharge_rates])
+        self.cess_multiplier = 1 + cess_rate
+        self.standard_deduction = float(rules.get("standard_deduction", 0))
+        # Optional precomputed table of ``tax`` every ``index_step`` rupees
+        # of taxable income (see tax_index)
+        self.index: Optional[Sequence[int]] = None
+        self.index_step = 0
+        self._index_len = 0
+
+    def use_index(self, table: Sequence[int], step: int) -> None:
+        """Answer ``tax`` for multiples of ``step`` from ``table``."""
+        self.index = table
+        self.index_step = step
+        self._index_len = len(table)
+
+    def slab_tax(self, taxable: float) -> float:
+        i = max(0, bisect_left(self.lower, taxable) - 1)
+        return self.base[i] + (taxable - self.lower[i]) * self.rates[i]
+
+    def raw_tax(self, taxable: float) -> float:
+        """Tax after rebate, surcharge and cess, before rounding."""
+        tax = self.slab_tax(taxable)
+        if self.rebate_limit is not None and taxable <= self.rebate_limit:
+            if self.rebate_max is None:
+                return 0.0
+            tax = max(0.0, tax - self.rebate_max)
+        if self.surcharge_thresholds:
+            band = bisect_left(self.surcharge_thresholds, taxable)
+            if band:
+                tax *= 1 + self.surcharge_rates[band - 1]
+        return tax * self.cess_multiplier
+
+    def tax(self, taxable: float) -> float:
+        """Final tax (rebate, surcharge, cess, rounded) on a taxable income."""
+        if self._index_len and taxable >= 0 and taxable % self.index_step == 0:
+            i = int(taxable) // self.index_step
+            if i < self._index_len:
+                return float(self.index[i])
+        return float(round(self.raw_tax(taxable)))
+
+    def breakpoints(self) -> List[float]:
+        """Taxable incomes where the tax function changes slope or jumps."""
+        points = set(self.lower) | set(self.surcharge_thresholds)
+        if self.rebate_limit is not None:
+            points.add(float(self.rebate_limit))
+        return sorted(points)
+
+    def tax_array(self, taxable) -> np.ndarray:
+        """Vectorized ``tax`` over an array of taxable incomes."""
+        taxable = np.asarray(taxable, dtype=float)
+        # Highest slab whose lower bound is strictly below the income
+        i = np.clip(np.searchsorted(self._lower, taxable, side="left") - 1, 0, len(self.lower) - 1)
+        tax = self._base[i] + (taxable - self._lower[i]) * self._rates[i]
+        if self.rebate_limit is not None:
+            rebated = 0.0 if self.rebate_max is None else np.maximum(0.0, tax - self.rebate_max)
+            tax = np.where(taxable <= self.rebate_limit, rebated, tax)
+        if self.surcharge_thresholds:
+            tax = tax * self._surcharge_multipliers[np.searchsorted(self._surcharge_thresholds, taxable, side="left")]
+        return np.round(tax * self.cess_multiplier)
+
+
+@lru_cache(maxsize=None)
+def get_regime(fy: str = DEFAULT_FY, regime: str = "new") -> CompiledRegime:
+    """Compiled rules for ``(fy, regime)``, built once per process."""
+    rules = load_rules(fy)
+    if regime not in rules["regimes"]:
+        raise ValueError(f"No {regime} regime in the FY {fy} tax rules")
+    compiled = CompiledRegime(fy, regime, rules["regimes"][regime], rules["cess_rate"], rules_fingerprint(fy))
+    index_dir = os.getenv("TAXYNC_TAX_INDEX_DIR")
+    if index_dir:
+        from tax_index import attach
+
+        attach(compiled, index_dir)
+    return compiled
+
+
+def clear_cache() -> None:
+    """Forget loaded and compiled rules (after editing the rule files)."""
+    available_years.cache_clear()
+    load_rules.cache_clear()
+    get_regime.cache_clear()
@@ -0,0 +1,189 @@
+"""Streaming tax calculation over NDJSON or CSV bodies of any size.
+
+``/calculate-tax/stream`` reads the request body as it arrives, parses it
+line by line and taxes rows in fixed-size chunks with ``calculate_batch``,
+writing each chunk's results before reading further. Memory use is bounded
+by the chunk size, not by the number of rows.
+
+Each row is validated like a ``/calculate-tax`` request: missing fields take
+the request defaults, values must be finite numbers (numeric strings are
+accepted, as they are there) below ``tax_engine.AMOUNT_LIMIT``, the limit of
+``/calculate-tax/batch``. A row that fails gets an ``error`` in its place
+in the output and the stream carries on. Rows are numbered from 0 in input
+order; a CSV header line is not a row. CSV cells must not contain line
+breaks.
+"""
+import csv
+import io
+import json
+import math
+from typing import AsyncIterable, AsyncIterator, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+
+from tax_engine import ADVISOR_HEADS, AMOUNT_LIMIT, REQUEST_FIELDS, calculate_batch
+
+CHUNK_ROWS = 1024
+# Longer lines are reported as errors instead of being buffered
+MAX_LINE_BYTES = 64 * 1024
+
+FIELD_NAMES = tuple(name for name, _ in REQUEST_FIELDS)
+HEADS = tuple(head for head, *_ in ADVISOR_HEADS)
+CSV_HEADER = ("row", "old_regime_tax", "new_regime_tax", "savings", *(f"{head}_saving" for head in HEADS), "error")
+
+Row = Tuple[float, ...]
+# (row number, field values or error message)
+ParsedRow = Tuple[int, Union[Row, str]]
+
+
+async def iter_lines(chunks: AsyncIterable[bytes], max_line: int = MAX_LINE_BYTES) -> AsyncIterator[List[Optional[bytes]]]:
+    """The complete lines of a byte stream, a list per chunk received,
+    without line endings; None for a line longer than ``max_line``, whose
+    bytes are dropped as they arrive."""
+    buffer = b""
+    skipping = False
+    async for chunk in chunks:
+        lines = (buffer + chunk).split(b"\n")
+        buffer = lines.pop()
+        if skipping and lines:
+            # The end of the overlong line
+            lines.pop(0)
+            skipping = False
+        if not skipping and len(buffer) > max_line:
+            lines.append(None)
+            skipping = True
+        if skipping:
+            buffer = b""
+        if lines:
+            yield [line if line is None or len(line) <= max_line else None for line in lines]
+    if buffer:
+        yield [buffer]
+
+
+def parse_values(row: Mapping) -> Union[Row, str]:
+    """Field values in ``REQUEST_FIELDS`` order, or the error message
+    ``/calculate-tax`` would give. Absent fields take the defaults."""
+    values = []
+    for name, default in REQUEST_FIELDS:
+        if name not in row:
+            if default is None:
+                return f"Missing required field: {name}"
+            values.append(default)
+            continue
+        try:
+            number = float(row[name])
+        except (TypeError, ValueError):
+            return f"Invalid numeric value for {name}"
+        if not math.isfinite(number):
+            return f"Invalid numeric value for {name}"
+        if abs(number) >= AMOUNT_LIMIT:
+            return f"Value out of range for {name}"
+        values.append(number)
+    return tuple(values)
+
+
+async def parse_ndjson(batches: AsyncIterable[List[Optional[bytes]]]) -> AsyncIterator[List[ParsedRow]]:
+    row = 0
+    async for lines in batches:
+        parsed = []
+        for line in lines:
+            if line is None:
+                parsed.append((row, "Line too long"))
+            elif not line.strip():
+                continue
+            else:
+                try:
+                    obj = json.loads(line)
+                except ValueError:
+                    parsed.append((row, "Invalid JSON"))
+                else:
+                    parsed.append((row, parse_values(obj) if isinstance(obj, dict) else "Row is not an object"))
+            row += 1
+        yield parsed
+
+
+async def parse_csv(batches: AsyncIterable[List[Optional[bytes]]]) -> AsyncIterator[List[ParsedRow]]:
+    """Rows of a CSV body whose first line names the columns; columns other
+    than the request fields are ignored and empty cells take the defaults.
+    Raises ``ValueError`` on an unusable header."""
+    header = None
+    row = 0
+    async for lines in batches:
+        parsed = []
+        for line in lines:
+            if line is not None and not line.strip():
+                continue
+            if header is None:
+                if line is None:
+                    raise ValueError("CSV header line too long")
+                names = next(csv.reader([line.decode("utf-8-sig")]))
+                header = [(name.strip(), i) for i, name in enumerate(names) if name.strip() in FIELD_NAMES]
+                if "income" not in dict(header):
+                    raise ValueError("CSV header has no income column")
+                continue
+            if line is None:
+                parsed.append((row, "Line too long"))
+            else:
+                try:
+                    cells = next(csv.reader([line.decode("utf-8")]))
+                except (UnicodeDecodeError, csv.Error):
+                    parsed.append((row, "Invalid CSV line"))
+                else:
+                    values = {name: cells[i].strip() for name, i in header if i < len(cells)}
+                    parsed.append((row, parse_values({name: value for name, value in values.items() if value})))
+            row += 1
+        yield parsed
+
+
+def calculate_chunk(rows: List[ParsedRow], fy: str) -> List[dict]:
+    """``/calculate-tax/batch`` results for one chunk, errors in place."""
+    valid = [(i, values) for i, values in rows if not isinstance(values, str)]
+    results = {}
+    if valid:
+        matrix = np.array([values for _, values in valid], dtype=float)
+        batch = calculate_batch({name: matrix[:, j] for j, name in enumerate(FIELD_NAMES)}, fy)
+        columns = [(key, np.round(batch[key]).astype(np.int64).tolist()) for key in ("old_regime_tax", "new_regime_tax", "savings")]
+        heads = [(head, np.round(saving).astype(np.int64).tolist()) for head, saving in batch["suggestion_savings"].items()]
+        for k, (i, _) in enumerate(valid):
+            result = {"row": i}
+            for key, values in columns:
+                result[key] = values[k]
+            result["suggestion_savings"] = {head: values[k] for head, values in heads}
+            results[i] = result
+    return [results[i] if i in results else {"row": i, "error": values} for i, values in rows]
+
+
+async def calculate_stream(batches: AsyncIterable[List[ParsedRow]], fy: str, chunk_rows: Optional[int] = None) -> AsyncIterator[List[dict]]:
+    """Results of the parsed rows, one list per chunk of ``chunk_rows``
+    (default ``CHUNK_ROWS``)."""
+    chunk_rows = chunk_rows or CHUNK_ROWS
+    pending: List[ParsedRow] = []
+    async for parsed in batches:
+        pending.extend(parsed)
+        while len(pending) >= chunk_rows:
+            chunk, pending = pending[:chunk_rows], pending[chunk_rows:]
+            yield calculate_chunk(chunk, fy)
+    if pending:
+        yield calculate_chunk(pending, fy)
+
+
+_encode_json = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def ndjson_lines(results: List[dict]) -> str:
+    return "".join([_encode_json(r) + "\n" for r in results])
+
+
+def csv_lines(results: List[dict], header: bool = False) -> str:
+    """CSV of ``CSV_HEADER`` columns; error rows leave the amounts empty."""
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    if header:
+        writer.writerow(CSV_HEADER)
+    for r in results:
+        if "error" in r:
+            writer.writerow([r["row"], "", "", "", *("" for _ in HEADS), r["error"]])
+        else:
+            savings = r["suggestion_savings"]
+            writer.writerow([r["row"], r["old_regime_tax"], r["new_regime_tax"], r["savings"], *(savings[h] for h in HEADS), ""])
+    return out.getvalue()
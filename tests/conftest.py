@@ -0,0 +1,9 @@
+import os
+import tempfile
+
+# Each test run gets its own export cache and job directory, so renders and
+# jobs left by an earlier run (or another checkout) are never picked up.
+# Set before the test modules import main, which reads these at import.
+_scratch = tempfile.TemporaryDirectory(prefix="taxync-tests-")
+os.environ["TAXYNC_EXPORT_CACHE_DIR"] = os.path.join(_scratch.name, "exports")
+os.environ["TAXYNC_EXPORT_JOB_DIR"] = os.path.join(_scratch.name, "jobs")
@@ -0,0 +1,90 @@
+import asyncio
+import importlib.util
+import os
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+spec = importlib.util.spec_from_file_location("bench_run", os.path.join(ROOT, "benchmarks", "run.py"))
+bench_run = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(bench_run)
+load_spec = importlib.util.spec_from_file_location("bench_loadtest", os.path.join(ROOT, "benchmarks", "loadtest.py"))
+loadtest = importlib.util.module_from_spec(load_spec)
+load_spec.loader.exec_module(loadtest)
+
+
+def test_compare_flags_regressions_in_the_worse_direction():
+    baseline = {"e2e.share.c1.rps": 1000.0, "e2e.share.c1.p99_ms": 10.0, "micro.old.ns_per_call": 100.0, "gone": 1}
+    current = {"e2e.share.c1.rps": 850.0, "e2e.share.c1.p99_ms": 8.0, "micro.old.ns_per_call": 105.0, "new": 1}
+    rows = {name: regressed for name, _, _, _, regressed in bench_run.compare(current, baseline, 0.10)}
+    assert rows == {"e2e.share.c1.rps": True, "e2e.share.c1.p99_ms": False, "micro.old.ns_per_call": False}
+
+
+def test_micro_benchmarks_report_every_distribution():
+    metrics = bench_run.run_micro(50, 1)
+    assert len(metrics) == 2 * len(bench_run.income_distributions(1))
+    assert all(value > 0 for value in metrics.values())
+
+
+@pytest.mark.parametrize("protocol", [2, 3])
+def test_redis_stand_in_serves_the_storage_commands(protocol):
+    import redis.asyncio as aioredis
+
+    server = loadtest.RedisStandIn()
+    server.start()
+
+    async def exercise():
+        client = aioredis.Redis.from_url(server.url, protocol=protocol)
+        try:
+            assert await client.get("missing") is None
+            await client.set("a", b"\x00blob", ex=60)
+            assert await client.get("a") == b"\x00blob"
+            assert 0 < await client.ttl("a") <= 60
+            assert await client.ttl("missing") == -2
+            assert await client.set("a", b"other", nx=True) is None
+            assert await client.expire("a", 5) and await client.ttl("a") <= 5
+            assert await client.delete("a", "missing") == 1
+        finally:
+            await client.aclose()
+
+    try:
+        asyncio.run(exercise())
+    finally:
+        server.stop()
+
+
+def test_redis_stand_in_stops_with_clients_connected(capfd):
+    import gc
+    import socket
+
+    server = loadtest.RedisStandIn()
+    server.start()
+    clients = [socket.create_connection(("127.0.0.1", server.port)) for _ in range(3)]
+    try:
+        for sock in clients:
+            sock.sendall(b"PING\r\n")
+            assert sock.recv(16) == b"+PONG\r\n"
+        server.stop()
+        assert not server._handlers and server._loop.is_closed()
+        assert all(sock.recv(16) == b"" for sock in clients)
+    finally:
+        for sock in clients:
+            sock.close()
+    gc.collect()
+    err = capfd.readouterr().err
+    assert "Event loop is closed" not in err and "Task was destroyed" not in err
+
+
+def test_load_summary_and_worker_cpu():
+    samples = [("calculate_tax", 0.010, 200)] * 90 + [("export_pdf", 0.200, 200)] * 9 + [("export_pdf", 1.0, 503)]
+    summary = loadtest.summarize(samples, 2.0)
+    assert summary["all"]["requests"] == 99 and summary["all"]["errors"] == 1
+    assert summary["calculate_tax"]["rps"] == 45.0
+    assert summary["export_pdf"]["p50_ms"] == 200.0 and summary["export_pdf"]["errors"] == 1
+
+    before = {10: (1.0, {11: 0.5})}
+    after = {10: (2.0, {11: 1.5, 12: 0.5}), 20: (0.5, {})}
+    assert loadtest.cpu_usage(before, after, 2.0) == [
+        {"pid": 10, "cpu_pct": 50.0, "subprocess_cpu_pct": 75.0},
+        {"pid": 20, "cpu_pct": 25.0, "subprocess_cpu_pct": 0.0},
+    ]
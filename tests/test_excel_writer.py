@@ -0,0 +1,50 @@
+import io
+
+import openpyxl
+from fastapi.testclient import TestClient
+
+from excel_writer import StreamingWorkbook, write_organisation_workbook
+from main import app, calculate_new_regime_tax, calculate_old_regime_tax
+
+client = TestClient(app)
+
+
+def test_widths_measured_from_sample_then_streamed():
+    book = StreamingWorkbook()
+    sheet = book.sheet("Data", sample_rows=2)
+    sheet.append(["short", 1])
+    sheet.append(["a much longer value", 2])
+    sheet.append(["this row is streamed after the widths are fixed", 3])
+    buffer = io.BytesIO()
+    book.save(buffer)
+
+    ws = openpyxl.load_workbook(buffer)["Data"]
+    assert ws.column_dimensions["A"].width == len("a much longer value") + 2
+    assert [row[0] for row in ws.iter_rows(values_only=True)][-1].startswith("this row")
+
+
+def test_organisation_workbook_has_one_row_per_employee():
+    employees = [{"name": f"E{i}", "income": 500000 + i * 100000, "section80C": 150000} for i in range(25)]
+    buffer = io.BytesIO()
+    write_organisation_workbook(buffer, employees, chunk_size=10)
+
+    wb = openpyxl.load_workbook(buffer)
+    assert wb.sheetnames == ["Summary", "Employees"]
+    rows = list(wb["Employees"].iter_rows(min_row=2, values_only=True))
+    assert len(rows) == 25
+    name, income, deductions, old_tax, new_tax, savings, regime = rows[7]
+    assert name == "E7"
+    assert old_tax == calculate_old_regime_tax(income, deductions)
+    assert new_tax == calculate_new_regime_tax(income)
+    summary = {row[0]: row[1] for row in wb["Summary"].iter_rows(min_row=4, values_only=True)}
+    assert summary["Employees"] == 25
+
+
+def test_organisation_export_endpoint():
+    employees = [{"employee_id": "A1", "income": 1200000}, {"employee_id": "A2", "income": 800000}]
+    resp = client.post("/export/excel/organisation", json={"employees": employees})
+    assert resp.status_code == 200
+    wb = openpyxl.load_workbook(io.BytesIO(resp.content))
+    assert [r[0] for r in wb["Employees"].iter_rows(min_row=2, values_only=True)] == ["A1", "A2"]
+    bad = client.post("/export/excel/organisation", json={"employees": [{"name": "no income"}]})
+    assert bad.status_code == 400
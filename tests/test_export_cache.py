@@ -0,0 +1,66 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import main
+from export_cache import DiskExportCache, etag_matches, export_key
+
+client = TestClient(main.app)
+
+EXPORT = {"formData": {"income": 1_450_000, "section80C": 150000.0}, "taxResult": {"old_regime_tax": 12, "suggestions": []}}
+
+
+def test_key_is_canonical_and_covers_every_input():
+    key = export_key("pdf", {"income": 1.0, "a": 2}, {}, "data:x", "summary:v1")
+    assert key == export_key("pdf", {"a": 2, "income": 1}, {}, "data:x", "summary:v1")
+    others = [
+        export_key("excel", {"income": 1.0, "a": 2}, {}, "data:x", "summary:v1"),
+        export_key("pdf", {"income": 2.0, "a": 2}, {}, "data:x", "summary:v1"),
+        export_key("pdf", {"income": 1.0, "a": 2}, {"x": 1}, "data:x", "summary:v1"),
+        export_key("pdf", {"income": 1.0, "a": 2}, {}, "data:y", "summary:v1"),
+        export_key("pdf", {"income": 1.0, "a": 2}, {}, "data:x", "summary:v2"),
+    ]
+    assert key not in others and len(set(others)) == len(others)
+    assert etag_matches(f'W/"abc", "{key}"', key) and etag_matches("*", key) and not etag_matches('"abc"', key)
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskExportCache(str(tmp_path), max_bytes=25)
+
+    async def run():
+        await cache.put("a", b"a" * 10)
+        await cache.put("b", b"b" * 10)
+        assert bytes(await cache.get("a")) == b"a" * 10
+        await cache.put("c", b"c" * 10)  # evicts b, the least recently used
+        return [await cache.get(k) for k in "abc"]
+
+    a, b, c = asyncio.run(run())
+    assert b is None and bytes(a) == b"a" * 10 and bytes(c) == b"c" * 10
+    assert cache.size == 20
+    # A fresh index (e.g. after a restart) is rebuilt from the directory
+    assert DiskExportCache(str(tmp_path), max_bytes=25).size == 20
+
+
+def test_exports_are_cached_and_revalidated(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "export_cache", DiskExportCache(str(tmp_path), max_bytes=10 * 1024 * 1024))
+    renders = []
+    original = main.run_on_report_pool
+
+    async def counting(*args):
+        renders.append(args[0])
+        return await original(*args)
+
+    monkeypatch.setattr(main, "run_on_report_pool", counting)
+    for path in ("/export/pdf", "/export/excel"):
+        first = client.post(path, json=EXPORT)
+        second = client.post(path, json=EXPORT)
+        assert first.status_code == second.status_code == 200
+        assert first.content == second.content
+        etag = first.headers["etag"]
+        assert second.headers["etag"] == etag
+
+        not_modified = client.post(path, json=EXPORT, headers={"If-None-Match": etag})
+        assert not_modified.status_code == 304 and not_modified.content == b""
+        changed = client.post(path, json=dict(EXPORT, formData={"income": 1}), headers={"If-None-Match": etag})
+        assert changed.status_code == 200 and changed.headers["etag"] != etag
+    assert renders == ["/export/pdf", "/export/pdf", "/export/excel", "/export/excel"]
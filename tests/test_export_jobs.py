@@ -0,0 +1,129 @@
+import asyncio
+import io
+import time
+import zipfile
+
+from fastapi.testclient import TestClient
+
+import main
+
+REPORT = {
+    "formData": {"income": 1200000, "section80C": 100000},
+    "taxResult": {"old_regime_tax": 117000, "new_regime_tax": 78600, "savings": 38400},
+}
+
+
+def _wait_for(client, job_id, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/export/jobs/{job_id}").json()
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError("export job did not finish")
+
+
+def test_bulk_export_job_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(main.export_jobs, "job_dir", tmp_path)
+    reports = [dict(REPORT, formData=dict(REPORT["formData"], name=f"Employee {i}")) for i in range(3)]
+    with TestClient(main.app) as client:
+        resp = client.post("/export/jobs", json={"format": "excel", "reports": reports})
+        assert resp.status_code == 202
+        job_id = resp.json()["jobId"]
+
+        job = _wait_for(client, job_id)
+        assert job["status"] == "completed"
+        assert job["completed"] == 3
+
+        download = client.get(f"/export/jobs/{job_id}/download")
+        assert download.status_code == 200
+        assert download.headers["content-type"] == "application/zip"
+        with zipfile.ZipFile(io.BytesIO(download.content)) as zf:
+            names = zf.namelist()
+            assert names == ["00001_Employee_0.xlsx", "00002_Employee_1.xlsx", "00003_Employee_2.xlsx"]
+            assert zf.testzip() is None
+    # Finished jobs are also recorded next to the spooled files
+    assert (tmp_path / job_id / "job.json").exists()
+
+
+def test_export_job_errors():
+    with TestClient(main.app) as client:
+        assert client.get("/export/jobs/00000000-0000-0000-0000-000000000000").status_code == 404
+        assert client.post("/export/jobs", json={"format": "pdf", "reports": []}).status_code == 400
+        assert client.post("/export/jobs", json={"format": "docx", "reports": [REPORT]}).status_code == 422
+
+
+def test_concurrent_renders_are_all_recorded(tmp_path):
+    from export_jobs import ExportJobManager
+    from storage import MemoryStore
+
+    class StubPool:
+        async def run(self, fn, *args):
+            await asyncio.sleep(0)
+            return b"report"
+
+    async def run():
+        manager = ExportJobManager(MemoryStore(), StubPool(), str(tmp_path), concurrency=4)
+        job = await manager.create("excel", [REPORT] * 200)
+        await manager._tasks[job["id"]]
+        return await manager.get(job["id"])
+
+    job = asyncio.run(run())
+    assert job["status"] == "completed"
+    assert (job["completed"], job["failed"], job["errors"]) == (200, 0, [])
+    assert len(job["files"]) == 200
+
+
+def test_progress_writes_stay_small(tmp_path):
+    from export_jobs import ExportJobManager
+    from storage import MemoryStore
+
+    class RecordingStore(MemoryStore):
+        def __init__(self):
+            super().__init__()
+            self.writes = []
+
+        async def set(self, key, value, ex=None, nx=False):
+            self.writes.append((key, len(value)))
+            return await super().set(key, value, ex=ex, nx=nx)
+
+    class StubPool:
+        async def run(self, fn, *args):
+            await asyncio.sleep(0)
+            return b"report"
+
+    async def run():
+        manager = ExportJobManager(RecordingStore(), StubPool(), str(tmp_path), concurrency=4)
+        job = await manager.create("excel", [REPORT] * 200)
+        await manager._tasks[job["id"]]
+        return manager.store.writes, job["id"]
+
+    writes, job_id = asyncio.run(run())
+    # queued, running and finished snapshots; a small progress record per report
+    assert [key for key, _ in writes].count(f"export_job:{job_id}") == 3
+    progress = [size for key, size in writes if key == f"export_job:{job_id}:progress"]
+    assert len(progress) == 200 and max(progress) < 100
+
+
+def test_a_long_render_elsewhere_is_not_interrupted(tmp_path):
+    from export_jobs import ExportJobManager
+    from storage import MemoryStore
+
+    class SlowPool:
+        async def run(self, fn, *args):
+            await asyncio.sleep(0.3)
+            return b"report"
+
+    async def run():
+        store = MemoryStore()
+        worker = ExportJobManager(store, SlowPool(), str(tmp_path), stale_after=0.1)
+        reader = ExportJobManager(store, SlowPool(), str(tmp_path), stale_after=0.1)
+        job = await worker.create("excel", [REPORT])
+        await asyncio.sleep(0.2)
+        during = await reader.get(job["id"])
+        await worker._tasks[job["id"]]
+        return during, await reader.get(job["id"])
+
+    during, after = asyncio.run(run())
+    assert during["status"] == "running"
+    assert after["status"] == "completed" and after["completed"] == 1
@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from history import ADVICE_COLUMNS, HistoryStore, aggregate_frame
+from main import TaxCalculationRequest, app, compute_tax_result
+from profiling import Profiler
+
+client = TestClient(app)
+
+
+def _record(store, income, **fields):
+    request = TaxCalculationRequest(income=income, **fields)
+    result = compute_tax_result(request)
+    store.record(request.model_dump(), result)
+    return result
+
+
+def test_aggregates_cover_flushed_and_buffered_rows(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    results = [_record(store, income) for income in (400000, 1200000, 1800000)]
+    path = asyncio.run(store.flush())
+    assert path.exists() and not store._buffer
+    results.append(_record(store, 3000000, section80C=150000, hra=200000, home_loan_interest=200000))
+
+    agg = store.aggregates()
+    assert agg["count"] == 4
+    prefs = agg["regime_preference"]
+    assert sum(p["count"] for p in prefs.values()) == 4
+    # savings = old - new regime tax, so the old regime wins when it is negative
+    assert prefs["old"]["count"] == sum(r["savings"] < 0 for r in results)
+    assert prefs["new"]["count"] == sum(r["savings"] > 0 for r in results)
+
+    bands = {b["band"]: b for b in agg["savings_by_income_band"]}
+    assert bands["0-500000"]["count"] == 1
+    assert bands["1500000-2500000"]["count"] == 1
+    assert bands["5000000+"]["count"] == 0 and bands["5000000+"]["mean_savings"] is None
+
+    nps_hits = sum(any(s["head"] == "nps" and s["saving"] > 0 for s in r["ranked_suggestions"]) for r in results)
+    assert agg["advisor"]["nps"]["hits"] == nps_hits
+    assert agg["advisor"]["nps"]["hit_rate"] == nps_hits / 4
+
+
+def test_time_and_fy_filters(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    _record(store, 900000)
+    asyncio.run(store.flush())
+    [old] = store.segments()
+    old.rename(old.with_name("seg-1000-2000-1-1.npz"))
+    _record(store, 900000)
+    asyncio.run(store.flush())
+
+    assert len(store.segments(since=10)) == 1
+    assert store.aggregates(since=10)["count"] == 1
+    assert store.aggregates()["count"] == 2
+    assert store.aggregates(fy="2024-25")["count"] == 0
+    assert store.expire(before=10) == 1
+    assert store.aggregates()["count"] == 1
+
+
+def test_buffer_is_bounded(tmp_path):
+    store = HistoryStore(str(tmp_path), max_buffered=2)
+    for income in (500000, 600000, 700000):
+        _record(store, income)
+    assert store.stats()["buffered"] == 2
+    assert store.dropped == 1
+
+
+def test_segments_hold_only_history_columns(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    _record(store, 2000000, nps=50000)
+    frame = store.read(("fy", "income") + ADVICE_COLUMNS, buffered=list(store._buffer))
+    assert list(frame.columns) == ["fy", "income", *ADVICE_COLUMNS]
+    assert frame["income"].tolist() == [2000000.0]
+
+
+def test_regime_preference_follows_the_sign_of_savings():
+    import pandas as pd
+
+    frame = pd.DataFrame({"income": [600000.0, 600000.0, 2000000.0], "savings": [-5000, 12000, 0],
+                          "plan_saving": [0, 0, 0], **{column: [0, 0, 0] for column in ADVICE_COLUMNS}})
+    agg = aggregate_frame(frame)
+    assert {name: p["count"] for name, p in agg["regime_preference"].items()} == {"old": 1, "new": 1, "equal": 1}
+    bands = {b["band"]: b for b in agg["savings_by_income_band"]}
+    assert bands["500000-1000000"]["old_regime_share"] == 0.5
+    assert bands["1500000-2500000"]["old_regime_share"] == 0.0
+
+
+def test_aggregates_endpoint(monkeypatch, tmp_path):
+    store = HistoryStore(str(tmp_path))
+    monkeypatch.setattr(main, "history", store)
+    assert client.post("/calculate-tax", json={"income": 1500000}).status_code == 200
+
+    assert client.get("/history/aggregates").status_code == 403
+    monkeypatch.setattr(main, "profiler", Profiler(tokens=["secret"]))
+    assert client.get("/history/aggregates", headers={"X-Profile-Token": "nope"}).status_code == 403
+    headers = {"X-Profile-Token": "secret"}
+    resp = client.get("/history/aggregates", params={"bands": "0,1000000"}, headers=headers)
+    assert resp.status_code == 200
+    assert resp.json()["count"] == 1
+    assert [b["band"] for b in resp.json()["savings_by_income_band"]] == ["0-1000000", "1000000+"]
+
+    assert client.get("/history/aggregates", params={"bands": "0,x"}, headers=headers).status_code == 400
+    monkeypatch.setattr(main, "history", None)
+    assert client.get("/history/aggregates").status_code == 404
+
+
+@pytest.mark.parametrize("value,enabled", [(None, False), ("off", False), ("on", True)])
+def test_from_env(monkeypatch, tmp_path, value, enabled):
+    if value is None:
+        monkeypatch.delenv("TAXYNC_HISTORY", raising=False)
+    else:
+        monkeypatch.setenv("TAXYNC_HISTORY", value)
+    monkeypatch.setenv("TAXYNC_HISTORY_DIR", str(tmp_path))
+    store = HistoryStore.from_env()
+    assert (store is not None) == enabled
+    if enabled:
+        assert store.retention_days == 30
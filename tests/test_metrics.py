@@ -0,0 +1,53 @@
+from fastapi.testclient import TestClient
+
+from main import app
+from metrics import Histogram, Registry
+
+client = TestClient(app)
+
+
+def _samples(text: str) -> dict:
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_histogram_exposition_is_cumulative():
+    registry = Registry()
+    latency = registry.histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, "/a")
+    samples = _samples(registry.render())
+    assert samples['latency_seconds_bucket{route="/a",le="0.1"}'] == 2
+    assert samples['latency_seconds_bucket{route="/a",le="1"}'] == 3
+    assert samples['latency_seconds_bucket{route="/a",le="+Inf"}'] == 4
+    assert samples['latency_seconds_count{route="/a"}'] == 4
+    assert samples['latency_seconds_sum{route="/a"}'] == 3.65
+
+
+def test_metrics_endpoint_reports_routes_stages_store_and_cache():
+    client.post("/calculate-tax", json={"income": 1_337_000})
+    client.post("/calculate-tax", json={"income": 1_337_000})
+    report_id = client.post("/share", json={"formData": {}, "taxResult": {}}).json()["reportId"]
+    client.get(f"/share/{report_id}")
+    client.post("/export/excel", json={"formData": {"income": 1_337_000}, "taxResult": {"old_regime_tax": 1}},
+                headers={"Cache-Control": "no-store"})
+
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    samples = _samples(response.text)
+    route = 'taxync_http_request_duration_seconds_count{method="%s",route="%s",status="200"}'
+    assert samples[route % ("POST", "/calculate-tax")] >= 2
+    # Route templates, not raw paths
+    assert samples[route % ("GET", "/share/{report_id}")] >= 1
+    assert not any(report_id in name for name in samples)
+    for endpoint, stage in [("calculate_tax", "compute"), ("calculate_tax", "cache"),
+                            ("export_excel", "write"), ("export_excel", "pool")]:
+        assert samples[f'taxync_stage_duration_seconds_count{{endpoint="{endpoint}",stage="{stage}"}}'] >= 1
+    assert any(name.startswith("taxync_store_op_duration_seconds_count{op=\"set\"") for name in samples)
+    assert samples['taxync_cache_lookups_total{cache="tax_calc",result="local_hit"}'] >= 1
+    assert 0 < samples['taxync_cache_hit_ratio{cache="tax_calc"}'] <= 1
+
@@ -0,0 +1,29 @@
+import base64
+
+from fastapi.testclient import TestClient
+
+from main import app
+from reports import decode_chart_image, iter_chunks
+
+client = TestClient(app)
+
+
+def test_iter_chunks_slices_without_copying():
+    data = bytes(range(256)) * 1000
+    chunks = list(iter_chunks(data, chunk_size=10000))
+    assert all(isinstance(c, memoryview) and c.obj is data for c in chunks)
+    assert b"".join(chunks) == data
+
+
+def test_decode_chart_image_matches_b64decode():
+    raw = bytes(range(256)) * 10
+    data_url = "data:image/png;base64," + base64.b64encode(raw).decode()
+    assert decode_chart_image(data_url) == raw
+
+
+def test_export_pdf_streams_full_document():
+    payload = {"formData": {"income": 900000}, "taxResult": {"old_regime_tax": 1, "new_regime_tax": 2, "savings": -1}}
+    resp = client.post("/export/pdf", json=payload)
+    assert resp.status_code == 200
+    assert int(resp.headers["content-length"]) == len(resp.content)
+    assert resp.content.startswith(b"%PDF") and resp.content.rstrip().endswith(b"%%EOF")
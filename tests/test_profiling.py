@@ -0,0 +1,54 @@
+import marshal
+
+from fastapi.testclient import TestClient
+
+import main
+from profiling import Profiler
+
+client = TestClient(main.app)
+
+
+def test_sampling_is_per_route_and_storage_is_bounded():
+    profiler = Profiler(every=3, max_profiles=2)
+    picks = [(profiler.wants("/a", {}), profiler.wants("/b", {})) for _ in range(6)]
+    assert picks == [(True, True), (False, False), (False, False)] * 2
+    ids = [profiler.save("/a", {}, 0.1) for _ in range(3)]
+    assert profiler.get(ids[0]) is None
+    assert [p["id"] for p in profiler.list()] == ids[:0:-1]
+    assert not Profiler().wants("/a", {})
+
+
+def test_token_profiles_calculate_tax_and_exports(monkeypatch):
+    monkeypatch.setattr(main, "profiler", Profiler(tokens=["secret"]))
+    headers = {"X-Profile-Token": "secret", "Cache-Control": "no-store"}
+
+    assert "X-Profile-Id" not in client.post("/calculate-tax", json={"income": 990_000}).headers
+    assert client.get("/profiles").status_code == 403
+
+    response = client.post("/calculate-tax", json={"income": 990_000}, headers=headers)
+    assert response.status_code == 200
+    profile_id = response.headers["X-Profile-Id"]
+    text = client.get(f"/profiles/{profile_id}", headers=headers).text
+    assert "compute_tax_result" in text
+    raw = client.get(f"/profiles/{profile_id}?format=pstats", headers=headers).content
+    assert any(func[2] == "compute_tax_result" for func in marshal.loads(raw))
+
+    # Export renders are profiled inside the pool worker
+    response = client.post("/export/excel", json={"formData": {"income": 990_000}, "taxResult": {}}, headers=headers)
+    assert response.status_code == 200
+    text = client.get(f"/profiles/{response.headers['X-Profile-Id']}", headers=headers).text
+    assert "write_tax_report" in text
+    assert len(client.get("/profiles", headers=headers).json()["profiles"]) == 2
+
+
+def test_profiles_are_hidden_when_disabled():
+    assert client.get("/profiles").status_code == 404
+
+
+def test_sampled_profiles_need_a_configured_token(monkeypatch):
+    profiler = Profiler(every=1)
+    monkeypatch.setattr(main, "profiler", profiler)
+    profile_id = profiler.save("/calculate-tax", {}, 0.1)
+    assert not profiler.authorized({"X-Profile-Token": ""})
+    assert client.get("/profiles").status_code == 403
+    assert client.get(f"/profiles/{profile_id}?format=pstats").status_code == 403
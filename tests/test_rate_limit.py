@@ -0,0 +1,88 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import main
+from rate_limit import RateLimiter, client_id, retry_after
+
+client = TestClient(main.app)
+
+EXPORT = {"formData": {"income": 900_000}, "taxResult": {"old_regime_tax": 1}}
+
+
+def test_bucket_allows_a_burst_then_refills(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("rate_limit.time.monotonic", lambda: now[0])
+    limiter = RateLimiter("t", rate=2, burst=3)
+
+    async def take(n, who="a"):
+        return [await limiter.acquire(who) for _ in range(n)]
+
+    assert asyncio.run(take(3)) == [0, 0, 0]
+    assert asyncio.run(take(1)) == [0.5]
+    assert asyncio.run(take(1, "b")) == [0]
+    now[0] += 0.5
+    assert asyncio.run(take(2)) == [0, 0.5]
+    assert limiter.stats()["limited"] == 2 and limiter.stats()["clients"] == 2
+
+
+def test_shared_buckets_use_redis_and_fall_back_to_local():
+    class ScriptStore:
+        def __init__(self, result):
+            self.result = result
+            self.calls = []
+
+        async def eval(self, script, keys, args):
+            self.calls.append((keys, args))
+            return self.result
+
+    refused = RateLimiter("t", rate=1, burst=1, store=ScriptStore([0, 1500]))
+    assert asyncio.run(refused.acquire("a")) == 1.5
+    assert refused.store.calls == [(["ratelimit:t:a"], [1, 1, 1.0])]
+
+    unavailable = RateLimiter("t", rate=1, burst=1, store=ScriptStore(None))
+    assert asyncio.run(unavailable.acquire("a")) == 0
+    assert asyncio.run(unavailable.acquire("a")) > 0.9
+
+
+def test_disabled_by_default(monkeypatch):
+    monkeypatch.delenv("TAXYNC_EXPORT_RATE", raising=False)
+    assert RateLimiter.from_env("export", None) is None
+
+
+def test_client_identity_and_retry_after():
+    headers = {"x-forwarded-for": "203.0.113.7, 10.0.0.1"}
+    assert client_id(headers, "10.0.0.1", "x-forwarded-for") == "203.0.113.7"
+    assert client_id({}, "10.0.0.1", "x-forwarded-for") == "10.0.0.1"
+    assert client_id(headers, "10.0.0.1") == "10.0.0.1"
+    assert retry_after(0.2) == "1" and retry_after(2.1) == "3"
+
+
+def test_export_renders_are_limited_per_client(monkeypatch):
+    async def render(route, request, fn, *args):
+        return (b"%PDF-1.4 test", {"render": 0.0}), None
+
+    monkeypatch.setattr(main, "export_cache", None)
+    monkeypatch.setattr(main, "run_on_report_pool", render)
+    monkeypatch.setattr(main, "export_limiter", RateLimiter("export", rate=0.01, burst=1))
+    monkeypatch.setattr(main, "RATE_LIMIT_CLIENT_HEADER", "x-forwarded-for")
+
+    assert client.post("/export/pdf", json=EXPORT).status_code == 200
+    limited = client.post("/export/excel", json=EXPORT)
+    assert limited.status_code == 429
+    assert limited.headers["retry-after"] == "100"
+    assert client.post("/export/pdf", json=EXPORT, headers={"X-Forwarded-For": "198.51.100.2"}).status_code == 200
+    assert client.get("/export/pool").json()["rate_limit"]["limited"] == 1
+
+
+def test_bulk_jobs_are_charged_per_report(monkeypatch):
+    async def create(fmt, reports):
+        return {"id": "job", "status": "queued", "total": len(reports)}
+
+    monkeypatch.setattr(main.export_jobs, "create", create)
+    monkeypatch.setattr(main, "export_limiter", RateLimiter("export", rate=0.01, burst=3))
+    job = {"format": "pdf", "reports": [EXPORT] * 2}
+    assert client.post("/export/jobs", json=job).status_code == 202
+    assert client.post("/export/jobs", json=job).status_code == 429
+    too_big = client.post("/export/jobs", json={"format": "pdf", "reports": [EXPORT] * 4})
+    assert too_big.status_code == 400
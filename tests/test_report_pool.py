@@ -0,0 +1,95 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from report_pool import PoolSaturated, ReportPool
+
+client = TestClient(app)
+
+EXPORT_PAYLOAD = {
+    "formData": {"income": 1200000, "section80C": 100000},
+    "taxResult": {"old_regime_tax": 117000, "new_regime_tax": 78600, "savings": 38400, "suggestions": ["Sample suggestion"]},
+}
+
+
+def test_pool_rejects_when_queue_is_full():
+    release = threading.Event()
+
+    async def run():
+        pool = ReportPool(workers=0, queue_depth=1)
+        first = asyncio.create_task(pool.run(release.wait))
+        second = asyncio.create_task(pool.run(release.wait))
+        await asyncio.sleep(0.05)
+        assert pool.stats()["in_flight"] == 2
+        assert pool.stats()["queued"] == 1
+        with pytest.raises(PoolSaturated) as exc:
+            await pool.run(release.wait)
+        assert exc.value.retry_after >= 1
+        release.set()
+        await asyncio.gather(first, second)
+        stats = pool.stats()
+        pool.shutdown()
+        return stats
+
+    stats = asyncio.run(run())
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 2
+    assert stats["in_flight"] == 0
+
+
+def test_export_pdf_renders_on_pool():
+    # no-store: a render left in the on-disk export cache by an earlier run would skip the pool
+    resp = client.post("/export/pdf", json=EXPORT_PAYLOAD, headers={"Cache-Control": "no-store"})
+    assert resp.status_code == 200
+    assert resp.content.startswith(b"%PDF")
+    assert client.get("/export/pool").json()["completed"] >= 1
+
+
+def test_export_returns_503_when_saturated(monkeypatch):
+    import main
+
+    async def saturated(*args):
+        raise PoolSaturated(3)
+
+    monkeypatch.setattr(main.report_pool, "run", saturated)
+    resp = client.post("/export/excel", json=EXPORT_PAYLOAD)
+    assert resp.status_code == 503
+    assert resp.headers["retry-after"] == "3"
+
+
+def test_broken_pool_is_restarted_once_for_concurrent_callers(monkeypatch):
+    from concurrent.futures import Executor, Future, ThreadPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+
+    import report_pool
+
+    created = []
+
+    class CountingExecutor(ThreadPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            created.append(self)
+
+    monkeypatch.setattr(report_pool, "ThreadPoolExecutor", CountingExecutor)
+
+    class BrokenExecutor(Executor):
+        def submit(self, fn, *args, **kwargs):
+            future = Future()
+            future.set_exception(BrokenProcessPool("worker died"))
+            return future
+
+    async def run():
+        pool = ReportPool(workers=0, queue_depth=4)
+        pool._executor = BrokenExecutor()
+        results = await asyncio.gather(*(pool.run(lambda i=i: i) for i in range(3)))
+        replacement = pool._executor
+        pool.shutdown()
+        return results, replacement
+
+    results, replacement = asyncio.run(run())
+    assert results == [0, 1, 2]
+    # One replacement, shared by every caller that saw the old pool break
+    assert created == [replacement]
@@ -0,0 +1,67 @@
+from fastapi.testclient import TestClient
+
+from main import app
+from report_templates import TEMPLATES, get_template
+from reports import render_pdf
+
+client = TestClient(app)
+
+FORM_DATA = {"income": 1500000, "section80C": 150000, "hra": 60000, "employer": "Acme & Co"}
+TAX_RESULT = {"old_regime_tax": 195000, "new_regime_tax": 140400, "savings": 54600, "suggestions": ["Sample"]}
+
+
+def test_templates_are_compiled_once_per_process():
+    assert get_template("summary") is get_template("summary")
+    assert get_template("summary").styles is get_template("detailed").styles
+
+
+def test_every_template_renders_repeatedly():
+    for name in TEMPLATES:
+        first = render_pdf(FORM_DATA, TAX_RESULT, None, name)
+        second = render_pdf(FORM_DATA, TAX_RESULT, None, name)
+        assert first.startswith(b"%PDF")
+        assert len(first) == len(second)
+
+
+def test_export_pdf_template_selection():
+    payload = {"formData": FORM_DATA, "taxResult": TAX_RESULT}
+    summary = client.post("/export/pdf", json=payload)
+    detailed = client.post("/export/pdf", json=dict(payload, template="detailed"))
+    assert summary.status_code == detailed.status_code == 200
+    assert len(detailed.content) > len(summary.content)
+    assert client.post("/export/pdf", json=dict(payload, template="nope")).status_code == 400
+
+
+def test_server_side_charts_are_cached_per_bucket():
+    from report_charts import bucket, tax_chart
+
+    assert [bucket(v) for v in (0, 999, 195_049, 195_501, -54_649)] == [0, 999, 195_000, 196_000, -54_600]
+    near = dict(TAX_RESULT, old_regime_tax=195_020)
+    assert tax_chart("bar", TAX_RESULT).contents is tax_chart("bar", near).contents
+    assert tax_chart("pie", TAX_RESULT).contents is not tax_chart("bar", TAX_RESULT).contents
+
+    payload = {"formData": FORM_DATA, "taxResult": TAX_RESULT}
+    sizes = {}
+    for chart in ("bar", "pie", "none"):
+        response = client.post("/export/pdf", json=dict(payload, chartType=chart), headers={"Cache-Control": "no-store"})
+        assert response.status_code == 200
+        sizes[chart] = len(response.content)
+    # Vector charts add a couple of KB, not a bitmap
+    assert sizes["none"] < sizes["bar"] < sizes["none"] + 4096
+    assert sizes["none"] < sizes["pie"] < sizes["none"] + 4096
+    assert client.post("/export/pdf", json=dict(payload, chartType="radar")).status_code == 422
+
+
+def test_charts_handle_zero_and_non_finite_amounts():
+    from reportlab.graphics.shapes import String
+
+    from report_charts import chart_key, tax_chart
+
+    assert chart_key("bar", {"old_regime_tax": float("inf"), "new_regime_tax": float("nan"), "savings": "x"}) == ("bar", 0, 0, 0)
+    zero = tax_chart("pie", {"old_regime_tax": 0, "new_regime_tax": 0, "savings": 0})
+    assert [s.text for s in zero.contents if isinstance(s, String)] == ["No tax payable"]
+
+    body = '{"formData": {"income": 1000000}, "taxResult": {"old_regime_tax": Infinity, "savings": 1}}'
+    response = client.post("/export/pdf", content=body, headers={"content-type": "application/json"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid numeric value for taxResult"
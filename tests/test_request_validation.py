@@ -0,0 +1,48 @@
+import logging
+
+from fastapi.testclient import TestClient
+
+from access_log import LogSampler
+from main import app
+
+client = TestClient(app)
+
+
+def _post(body: str):
+    return client.post("/calculate-tax", content=body, headers={"Content-Type": "application/json"})
+
+
+def test_non_numeric_fields_get_400_naming_the_field():
+    for body, field in [
+        ('{"income": Infinity}', "income"),
+        ('{"income": 1e400}', "income"),
+        ('{"income": 900000, "hra": "lots"}', "hra"),
+        ('{"income": 900000, "donations": -Infinity}', "donations"),
+    ]:
+        response = _post(body)
+        assert response.status_code == 400
+        assert response.json()["detail"] == f"Invalid numeric value for {field}"
+
+
+def test_missing_income_is_a_validation_error():
+    assert _post("{}").status_code == 422
+
+
+def test_simulate_rejects_non_finite_base():
+    response = client.post("/simulate", content='{"base": {"income": NaN}}', headers={"Content-Type": "application/json"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid numeric value for income"
+
+
+def test_log_sampler():
+    sampler = LogSampler(4)
+    assert [sampler() for _ in range(8)] == [True, False, False, False] * 2
+    assert not any(LogSampler(0)() for _ in range(5))
+
+
+def test_access_log_is_sampled(caplog):
+    with caplog.at_level(logging.INFO, logger="taxync.access"):
+        for _ in range(200):
+            client.get("/")
+    lines = [r for r in caplog.records if r.name == "taxync.access"]
+    assert 1 <= len(lines) <= 3
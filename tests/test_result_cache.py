@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+
+import main
+from cache import MISSING, LocalTTLCache, ReadThroughCache, canonical_key
+
+client = TestClient(main.app)
+
+
+def test_canonical_key_ignores_int_float_and_key_order():
+    assert canonical_key("k", {"income": 1200000, "a": 1}) == canonical_key("k", {"a": 1.0, "income": 1200000.0})
+    assert canonical_key("k", {"income": 1200000}) != canonical_key("k", {"income": 1200000.5})
+
+
+def test_local_cache_evicts_least_recently_used():
+    cache = LocalTTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.get("b") is MISSING
+    assert cache.evictions == 1
+
+
+def test_local_cache_expires_entries():
+    cache = LocalTTLCache(maxsize=2, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is MISSING
+    assert cache.expirations == 1
+
+
+def test_read_through_computes_once():
+    calls = []
+    cache = ReadThroughCache("t", LocalTTLCache(), lambda: None)
+
+    def compute():
+        calls.append(1)
+        return {"v": 1}
+
+    for _ in range(3):
+        assert asyncio.run(cache.get_or_compute("k", compute)) == {"v": 1}
+    assert len(calls) == 1
+    assert cache.stats()["local_hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+
+def test_calculate_tax_serves_cached_result():
+    main.tax_result_cache.local.clear()
+    before = main.tax_result_cache.stats()
+    first = client.post("/calculate-tax", json={"income": 1234567, "section80C": 100000})
+    second = client.post("/calculate-tax", json={"income": 1234567.0, "section80C": 100000.0})
+    assert first.json() == second.json()
+    after = client.get("/cache/stats").json()["tax_calc"]
+    assert after["misses"] == before["misses"] + 1
+    assert after["local_hits"] == before["local_hits"] + 1
+
+
+def test_calculate_tax_cache_bypass_header():
+    client.post("/calculate-tax", json={"income": 2345678})
+    before = main.tax_result_cache.stats()["bypassed"]
+    resp = client.post("/calculate-tax", json={"income": 2345678}, headers={"Cache-Control": "no-store"})
+    assert resp.status_code == 200
+    assert main.tax_result_cache.stats()["bypassed"] == before + 1
+
+
+def test_calculate_tax_rejects_non_finite_values():
+    resp = client.post("/calculate-tax", content='{"income": NaN}', headers={"Content-Type": "application/json"})
+    assert resp.status_code == 400
+
+
+def test_result_key_follows_the_rules_fingerprint(monkeypatch):
+    request = main.TaxCalculationRequest(income=1500000)
+    key = main.tax_result_key(request)
+    assert main.get_regime(request.fy, "old").fingerprint in key
+
+    class EditedRules:
+        fingerprint = "0123456789abcdef"
+
+    monkeypatch.setattr(main, "get_regime", lambda fy, regime: EditedRules())
+    assert main.tax_result_key(request) != key
+    assert main.tax_result_key(request) == main.tax_result_key(main.TaxCalculationRequest(income=1500000.0))
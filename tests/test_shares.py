@@ -0,0 +1,75 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+import main
+from shares import decode_report, encode_report, load_share, save_share
+from storage import MemoryStore
+
+FORM = {"income": 1_200_000.0, "section80C": 50000, "hra": 60000}
+RESULT = {
+    "old_regime_tax": 117000, "new_regime_tax": 80000, "savings": 37000,
+    "optimization_suggestions": ["Invest ₹100,000 more in Section 80C (e.g., ELSS, PPF) to save up to ₹31,200 in taxes."],
+}
+
+
+def test_identical_reports_are_stored_once():
+    async def run():
+        store = MemoryStore()
+        first = await save_share(store, FORM, RESULT, ttl=60)
+        second = await save_share(store, dict(FORM, income=1_200_000), RESULT, ttl=600)
+        blobs = [k for k in store._data if k.startswith("report_blob:")]
+        assert first != second and len(blobs) == 1
+        # Extended to cover the longest-lived alias
+        assert await store.ttl(blobs[0]) > 60
+        a, b = await load_share(store, first), await load_share(store, second)
+        assert a["formData"] == b["formData"] == {"income": 1_200_000, "section80C": 50000, "hra": 60000}
+        assert a["taxResult"] == RESULT and a["createdAt"] <= b["createdAt"]
+        return store
+
+    store = asyncio.run(run())
+    legacy = json.dumps({"formData": FORM, "taxResult": RESULT, "createdAt": "2025-01-01T00:00:00"})
+    blob = store._data[next(k for k in store._data if k.startswith("report_blob:"))][0]
+    assert len(blob) < len(legacy) / 2
+
+
+def test_blob_round_trip():
+    digest, blob = encode_report(FORM, RESULT)
+    assert decode_report(blob) == {"formData": dict(FORM, income=1_200_000), "taxResult": RESULT}
+    assert encode_report(dict(FORM, income=1_200_000), RESULT)[0] == digest
+
+
+def test_legacy_json_shares_are_still_served(monkeypatch):
+    store = MemoryStore()
+    monkeypatch.setattr(main, "store", store)
+    legacy = {"formData": FORM, "taxResult": RESULT, "createdAt": "2025-01-01T00:00:00"}
+    asyncio.run(store.set("report:old-id", json.dumps(legacy), ex=60))
+    client = TestClient(main.app)
+    assert client.get("/share/old-id").json() == legacy
+    report_id = client.post("/share", json={"formData": FORM, "taxResult": RESULT}).json()["reportId"]
+    assert client.get(f"/share/{report_id}").json()["taxResult"] == RESULT
+
+
+def test_shared_report_get_is_cacheable(monkeypatch):
+    store = MemoryStore()
+    monkeypatch.setattr(main, "store", store)
+    client = TestClient(main.app)
+    report_id = client.post("/share", json={"formData": FORM, "taxResult": RESULT}).json()["reportId"]
+
+    first = client.get(f"/share/{report_id}")
+    assert first.status_code == 200
+    assert first.json()["taxResult"] == RESULT
+    etag = first.headers["etag"]
+    assert etag.startswith('"') and not etag.startswith('W/')
+    max_age = int(first.headers["cache-control"].split("max-age=")[1].split(",")[0])
+    assert first.headers["cache-control"].startswith("public") and "immutable" in first.headers["cache-control"]
+    assert 0 < max_age <= main.SHARE_TTL
+
+    # Hot links are served from the in-process cache, even with the store gone
+    store._data.clear()
+    again = client.get(f"/share/{report_id}")
+    assert again.content == first.content and again.headers["etag"] == etag
+    not_modified = client.get(f"/share/{report_id}", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304 and not_modified.headers["etag"] == etag
+    assert client.get("/share/missing").status_code == 404
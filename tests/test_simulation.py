@@ -0,0 +1,84 @@
+import numpy as np
+from fastapi.testclient import TestClient
+
+from main import app, calculate_new_regime_tax, calculate_old_regime_tax
+from tax_optimizer import regime_breakeven_incomes
+
+client = TestClient(app)
+
+
+def test_simulation_grid_matches_calculate_tax():
+    base = {"income": 1_200_000, "section80C": 50000, "hra": 60000}
+    response = client.post("/simulate", json={
+        "base": base,
+        "hike_percent": {"start": 0, "stop": 50, "step": 5},
+        "years": {"start": 1, "stop": 3},
+        "deduction_deltas": {"section80C": {"start": 0, "stop": 100000, "step": 50000}},
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert data["shape"] == [11, 3, 3]
+    columns = {k: np.array(v).reshape(data["shape"]) for k, v in data["columns"].items()}
+    for i, hike in enumerate(data["axes"]["hike_percent"]):
+        for j, year in enumerate(data["axes"]["year"]):
+            for k, delta in enumerate(data["axes"]["section80C"]):
+                income = base["income"] * (1 + hike / 100) ** year
+                deductions = base["section80C"] + delta + base["hra"] + 50000
+                assert columns["old_regime_tax"][i, j, k] == calculate_old_regime_tax(income, deductions)
+                assert columns["new_regime_tax"][i, j, k] == calculate_new_regime_tax(income, 50000)
+
+    # The dashboard's one-year what-if is the same as a /calculate-tax call
+    single = client.post("/calculate-tax", json=dict(base, income=base["income"] * 1.1)).json()
+    assert columns["old_regime_tax"][2, 0, 0] == single["old_regime_tax"]
+    assert columns["new_regime_tax"][2, 0, 0] == single["new_regime_tax"]
+    assert len(data["breakeven"]) == 3
+
+
+def test_breakeven_incomes_flip_the_cheaper_regime():
+    rng = np.random.default_rng(2)
+    found = 0
+    for deductions in rng.uniform(50000, 600000, 40).tolist():
+        flips = regime_breakeven_incomes(deductions, 50000)
+        found += len(flips)
+        for flip in flips:
+            below = calculate_old_regime_tax(flip["income"] - 50, deductions) - calculate_new_regime_tax(flip["income"] - 50)
+            above = calculate_old_regime_tax(flip["income"] + 50, deductions) - calculate_new_regime_tax(flip["income"] + 50)
+            if flip["cheaper_above"] == "new":
+                assert above > 0 >= below
+            else:
+                assert above < 0 <= below
+    assert found
+
+
+def test_simulation_limits():
+    response = client.post("/simulate", json={
+        "base": {"income": 1_000_000},
+        "hike_percent": {"start": 0, "stop": 1000, "step": 0.001},
+    })
+    assert response.status_code == 400
+    response = client.post("/simulate", json={
+        "base": {"income": 1_000_000},
+        "deduction_deltas": {"salary": {"start": 0, "stop": 10}},
+    })
+    assert response.status_code == 400
+    for body in (
+        {"base": {"income": 1_000_000}, "hike_percent": {"start": 0, "stop": 10, "step": 1e-320}},
+        {"base": {"income": 1_000_000}, "deduction_deltas": {"section80C": {"start": 0, "stop": 1, "step": 1e-300}}},
+    ):
+        response = client.post("/simulate", json=body)
+        assert response.status_code == 400, body
+        assert response.json()["detail"].startswith("Simulation grid is limited")
+
+
+def test_simulation_rejects_out_of_range_inputs():
+    for body in (
+        {"base": {"income": 1_000_000}, "years": {"start": 1, "stop": 1000}},
+        {"base": {"income": 1_000_000}, "hike_percent": {"start": 1e6}},
+        {"base": {"income": 1e300}, "hike_percent": {"start": 1000}, "years": {"start": 100}},
+        {"base": {"income": 1_000_000}, "deduction_deltas": {"section80C": {"start": 0, "stop": 1, "step": "nan"}}},
+    ):
+        response = client.post("/simulate", json=body)
+        assert response.status_code == 400, body
+    assert client.post("/simulate", json={"base": {"income": 1_000_000}, "years": {"start": 1000}}).json() == {
+        "detail": "years.start: Input should be less than or equal to 100",
+    }
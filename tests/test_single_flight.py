@@ -0,0 +1,150 @@
+import asyncio
+
+import httpx
+import pytest
+
+import main
+from cache import MISSING, LocalTTLCache, ReadThroughCache
+from rate_limit import RateLimiter
+from single_flight import SingleFlight
+from storage import MemoryStore
+
+
+def test_concurrent_callers_share_one_run():
+    flights = SingleFlight("test")
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return {"value": len(runs)}
+
+    async def run():
+        first = await asyncio.gather(*(flights.do("k", work) for _ in range(5)))
+        second = await flights.do("k", work)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == [{"value": 1}] * 5 and first[0] is first[4]
+    assert second == {"value": 2}
+    assert flights.stats() == {"in_flight": 0, "leaders": 2, "coalesced": 4, "remote_coalesced": 0, "across_workers": False}
+
+
+def test_errors_are_shared_and_a_cancelled_caller_does_not_cancel_the_run():
+    flights = SingleFlight("test")
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def slow():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def run():
+        results = await asyncio.gather(flights.do("e", failing), flights.do("e", failing), return_exceptions=True)
+        leader = asyncio.ensure_future(flights.do("s", slow))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.do("s", slow))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return results, await follower
+
+    errors, value = asyncio.run(run())
+    assert [str(e) for e in errors] == ["boom", "boom"]
+    assert value == "done"
+
+
+def test_flights_span_workers_through_the_store():
+    store = MemoryStore()
+    published = {}
+    workers = [SingleFlight("test", store=store, poll_interval=0.005) for _ in range(2)]
+    runs = []
+
+    async def render():
+        runs.append(1)
+        await asyncio.sleep(0.03)
+        published["k"] = "pdf"
+        return "pdf"
+
+    async def lookup():
+        return published.get("k", MISSING)
+
+    async def run():
+        return await asyncio.gather(*(w.do("k", render, lookup=lookup) for w in workers))
+
+    assert asyncio.run(run()) == ["pdf", "pdf"]
+    assert runs == [1]
+    assert workers[1].remote_coalesced == 1
+    assert asyncio.run(store.get("flight:test:k")) is None
+
+
+def test_cache_misses_are_coalesced():
+    class SlowStore(MemoryStore):
+        async def get(self, key):
+            await asyncio.sleep(0.01)
+            return await super().get(key)
+
+    cache = ReadThroughCache("t", LocalTTLCache(), SlowStore(), flights=SingleFlight("t"))
+    computed = []
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_compute("k", lambda: computed.append(1) or {"a": 1}) for _ in range(4)))
+
+    assert asyncio.run(run()) == [{"a": 1}] * 4
+    assert computed == [1] and cache.misses == 1
+
+
+@pytest.fixture
+def fake_render(monkeypatch):
+    renders = []
+
+    async def render(route, request, fn, *args):
+        renders.append(route)
+        await asyncio.sleep(0.05)
+        return (b"%PDF-1.4 test", {"render": 0.0}), None
+
+    monkeypatch.setattr(main, "export_cache", None)
+    monkeypatch.setattr(main, "run_on_report_pool", render)
+    return renders
+
+
+def test_identical_exports_in_flight_render_once(fake_render, monkeypatch):
+    limiter = RateLimiter("export", rate=0.01, burst=3)
+    monkeypatch.setattr(main, "export_limiter", limiter)
+    body = {"formData": {"income": 1_450_000}, "taxResult": {"old_regime_tax": 12}}
+
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(client.post("/export/pdf", json=body) for _ in range(3)))
+
+    responses = asyncio.run(run())
+    assert [r.status_code for r in responses] == [200] * 3
+    assert {r.content for r in responses} == {b"%PDF-1.4 test"}
+    assert fake_render == ["/export/pdf"]
+    # Each request is charged, though they share one render
+    assert limiter.stats()["allowed"] == 3 and limiter.stats()["limited"] == 0
+
+
+def test_a_limited_client_does_not_fail_a_shared_render(fake_render, monkeypatch):
+    limiter = RateLimiter("export", rate=0.01, burst=1)
+    monkeypatch.setattr(main, "export_limiter", limiter)
+    monkeypatch.setattr(main, "RATE_LIMIT_CLIENT_HEADER", "x-forwarded-for")
+    body = {"formData": {"income": 1_460_000}, "taxResult": {"old_regime_tax": 12}}
+    other = {"formData": {"income": 1}, "taxResult": {}}
+
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            spent = await client.post("/export/pdf", json=other, headers={"X-Forwarded-For": "198.51.100.1"})
+            assert spent.status_code == 200
+            return await asyncio.gather(
+                client.post("/export/pdf", json=body, headers={"X-Forwarded-For": "198.51.100.1"}),
+                client.post("/export/pdf", json=body, headers={"X-Forwarded-For": "198.51.100.2"}),
+            )
+
+    limited, rendered = asyncio.run(run())
+    assert limited.status_code == 429
+    assert rendered.status_code == 200 and rendered.content == b"%PDF-1.4 test"
+    assert fake_render == ["/export/pdf"] * 2
@@ -0,0 +1,54 @@
+import json
+import os
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+
+from report_pool import ReportPool
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded on first export (or by TAXYNC_PREWARM_EXPORTS), never by import
+LAZY_MODULES = ("reportlab", "openpyxl", "pandas")
+# Generous budget for `import main`; it was ~108 MB with the export stack
+RSS_BUDGET_MB = 90
+
+# Peak RSS from VmHWM: unlike ru_maxrss it is not inherited across fork+exec
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import main
+with open("/proc/self/status") as f:
+    hwm_kb = next(int(line.split()[1]) for line in f if line.startswith("VmHWM"))
+print(json.dumps({
+    "seconds": time.perf_counter() - started,
+    "rss_mb": hwm_kb / 1024,
+    "loaded": sorted({m.split(".")[0] for m in sys.modules} & set(%r)),
+}))
+""" % (LAZY_MODULES,)
+
+
+def test_import_main_does_not_load_export_libraries():
+    env = dict(os.environ, REDIS_URL="")
+    out = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    assert result["loaded"] == []
+    assert result["rss_mb"] < RSS_BUDGET_MB, result
+
+
+def test_prewarm_in_lifespan(monkeypatch):
+    import main
+
+    monkeypatch.setenv("TAXYNC_PREWARM_EXPORTS", "1")
+    monkeypatch.setattr(main, "report_pool", ReportPool(workers=0, queue_depth=1))
+    calls = []
+    monkeypatch.setattr(main, "prewarm", lambda: calls.append(1))
+    with TestClient(main.app) as client:
+        assert client.get("/").status_code == 200
+        # Runs in the background; wait for the pool to finish it
+        for _ in range(100):
+            if calls:
+                break
+            client.get("/export/pool")
+    assert calls
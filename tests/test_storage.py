@@ -0,0 +1,106 @@
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+
+from main import app
+from storage import MemoryStore, Storage
+
+client = TestClient(app)
+
+
+def test_memory_store_expiry_and_ttl():
+    async def run():
+        mem = MemoryStore()
+        await mem.set("a", "1", ex=60)
+        await mem.set("b", b"2")
+        assert await mem.get("a") == b"1"
+        assert 0 < await mem.ttl("a") <= 60
+        assert await mem.ttl("b") == -1
+        assert await mem.ttl("missing") == -2
+        await mem.set("c", "3", ex=1)
+        mem._data["c"] = (b"3", time.monotonic() - 1)
+        assert await mem.get("c") is None
+
+    asyncio.run(run())
+
+
+def test_storage_falls_back_when_redis_unreachable():
+    async def run():
+        store = Storage(url="redis://127.0.0.1:1/0", connect_timeout=0.2, retry_interval=60)
+        await store.set("k", "v", ex=10)
+        assert not store.redis_available
+        assert await store.get("k") == b"v"
+        assert store.stats()["errors"] == 1
+        assert store.stats()["fallback_ops"] == 2
+        assert await store.set("k", "w", nx=True) is False
+        assert await store.set("n", "w", ex=10, nx=True) is True
+        assert await store.eval("return 1", [], []) is None
+
+    asyncio.run(run())
+
+
+def test_storage_eval_marks_unreachable_redis_down():
+    async def run():
+        store = Storage(url="redis://127.0.0.1:1/0", connect_timeout=0.2, retry_interval=60)
+        assert await store.eval("return 1", ["k"], [1]) is None
+        assert not store.redis_available
+        assert store.stats()["errors"] == 1
+
+    asyncio.run(run())
+
+
+def test_storage_retries_redis_after_interval():
+    async def run():
+        store = Storage(url="redis://127.0.0.1:1/0", connect_timeout=0.2, retry_interval=0)
+        await store.set("k", "v")
+        await store.get("k")
+        # Each op retries Redis lazily instead of disabling it for good
+        assert store.stats()["errors"] == 2
+        assert await store.get("k") == b"v"
+
+    asyncio.run(run())
+
+
+def test_share_round_trip_without_redis():
+    payload = {"formData": {"income": 1000000}, "taxResult": {"old_regime_tax": 117000}}
+    report_id = client.post("/share", json=payload).json()["reportId"]
+    resp = client.get(f"/share/{report_id}")
+    assert resp.status_code == 200
+    assert resp.json()["formData"] == payload["formData"]
+    assert client.get("/share/does-not-exist").status_code == 404
+
+
+def test_storage_closes_the_pool_of_a_finished_loop():
+    import importlib.util
+    import os
+
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "loadtest.py")
+    spec = importlib.util.spec_from_file_location("bench_loadtest", path)
+    loadtest = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(loadtest)
+
+    class CountingStandIn(loadtest.RedisStandIn):
+        open = 0
+
+        async def _handle(self, reader, writer):
+            self.open += 1
+            try:
+                await super()._handle(reader, writer)
+            finally:
+                self.open -= 1
+
+    server = CountingStandIn()
+    server.start()
+    store = Storage(url=server.url)
+    try:
+        for _ in range(3):
+            # A loop per run, as with asyncio.run or a TestClient without lifespan
+            asyncio.run(store.set("k", "v"))
+        time.sleep(0.1)
+        assert server.open == 1
+        asyncio.run(store.close())
+        time.sleep(0.1)
+        assert server.open == 0
+    finally:
+        server.stop()
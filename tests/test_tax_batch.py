@@ -0,0 +1,97 @@
+import json
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from main import app, calculate_old_regime_tax, calculate_new_regime_tax, get_tax_saving_for_investment
+from tax_engine import calculate_batch
+
+client = TestClient(app)
+
+
+def _sample_columns(n=2000, seed=7):
+    rng = np.random.default_rng(seed)
+    # Mix of random incomes and exact slab/rebate boundaries
+    boundaries = np.array([0, 250000, 300000, 500000, 550000, 600000, 900000, 1000000, 1050000, 1200000, 1500000, 1550000])
+    income = np.concatenate([boundaries, rng.integers(0, 5_000_000, n).astype(float), rng.uniform(0, 3_000_000, n)])
+    size = income.size
+    return {
+        "income": income,
+        "section80C": rng.choice([0, 50000, 100000, 150000, 200000], size).astype(float),
+        "section80D": rng.choice([0, 10000, 25000], size).astype(float),
+        "hra": rng.choice([0, 120000.5], size),
+        "home_loan_interest": rng.choice([0, 150000, 200000], size).astype(float),
+        "standard_deduction": np.full(size, 50000.0),
+        "edu_loan_interest": np.zeros(size),
+        "donations": rng.uniform(0, 20000, size),
+    }
+
+
+def test_batch_matches_scalar_functions():
+    columns = _sample_columns()
+    result = calculate_batch(columns)
+    for i in range(columns["income"].size):
+        row = {k: float(v[i]) for k, v in columns.items()}
+        total = sum(v for k, v in row.items() if k != "income")
+        old_tax = calculate_old_regime_tax(row["income"], total)
+        new_tax = calculate_new_regime_tax(row["income"], row["standard_deduction"])
+        assert result["old_regime_tax"][i] == old_tax
+        assert result["new_regime_tax"][i] == new_tax
+        assert result["savings"][i] == old_tax - new_tax
+        expected_80c = get_tax_saving_for_investment(150000 - row["section80C"], row["income"], total) if row["section80C"] < 150000 else 0
+        expected_nps = get_tax_saving_for_investment(50000, row["income"], total) if row["income"] > 750000 else 0
+        assert result["suggestion_savings"]["section80C"][i] == expected_80c
+        assert result["suggestion_savings"]["nps"][i] == expected_nps
+
+
+def test_batch_accepts_dataframe():
+    columns = _sample_columns(n=50)
+    from_df = calculate_batch(pd.DataFrame(columns))
+    from_dict = calculate_batch(columns)
+    assert np.array_equal(from_df["old_regime_tax"], from_dict["old_regime_tax"])
+    assert np.array_equal(from_df["new_regime_tax"], from_dict["new_regime_tax"])
+
+
+def test_batch_endpoint_json_array_preserves_order():
+    rows = [{"income": 1200000, "section80C": 100000}, {"income": 400000}, {"income": 900000}]
+    resp = client.post("/calculate-tax/batch", json=rows)
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+    assert [r["new_regime_tax"] for r in results] == [
+        calculate_new_regime_tax(row["income"]) for row in rows
+    ]
+    single = client.post("/calculate-tax", json=rows[0]).json()
+    assert results[0]["old_regime_tax"] == single["old_regime_tax"]
+    assert results[0]["savings"] == single["savings"]
+
+
+def test_batch_endpoint_columnar_and_ndjson():
+    columnar = client.post("/calculate-tax/batch", json={"income": [600000, 1000000], "standard_deduction": [0, 0]})
+    assert [r["old_regime_tax"] for r in columnar.json()["results"]] == [33800, 117000]
+
+    body = "\n".join(json.dumps({"income": v}) for v in [900000, 1150000]) + "\n"
+    resp = client.post("/calculate-tax/batch", content=body, headers={"Content-Type": "application/x-ndjson"})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [r["new_regime_tax"] for r in lines] == [41600, 78000]
+
+
+def test_batch_endpoint_rejects_invalid_rows():
+    resp = client.post("/calculate-tax/batch", json=[{"income": 100}, {"income": "abc"}])
+    assert resp.status_code == 400
+    resp = client.post("/calculate-tax/batch", json=[{"income": 100}, {"section80C": 5}])
+    assert resp.status_code == 400
+    assert "income" in resp.json()["detail"]
+
+
+def test_batch_endpoint_rejects_malformed_and_out_of_range_income():
+    resp = client.post("/calculate-tax/batch", json={"income": {"a": 1}})
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "Invalid numeric value for income"
+    resp = client.post("/calculate-tax/batch", json={"income": [100, 1e308]})
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "Value out of range for income at row 1"
+    resp = client.post("/calculate-tax/batch", json=[{"income": 100, "hra": -1e18}])
+    assert resp.status_code == 400 and "hra" in resp.json()["detail"]
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+import tax_rules
+from tax_index import attach, index_filename, write_index
+from tax_rules import CompiledRegime, get_regime, load_rules, rules_fingerprint
+
+FY = "2025-26"
+STEP = 1000
+MAX = 3_000_000
+
+
+def _fresh(regime):
+    rules = load_rules(FY)
+    return CompiledRegime(FY, regime, rules["regimes"][regime], rules["cess_rate"], rules_fingerprint(FY))
+
+
+@pytest.fixture(scope="module")
+def index_dir(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("tax-index")
+    write_index(str(directory), FY, STEP, MAX)
+    return directory
+
+
+@pytest.mark.parametrize("regime", ["old", "new"])
+def test_lookups_match_live_calculation(index_dir, regime):
+    indexed = _fresh(regime)
+    assert attach(indexed, str(index_dir))
+    live = _fresh(regime)
+    incomes = [0, 1000, 250_000, 700_000.0, 1_275_000, 3_000_000, 3_001_000, 1_234_567, 500.5, -1000]
+    incomes += (np.random.default_rng(5).integers(0, MAX // STEP, 500) * float(STEP)).tolist()
+    for taxable in incomes:
+        assert indexed.tax(taxable) == live.tax(taxable)
+
+
+def test_table_for_other_rules_is_not_attached(index_dir, tmp_path):
+    regime = _fresh("new")
+    name = index_filename(regime, STEP)
+    stale = tmp_path / name.replace(regime.fingerprint, "0" * len(regime.fingerprint))
+    stale.write_bytes((index_dir / name).read_bytes())
+    assert not attach(regime, str(tmp_path))
+    assert regime.index is None
+
+
+def test_corrupted_table_is_not_attached(index_dir, tmp_path):
+    regime = _fresh("old")
+    name = index_filename(regime, STEP)
+    table = np.load(index_dir / name)
+    table[-1] += 1
+    np.save(tmp_path / name, table)
+    assert not attach(regime, str(tmp_path))
+    assert regime.tax(1_500_000) == round(regime.raw_tax(1_500_000))
+
+
+def test_index_dir_env_attaches_on_compile(index_dir, monkeypatch):
+    monkeypatch.setenv("TAXYNC_TAX_INDEX_DIR", str(index_dir))
+    tax_rules.clear_cache()
+    try:
+        regime = get_regime(FY, "new")
+        assert regime.index_step == STEP
+        assert regime.tax(1_500_000) == round(regime.raw_tax(1_500_000))
+        # No table for this year: the live calculation is used
+        assert get_regime("2024-25", "new").index is None
+    finally:
+        monkeypatch.delenv("TAXYNC_TAX_INDEX_DIR")
+        tax_rules.clear_cache()
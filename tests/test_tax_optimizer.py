@@ -0,0 +1,71 @@
+import numpy as np
+from fastapi.testclient import TestClient
+
+from main import app, calculate_old_regime_tax, calculate_new_regime_tax, get_tax_saving_for_investment
+from tax_optimizer import max_taxable_for_tax, optimize, zero_tax_ceiling
+from tax_rules import get_regime
+
+client = TestClient(app)
+
+
+def _request(income, **deductions):
+    request = {
+        "income": income, "section80C": 0.0, "section80D": 0.0, "hra": 0.0, "home_loan_interest": 0.0,
+        "standard_deduction": 50000.0, "edu_loan_interest": 0.0, "donations": 0.0,
+    }
+    request.update(deductions)
+    return request
+
+
+def test_max_taxable_for_tax_is_exact():
+    targets = [0, 1, 13000, 33800, 117000, 117001, 524257] + np.random.default_rng(5).integers(0, 900_000, 200).tolist()
+    for fy in ("2024-25", "2025-26"):
+        for regime in ("old", "new"):
+            compiled = get_regime(fy, regime)
+            for target in targets:
+                t = max_taxable_for_tax(compiled, target)
+                assert compiled.tax(t) <= target
+                assert compiled.tax(t + 1) > target
+    old = get_regime("2025-26", "old")
+    # Full 87A rebate up to 5L
+    assert zero_tax_ceiling(old) == 500_000
+
+
+def test_head_savings_match_scalar_advisor():
+    rng = np.random.default_rng(11)
+    for income in rng.uniform(0, 4_000_000, 300).tolist():
+        request = _request(income, section80C=float(rng.choice([0, 60000, 150000])), hra=float(rng.choice([0, 90000])))
+        advice = optimize(request)
+        claimed = sum(v for k, v in request.items() if k != "income")
+        assert advice["old_regime_tax"] == calculate_old_regime_tax(income, claimed)
+        assert advice["new_regime_tax"] == calculate_new_regime_tax(income, 50000)
+        for head in advice["heads"]:
+            expected = get_tax_saving_for_investment(head["room"], income, claimed) if head["room"] else 0
+            assert head["saving"] == expected
+
+
+def test_plan_skips_deductions_below_the_rebate():
+    # 5.2L taxable: only 20k of deductions are needed to reach the 87A rebate
+    advice = optimize(_request(570_000))
+    assert advice["plan"]["total_investment"] == 20_000
+    assert advice["plan"]["old_regime_tax"] == 0
+    assert all(h["amount"] == 20_000 for h in advice["ranked"])
+
+
+def test_breakeven_extra_deduction():
+    request = _request(1_800_000)
+    advice = optimize(request)
+    extra = advice["breakeven"]["extra_deduction"]
+    taxable = advice["old_taxable_income"]
+    new_tax = advice["new_regime_tax"]
+    assert get_regime("2025-26", "old").tax(taxable - extra) <= new_tax
+    assert get_regime("2025-26", "old").tax(taxable - extra + 1) > new_tax
+
+
+def test_calculate_tax_returns_ranked_suggestions():
+    data = client.post("/calculate-tax", json={"income": 1_800_000}).json()
+    ranked = data["ranked_suggestions"]
+    assert ranked[0]["head"] == "home_loan_interest"  # largest room, 30% slab throughout
+    assert [r["saving"] for r in ranked] == sorted((r["saving"] for r in ranked), reverse=True)
+    assert data["deduction_plan"]["total_investment"] == 425_000
+    assert len(data["optimization_suggestions"]) == 4
@@ -0,0 +1,94 @@
+import json
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import tax_rules
+from main import app, calculate_new_regime_tax, calculate_old_regime_tax
+from tax_engine import calculate_batch
+from tax_rules import get_regime
+
+client = TestClient(app)
+
+
+def _loop_tax(taxable, slabs, rates):
+    tax = 0.0
+    for i in range(len(slabs)):
+        if taxable > slabs[i]:
+            upper = slabs[i + 1] if i + 1 < len(slabs) else taxable
+            tax += (min(taxable, upper) - slabs[i]) * rates[i]
+    return tax
+
+
+@pytest.mark.parametrize("regime", ["old", "new"])
+def test_compiled_table_matches_slab_loop(regime):
+    compiled = get_regime("2025-26", regime)
+    rng = np.random.default_rng(3)
+    incomes = np.concatenate([np.array(compiled.lower), np.array(compiled.lower) + 0.5,
+                              rng.uniform(0, 5_000_000, 2000)])
+    for taxable in incomes.tolist():
+        expected = _loop_tax(taxable, compiled.lower, compiled.rates)
+        assert compiled.slab_tax(taxable) == expected
+    scalar = [compiled.tax(t) for t in incomes.tolist()]
+    assert compiled.tax_array(incomes).tolist() == scalar
+
+
+def test_compiled_tables_are_cached_per_year_and_regime():
+    assert get_regime("2025-26", "old") is get_regime("2025-26", "old")
+    assert get_regime("2025-26", "old") is not get_regime("2024-25", "old")
+
+
+def test_fy_2024_25_rules():
+    # New regime: 7L taxable is fully rebated, 75k standard deduction by default
+    assert calculate_new_regime_tax(775_000, fy="2024-25") == 0
+    # 12L taxable: 20k + 30k + 30k = 80k, +4% cess
+    assert calculate_new_regime_tax(1_200_000, 0, fy="2024-25") == 83_200
+    # Old regime rebate is capped at 12,500, which covers the whole 5L slab tax
+    assert calculate_old_regime_tax(500_000, 0, fy="2024-25") == 0
+    assert calculate_old_regime_tax(600_000, 0, fy="2024-25") == 33_800
+
+
+def test_rebate_cap_and_surcharge_bands(tmp_path, monkeypatch):
+    rules = {
+        "fy": "2099-00",
+        "version": 1,
+        "cess_rate": 0.04,
+        "deduction_caps": {"section80C": 150000, "section80D": 25000, "section24b": 200000, "section80CCD_1B": 50000},
+        "regimes": {
+            "old": {"slabs": [[0, 0.0], [100, 0.10]], "rebate": {"limit": 1000, "max": 50}, "surcharge": []},
+            "new": {"slabs": [[0, 0.10]], "rebate": None, "surcharge": [[1000, 0.10], [5000, 0.15]]},
+        },
+    }
+    (tmp_path / "fy2099-00.json").write_text(json.dumps(rules))
+    monkeypatch.setenv("TAXYNC_RULES_DIR", str(tmp_path))
+    tax_rules.clear_cache()
+    try:
+        old = get_regime("2099-00", "old")
+        assert old.tax(900) == 31  # 80 - 50 rebate = 30, +4% cess
+        assert old.tax(1100) == 104  # above the rebate limit
+        new = get_regime("2099-00", "new")
+        assert new.tax(1000) == 104  # threshold itself carries no surcharge
+        assert new.tax(2000) == round(200 * 1.1 * 1.04)
+        assert new.tax(6000) == round(600 * 1.15 * 1.04)
+        incomes = np.array([0, 900, 1000, 1100, 2000, 5000, 6000], dtype=float)
+        assert old.tax_array(incomes).tolist() == [old.tax(t) for t in incomes.tolist()]
+        assert new.tax_array(incomes).tolist() == [new.tax(t) for t in incomes.tolist()]
+    finally:
+        monkeypatch.delenv("TAXYNC_RULES_DIR")
+        tax_rules.clear_cache()
+
+
+def test_batch_by_financial_year():
+    columns = {"income": [1_000_000.0, 2_000_000.0], "section80C": [0.0, 150000.0]}
+    for fy in ("2024-25", "2025-26"):
+        result = calculate_batch(columns, fy)
+        expected = [calculate_new_regime_tax(i, 50000, fy) for i in columns["income"]]
+        assert result["new_regime_tax"].tolist() == expected
+
+
+def test_calculate_tax_unknown_financial_year():
+    response = client.post("/calculate-tax", json={"income": 1_000_000, "fy": "1999-00"})
+    assert response.status_code == 400
+    response = client.post("/calculate-tax/batch?fy=1999-00", json=[{"income": 1_000_000}])
+    assert response.status_code == 400
@@ -0,0 +1,147 @@
+import asyncio
+import csv
+import io
+import json
+
+from fastapi.testclient import TestClient
+
+import tax_stream
+from main import app
+from tax_engine import batch_to_records, calculate_batch, records_to_columns
+
+client = TestClient(app)
+
+ROWS = [
+    {"income": 1200000, "section80C": 100000},
+    {"income": 400000},
+    {"income": "900000", "hra": 60000.5},
+    {"income": 3500000, "home_loan_interest": 150000, "donations": 12000},
+]
+
+
+def _expected(rows):
+    return batch_to_records(calculate_batch(records_to_columns(rows)))
+
+
+def _post(body, content_type, **params):
+    return client.post("/calculate-tax/stream", content=body, headers={"content-type": content_type}, params=params)
+
+
+def test_ndjson_stream_matches_batch():
+    body = "".join(json.dumps(r) + "\n" for r in ROWS)
+    resp = _post(body, "application/x-ndjson")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    results = [json.loads(line) for line in resp.text.splitlines()]
+    assert [r.pop("row") for r in results] == [0, 1, 2, 3]
+    assert results == _expected(ROWS)
+
+
+def test_invalid_rows_are_reported_inline():
+    lines = ['{"income": 1200000}', '{"income": "abc"}', "not json", "", '{"section80C": 1}',
+             '{"income": 500000, "hra": null}', "[1, 2]", '{"income": 700000}']
+    resp = _post("\n".join(lines), "application/x-ndjson")
+    results = [json.loads(line) for line in resp.text.splitlines()]
+    assert [r.get("error") for r in results] == [
+        None,
+        "Invalid numeric value for income",
+        "Invalid JSON",
+        "Missing required field: income",
+        "Invalid numeric value for hra",
+        "Row is not an object",
+        None,
+    ]
+    assert results[-1]["row"] == 6
+    assert results[-1]["old_regime_tax"] == _expected([{"income": 700000}])[0]["old_regime_tax"]
+
+
+def test_out_of_range_values_are_reported_inline():
+    lines = ['{"income": 1e308}', '{"income": 900000, "donations": -1e19}', '{"income": 900000}']
+    resp = _post("\n".join(lines), "application/x-ndjson")
+    results = [json.loads(line) for line in resp.text.splitlines()]
+    assert [r.get("error") for r in results] == [
+        "Value out of range for income",
+        "Value out of range for donations",
+        None,
+    ]
+    assert results[2]["old_regime_tax"] == _expected([{"income": 900000}])[0]["old_regime_tax"]
+
+
+def test_csv_in_csv_out():
+    body = "\ufeffemployee_id,income,section80C,hra\r\ne1,1200000,100000,\r\ne2,400000,,\r\ne3,nan,,\r\n"
+    resp = _post(body.encode(), "text/csv")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(resp.text)))
+    assert list(rows[0]) == list(tax_stream.CSV_HEADER)
+    expected = _expected(ROWS[:2])
+    for row, result in zip(rows, expected):
+        assert int(row["old_regime_tax"]) == result["old_regime_tax"]
+        assert int(row["nps_saving"]) == result["suggestion_savings"]["nps"]
+    assert rows[2]["error"] == "Invalid numeric value for income"
+    assert rows[2]["old_regime_tax"] == ""
+
+    ndjson = _post(body.encode(), "text/csv", format="ndjson")
+    assert ndjson.headers["content-type"].startswith("application/x-ndjson")
+    assert json.loads(ndjson.text.splitlines()[1])["savings"] == expected[1]["savings"]
+
+
+def test_csv_without_income_column_is_rejected():
+    resp = _post("name,salary\na,1\n", "text/csv")
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "CSV header has no income column"
+
+
+def test_unknown_financial_year():
+    assert _post('{"income": 1}\n', "application/x-ndjson", fy="1999-00").status_code == 400
+
+
+async def _collect(agen):
+    return [item async for item in agen]
+
+
+async def _chunks(*parts):
+    for part in parts:
+        yield part
+
+
+def test_lines_split_across_chunks_and_overlong_lines():
+    batches = asyncio.run(_collect(tax_stream.iter_lines(
+        _chunks(b'{"income":', b' 1}\r\n{"inc', b'ome": 2}\n' + b"x" * 10, b"x" * 10, b"x\n3"), max_line=16,
+    )))
+    lines = [line for batch in batches for line in batch]
+    assert lines == [b'{"income": 1}\r', b'{"income": 2}', None, b"3"]
+
+
+def test_rows_are_calculated_in_fixed_size_chunks():
+    rows = [(i, tax_stream.parse_values({"income": 100000 * i})) for i in range(10)]
+    chunks = asyncio.run(_collect(tax_stream.calculate_stream(_chunks(rows[:3], rows[3:]), "2025-26", chunk_rows=4)))
+    assert [len(c) for c in chunks] == [4, 4, 2]
+    assert [r["row"] for c in chunks for r in c] == list(range(10))
+
+
+def test_results_stream_while_the_body_is_still_being_read(monkeypatch):
+    """Driven at the ASGI level, since TestClient sends the body in one piece."""
+    events = []
+    parts = [b'{"income": 1000000}\n' * 3] * 4
+
+    async def receive():
+        if parts:
+            events.append("receive")
+            return {"type": "http.request", "body": parts.pop(0), "more_body": bool(parts)}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message.get("body"):
+            events.append("send")
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": "/calculate-tax/stream", "root_path": "", "query_string": b"",
+        "headers": [(b"content-type", b"application/x-ndjson")], "client": ("test", 1), "server": ("test", 80),
+    }
+    monkeypatch.setattr(tax_stream, "CHUNK_ROWS", 3)
+    asyncio.run(asyncio.wait_for(app(scope, receive, send), 10))
+    assert events.count("receive") == 4
+    assert events.count("send") == 4
+    assert events.index("send") < len(events) - events[::-1].index("receive") - 1